@@ -17,18 +17,19 @@ by exactly one external momentum.
 
 from __future__ import annotations
 
+import bisect
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from collections import deque
 from typing import Dict, List, Optional, Sequence, Set, Tuple
 
-import sympy as sp
-from sympy.parsing.sympy_parser import (
-    parse_expr,
-    standard_transformations,
-    implicit_multiplication_application,
-)
+# A momentum is its integer coefficient tuple over (l, p1, ..., pn); a propagator is
+# (momentum, mass) with the mass kept as text ("0", "mt").
+Momentum = Tuple[int, ...]
+Propagator = Tuple[Momentum, str]
 
-TRANSFORMS = standard_transformations + (implicit_multiplication_application,)
+_TOKEN_RE = re.compile(r"\s*(?:(\d+)|([A-Za-z][A-Za-z0-9_]*)|(\S))")
 
 # ============================================================
 # Parsing helpers
@@ -60,10 +61,96 @@ def _strip_brackets(s: str) -> str:
     return s
 
 
-def parse_topology_list(raw_list_str: str, local_dict: Dict[str, sp.Symbol]) -> List[Tuple[sp.Expr, sp.Expr]]:
+def parse_linear(s: str, names: Sequence[str]) -> Momentum:
+    """
+    Integer coefficients of a linear combination of `names`:
+    "l - p1 - 2*p3" -> (1, -1, 0, -2) for names (l, p1, p2, p3).
+    Accepts +, -, integer factors (with * or juxtaposition) and parentheses.
+    """
+    index = {name: k for k, name in enumerate(names)}
+    dim = len(names)
+    toks: List[str] = []
+    for m in _TOKEN_RE.finditer(s):
+        if m.group(0).strip():
+            toks.append(m.group(m.lastindex or 0))
+    pos = 0
+
+    # values are (constant, coefficient list); products need a constant factor
+    def peek() -> Optional[str]:
+        return toks[pos] if pos < len(toks) else None
+
+    def take() -> str:
+        nonlocal pos
+        pos += 1
+        return toks[pos - 1]
+
+    def expr() -> Tuple[int, List[int]]:
+        c, v = term()
+        while peek() in ("+", "-"):
+            sign = 1 if take() == "+" else -1
+            c2, v2 = term()
+            c, v = c + sign * c2, [a + sign * b for a, b in zip(v, v2)]
+        return c, v
+
+    def term() -> Tuple[int, List[int]]:
+        c, v = factor()
+        while peek() is not None and peek() not in ("+", "-", ")"):
+            if peek() == "*":
+                take()
+            c2, v2 = factor()
+            if any(v) and any(v2):
+                raise ValueError(f"Not linear in the momenta: {s}")
+            c, v = c * c2, [c * b + c2 * a for a, b in zip(v, v2)]
+        return c, v
+
+    def factor() -> Tuple[int, List[int]]:
+        tok = take() if peek() is not None else None
+        if tok in ("+", "-"):
+            c, v = factor()
+            return (c, v) if tok == "+" else (-c, [-a for a in v])
+        if tok == "(":
+            val = expr()
+            if peek() != ")":
+                raise ValueError(f"Unbalanced parentheses: {s}")
+            take()
+            return val
+        if tok is not None and tok.isdigit():
+            return int(tok), [0] * dim
+        if tok in index:
+            v = [0] * dim
+            v[index[tok]] = 1
+            return 0, v
+        raise ValueError(f"Unexpected {tok!r} in momentum: {s}")
+
+    c, v = expr()
+    if pos != len(toks) or c != 0:
+        raise ValueError(f"Not a linear combination of {', '.join(names)}: {s}")
+    return tuple(v)
+
+
+def format_linear(mom: Sequence[int], names: Sequence[str]) -> str:
+    """(1, -1, 0, -2) -> "l - p1 - 2*p3"; the zero vector gives "0"."""
+    out = ""
+    for c, name in zip(mom, names):
+        if c == 0:
+            continue
+        term = name if abs(c) == 1 else f"{abs(c)}*{name}"
+        if not out:
+            out = term if c > 0 else f"-{term}"
+        else:
+            out += f" + {term}" if c > 0 else f" - {term}"
+    return out or "0"
+
+
+def _mass(s: str) -> str:
+    m = "".join(s.split())
+    return "0" if re.fullmatch(r"[+-]?0+", m) else m
+
+
+def parse_topology_list(raw_list_str: str, names: Sequence[str]) -> List[Propagator]:
     """
     Parse topology like: [[l - p3, 0], [l, mt], [l - p2, mt]]
-    Return: [(mom_expr, mass_expr), ...]
+    Return: [(momentum, mass), ...] with momenta as coefficient tuples over `names`
     """
     s = raw_list_str.strip()
     if not ((s.startswith("[[") and s.endswith("]]")) or (s.startswith("{{") and s.endswith("}}"))):
@@ -92,9 +179,7 @@ def parse_topology_list(raw_list_str: str, local_dict: Dict[str, sp.Symbol]) ->
 
         mom_s = payload[:split_idx].strip()
         mass_s = payload[split_idx + 1 :].strip()
-        mom = parse_expr(mom_s, local_dict=local_dict, transformations=TRANSFORMS)
-        mass = parse_expr(mass_s, local_dict=local_dict, transformations=TRANSFORMS)
-        topo.append((sp.expand(mom), sp.expand(mass)))
+        topo.append((parse_linear(mom_s, names), _mass(mass_s)))
 
     return topo
 
@@ -104,19 +189,14 @@ def parse_topology_list(raw_list_str: str, local_dict: Dict[str, sp.Symbol]) ->
 # ============================================================
 
 
-def shift_of(mom: sp.Expr, l: sp.Symbol) -> sp.Expr:
-    """Return q in (l+q) from mom expression."""
-    return sp.expand(mom - l)
+def shift_of(mom: Momentum) -> Tuple[int, ...]:
+    """Coefficients of q in (l+q) over the external momenta."""
+    return tuple(mom[1:])
 
 
-def coeff_vector(q: sp.Expr, basis: Sequence[sp.Symbol]) -> Tuple[int, ...]:
-    """Integer coefficient vector of q in the basis."""
-    qq = sp.expand(q)
-    return tuple(int(qq.coeff(b)) for b in basis)
-
-
-def vector_to_expr(vec: Sequence[int], basis: Sequence[sp.Symbol]) -> sp.Expr:
-    return sp.expand(sum(vec[i] * basis[i] for i in range(len(basis))))
+def node_momentum(vec: Sequence[int]) -> Momentum:
+    """Momentum l + q of the node (shift vector) q."""
+    return (1,) + tuple(vec)
 
 
 def l1_distance(a: Tuple[int, ...], b: Tuple[int, ...]) -> int:
@@ -195,14 +275,13 @@ def bfs_path(start: Tuple[int, ...], end: Tuple[int, ...],
 
 
 def extend_topology(
-    topo_in: List[Tuple[sp.Expr, sp.Expr]],
-    l: sp.Symbol,
-    basis: Sequence[sp.Symbol],
+    topo_in: List[Propagator],
+    dim: int,
     target_nprops: int,
     eliminate_index: Optional[int] = None,
     max_add: int = 50,
-    mass_new: sp.Expr = sp.Integer(0),
-) -> List[Tuple[sp.Expr, sp.Expr]]:
+    mass_new: str = "0",
+) -> List[Propagator]:
     """
     Extend a topology to have exactly target_nprops propagators.
     
@@ -211,16 +290,44 @@ def extend_topology(
     2. Find which external momenta are covered by unit steps
     3. Prioritize adding propagators that introduce MISSING momenta
     4. Use BFS to find shortest paths, preferring missing-momentum directions
+
+    Covered directions, the gaps between nodes (pairs at distance > 1) and the
+    neighbour counts are updated as each node is added, in O(nodes * dim).
     """
     topo = list(topo_in)
-    dim = len(basis)
-    
-    # Convert to nodes
+
     nodes: Set[Tuple[int, ...]] = set()
-    for mom, _ in topo:
-        q = shift_of(mom, l)
-        vec = coeff_vector(q, basis)
+    node_list: List[Tuple[int, ...]] = []  # sorted
+    covered: Set[int] = set()
+    # (a, b) with a < b and l1_distance > 1 -> (distance, bitmask of differing directions)
+    gaps: Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], Tuple[int, int]] = {}
+    neighbor_count: Dict[Tuple[int, ...], int] = {}
+
+    def insert(vec: Tuple[int, ...]) -> None:
+        for u in node_list:
+            d = l1_distance(u, vec)
+            mask = 0
+            for k in range(dim):
+                if u[k] != vec[k]:
+                    mask |= 1 << k
+            if d == 1:
+                covered.add(mask.bit_length() - 1)
+            elif d > 1:
+                gaps[(u, vec) if u < vec else (vec, u)] = (d, mask)
+        count = 0
+        for n in get_neighbors(vec, dim):
+            if n in neighbor_count:
+                neighbor_count[n] += 1
+                count += 1
+        neighbor_count[vec] = count
         nodes.add(vec)
+        bisect.insort(node_list, vec)
+
+    # Convert to nodes
+    for mom, _ in topo:
+        vec = shift_of(mom)
+        if vec not in nodes:
+            insert(vec)
     
     # Determine max coordinate from input
     max_coord = max((abs(c) for node in nodes for c in node), default=1)
@@ -234,64 +341,33 @@ def extend_topology(
             return False
         if any(abs(c) > max_coord for c in vec):
             return False
-        nodes.add(vec)
-        mom = sp.expand(l + vector_to_expr(vec, basis))
-        topo.append((mom, mass_new))
+        insert(vec)
+        topo.append((node_momentum(vec), mass_new))
         added += 1
         return True
     
-    def get_covered_directions() -> Set[int]:
-        """Find which momentum directions are covered by existing unit steps."""
-        covered = set()
-        node_list = list(nodes)
-        for i, a in enumerate(node_list):
-            for b in node_list[i+1:]:
-                if l1_distance(a, b) == 1:
-                    # Find which direction differs
-                    for k in range(dim):
-                        if a[k] != b[k]:
-                            covered.add(k)
-                            break
-        return covered
-    
     def get_missing_directions() -> List[int]:
         """Get momentum directions not yet covered, excluding eliminated one."""
-        covered = get_covered_directions()
-        missing = [k for k in range(dim) if k not in covered]
-        if eliminate_index is not None and eliminate_index in missing:
-            missing.remove(eliminate_index)
-        return missing
+        return [k for k in range(dim) if k not in covered and k != eliminate_index]
+
+    def by_neighbors() -> List[Tuple[int, ...]]:
+        """Nodes with the fewest neighbours in the set first (ties in sorted order)."""
+        return sorted(node_list, key=neighbor_count.__getitem__)
     
     # Main loop: add propagators
     while len(topo) < target_nprops and added < max_add:
         missing_dirs = get_missing_directions()
-        node_list = sorted(nodes)
+        missing_mask = sum(1 << k for k in missing_dirs)
         
         inserted = False
         
         # Priority 1: Fill gaps ONLY if the gap path includes a missing direction
+        # (gaps crossing a missing direction first, then the shortest, then the first in sorted order)
         best_pair = None
-        best_dist = float('inf')
         best_has_missing = False
-        
-        for i, a in enumerate(node_list):
-            for b in node_list[i+1:]:
-                d = l1_distance(a, b)
-                if d <= 1:
-                    continue
-                
-                # Check if path from a to b includes any missing direction
-                delta = tuple(b[k] - a[k] for k in range(dim))
-                path_has_missing = any(delta[k] != 0 and k in missing_dirs for k in range(dim))
-                
-                # Prefer paths with missing directions, then shortest
-                if path_has_missing and not best_has_missing:
-                    best_dist = d
-                    best_pair = (a, b)
-                    best_has_missing = True
-                elif path_has_missing == best_has_missing and d < best_dist:
-                    best_dist = d
-                    best_pair = (a, b)
+        if gaps:
+            best_pair, (_, mask) = min(gaps.items(), key=lambda kv: (not kv[1][1] & missing_mask, kv[1][0], kv[0]))
+            best_has_missing = bool(mask & missing_mask)
         
         if best_pair is not None and best_has_missing:
             a, b = best_pair
@@ -326,12 +402,7 @@ def extend_topology(
         
         # Priority 2: Add from endpoints in missing directions
         if missing_dirs:
-            def count_neighbors_in_set(node: Tuple[int, ...]) -> int:
-                return sum(1 for n in get_neighbors(node, dim) if n in nodes)
-            
-            sorted_by_neighbors = sorted(node_list, key=count_neighbors_in_set)
-            
-            for node in sorted_by_neighbors:
+            for node in by_neighbors():
                 for k in missing_dirs:
                     for delta in [-1, 1]:
                         candidate = list(node)
@@ -369,16 +440,8 @@ def extend_topology(
         if inserted:
             continue
         
-        # Priority 2: Fill gaps between existing nodes
-        best_pair = None
-        best_dist = float('inf')
-        
-        for i, a in enumerate(node_list):
-            for b in node_list[i+1:]:
-                d = l1_distance(a, b)
-                if 1 < d < best_dist:
-                    best_dist = d
-                    best_pair = (a, b)
+        # Priority 2: Fill gaps between existing nodes (shortest gap, first in sorted order)
+        best_pair = min(gaps, key=lambda pair: (gaps[pair][0], pair)) if gaps else None
         
         if best_pair is not None:
             # Find path and add one node along it
@@ -393,12 +456,7 @@ def extend_topology(
             continue
         
         # Priority 3: Extend from endpoints
-        def count_neighbors_in_set(node: Tuple[int, ...]) -> int:
-            return sum(1 for n in get_neighbors(node, dim) if n in nodes)
-        
-        endpoints = sorted(node_list, key=count_neighbors_in_set)
-        
-        for endpoint in endpoints:
+        for endpoint in by_neighbors():
             for neighbor in get_neighbors(endpoint, dim):
                 if neighbor not in nodes and all(abs(c) <= max_coord for c in neighbor):
                     if add_node(neighbor):
@@ -418,64 +476,101 @@ def extend_topology(
     return topo
 
 
+def _extend_one(args: Tuple[Tuple[Propagator, ...], int, int, Optional[int]]) -> Tuple[Propagator, ...]:
+    """Propagators extend_topology adds to one topology."""
+    topo, dim, target_nprops, eliminate_index = args
+    ext = extend_topology(list(topo), dim, target_nprops, eliminate_index=eliminate_index)
+    return tuple(ext[len(topo):])
+
+
+def extend_distinct(
+    topos: Sequence[Tuple[Propagator, ...]],
+    dim: int,
+    target_nprops: int,
+    eliminate_index: Optional[int] = None,
+    jobs: int = 1,
+) -> Dict[Tuple[Propagator, ...], Tuple[Propagator, ...]]:
+    """
+    Extend each distinct topology once, over `jobs` processes. Topologies are
+    compared exactly (same propagators in the same order): extend_topology is
+    not covariant under l -> +-l + q, so equivalent routings may extend differently.
+    """
+    unique = list(dict.fromkeys(topos))
+    args = [(topo, dim, target_nprops, eliminate_index) for topo in unique]
+    workers = max(1, min(int(jobs), len(unique)))
+    if workers == 1:
+        added = [_extend_one(a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            added = list(ex.map(_extend_one, args, chunksize=max(1, len(args) // (4 * workers))))
+    return dict(zip(unique, added))
+
+
 # ============================================================
 # Output
 # ============================================================
 
 
 def apply_elimination(
-    expr: sp.Expr,
-    basis: Sequence[sp.Symbol],
+    mom: Momentum,
     eliminate_index: Optional[int],
     incoming_indices: Sequence[int],
     outgoing_indices: Sequence[int],
-) -> sp.Expr:
-    """Eliminate one momentum using momentum conservation."""
+) -> Momentum:
+    """Eliminate one external momentum (index into p1..pn) using momentum conservation."""
     if eliminate_index is None:
-        return expr
-
-    p_elim = basis[eliminate_index]
-    incoming = [basis[i] for i in incoming_indices]
-    outgoing = [basis[i] for i in outgoing_indices]
+        return mom
 
     if eliminate_index in outgoing_indices:
-        sub = {p_elim: sum(incoming) - (sum(outgoing) - p_elim)}
+        same, other = outgoing_indices, incoming_indices
     elif eliminate_index in incoming_indices:
-        sub = {p_elim: sum(outgoing) - (sum(incoming) - p_elim)}
+        same, other = incoming_indices, outgoing_indices
     else:
-        return expr
-
-    return sp.expand(expr.subs(sub))
+        return mom
+
+    # p_elim = sum(other) - (sum(same) - p_elim)
+    out = list(mom)
+    c = out[eliminate_index + 1]
+    out[eliminate_index + 1] = 0
+    for i in other:
+        out[i + 1] += c
+    for i in same:
+        if i != eliminate_index:
+            out[i + 1] -= c
+    return tuple(out)
+
+
+def format_topology(
+    topo: Sequence[Propagator],
+    names: Sequence[str],
+    eliminate_index: Optional[int],
+    incoming_indices: Sequence[int],
+    outgoing_indices: Sequence[int],
+) -> str:
+    """One topology as the Mathematica list "  {{mom, mass}, ...}"."""
+    entries = []
+    for mom, mass in topo:
+        mom_out = apply_elimination(mom, eliminate_index, incoming_indices, outgoing_indices)
+        entries.append(f"{{{format_linear(mom_out, names)}, {mass}}}")
+    return "  {" + ", ".join(entries) + "}"
 
 
 def write_extended_m(
     out_path: str,
-    extended_list: List[List[Tuple[sp.Expr, sp.Expr]]],
+    extended_list: List[List[Propagator]],
     var_name: str,
-    basis: Sequence[sp.Symbol],
+    names: Sequence[str],
     eliminate_index: Optional[int],
     incoming_indices: Sequence[int],
     outgoing_indices: Sequence[int],
 ) -> None:
-    lines = []
-    lines.append("(* Auto-generated by extend.py *)\n")
-    lines.append(f"{var_name} = {{\n")
-
-    blocks = []
-    for topo in extended_list:
-        entries = []
-        for mom, mass in topo:
-            mom_out = apply_elimination(mom, basis, eliminate_index, incoming_indices, outgoing_indices)
-            mom_s = sp.sstr(sp.expand(mom_out))
-            mass_s = sp.sstr(sp.expand(mass))
-            entries.append(f"{{{mom_s}, {mass_s}}}")
-        blocks.append("  {" + ", ".join(entries) + "}")
-
-    lines.append(",\n".join(blocks))
-    lines.append("\n};\n")
-
     with open(out_path, "w", encoding="utf-8") as f:
-        f.writelines(lines)
+        f.write(f"(* Auto-generated by extend.py *)\n{var_name} = {{\n")
+        for k, topo in enumerate(extended_list):
+            if k:
+                f.write(",\n")
+            f.write(format_topology(topo, names, eliminate_index, incoming_indices, outgoing_indices))
+        f.write("\n};\n")
 
 
 # ============================================================
@@ -484,42 +579,41 @@ def write_extended_m(
 
 
 def self_test() -> None:
-    l = sp.Symbol("l")
-    p1, p2, p3, p4 = sp.symbols("p1 p2 p3 p4")
-    mt = sp.Symbol("mt")
+    names = ["l", "p1", "p2", "p3", "p4"]
+    dim = len(names) - 1
 
-    local_dict = {"l": l, "p1": p1, "p2": p2, "p3": p3, "p4": p4, "mt": mt}
-    basis = [p1, p2, p3, p4]
+    assert parse_linear("-(p1 - 2 p3) + l", names) == (1, -1, 0, 2, 0)
+    assert format_linear((1, -1, 0, 2, 0), names) == "l - p1 + 2*p3"
 
     # Test 1: Basic extension from 3 to 4 propagators
     raw = "top1:[[l, mt], [l - p1 - p2 + p3, 0], [l - p2, mt]]"
     m = re.match(r"^\s*([A-Za-z0-9_]+)\s*:\s*(\[\[.*\]\])\s*;?\s*$", raw)
-    topo_in = parse_topology_list(m.group(2), local_dict)
+    topo_in = parse_topology_list(m.group(2), names)
     
-    topo_ext = extend_topology(topo_in, l, basis, target_nprops=4)
+    topo_ext = extend_topology(topo_in, dim, target_nprops=4)
     
     # Verify: 4 propagators, all shifts differ by unit steps
     assert len(topo_ext) == 4, f"Expected 4, got {len(topo_ext)}"
     
-    shifts = [coeff_vector(shift_of(mom, l), basis) for mom, _ in topo_ext]
+    shifts = [shift_of(mom) for mom, _ in topo_ext]
     
     # Check that all pairs have at least one path of unit steps
     for i, s1 in enumerate(shifts):
         for s2 in shifts[i+1:]:
             assert l1_distance(s1, s2) >= 1, "Duplicate shift"
     
-    print(f"Test 1 OK: {[sp.sstr(mom) for mom, _ in topo_ext]}")
+    print(f"Test 1 OK: {[format_linear(mom, names) for mom, _ in topo_ext]}")
 
     # Test 2: Verify adjacency in output
     raw2 = "test2:{{l,0},{l-p1-p2,0}}"
     m2 = re.match(r"^\s*([A-Za-z0-9_]+)\s*:\s*(\{\{.*\}\})\s*$", raw2)
-    topo2_in = parse_topology_list(m2.group(2), local_dict)
-    topo2_ext = extend_topology(topo2_in, l, basis, target_nprops=4)
+    topo2_in = parse_topology_list(m2.group(2), names)
+    topo2_ext = extend_topology(topo2_in, dim, target_nprops=4)
     
     assert len(topo2_ext) == 4, f"Expected 4, got {len(topo2_ext)}"
     
     # Check that we can form a path through all nodes
-    shifts2 = [coeff_vector(shift_of(mom, l), basis) for mom, _ in topo2_ext]
+    shifts2 = [shift_of(mom) for mom, _ in topo2_ext]
     node_set = set(shifts2)
     
     # BFS to check connectivity
@@ -528,13 +622,13 @@ def self_test() -> None:
     queue = deque([start])
     while queue:
         curr = queue.popleft()
-        for neighbor in get_neighbors(curr, len(basis)):
+        for neighbor in get_neighbors(curr, dim):
             if neighbor in node_set and neighbor not in visited:
                 visited.add(neighbor)
                 queue.append(neighbor)
     
     assert len(visited) == len(node_set), "Nodes not connected by unit steps"
-    print(f"Test 2 OK: {[sp.sstr(mom) for mom, _ in topo2_ext]}")
+    print(f"Test 2 OK: {[format_linear(mom, names) for mom, _ in topo2_ext]}")
 
     print("All self-tests passed.")
 
@@ -566,23 +660,15 @@ def main() -> None:
 
     print(f"[extend] n = {n} (n_in={n_in}, n_out={n_out})")
 
-    # Build symbols
-    l = sp.Symbol("l")
-    mt = sp.Symbol("mt")
-    p_syms = sp.symbols(" ".join(f"p{i}" for i in range(1, n + 1)))
-    p_syms = list(p_syms) if isinstance(p_syms, (list, tuple)) else [p_syms]
-
-    local_dict = {"l": l, "mt": mt}
-    for sym in p_syms:
-        local_dict[str(sym)] = sym
-
-    basis = p_syms
+    # Coefficient tuples over (l, p1, ..., pn)
+    basis = [f"p{i}" for i in range(1, n + 1)]
+    names = ["l"] + basis
     eliminate_index = len(basis) - 1  # Eliminate highest (p_n)
 
-    incoming_indices = [i for i, p in enumerate(basis) if str(p) in incoming_names]
-    outgoing_indices = [i for i, p in enumerate(basis) if str(p) in outgoing_names]
+    incoming_indices = [i for i, p in enumerate(basis) if p in incoming_names]
+    outgoing_indices = [i for i, p in enumerate(basis) if p in outgoing_names]
 
-    print(f"[extend] basis: {[str(b) for b in basis]}, eliminate: {basis[eliminate_index]}")
+    print(f"[extend] basis: {basis}, eliminate: {basis[eliminate_index]}")
 
     in_path = cwd / "Files" / "Topologies.txt" if cwd.name == "Mathematica" else Path("Files/Topologies.txt")
     out_path = cwd / "Extended.m" if cwd.name == "Mathematica" else Path("Extended.m")
@@ -590,37 +676,33 @@ def main() -> None:
     if not in_path.exists():
         raise FileNotFoundError(f"Topologies.txt not found at {in_path}")
 
-    extended = []
-
-    with open(in_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            m = re.match(r"^\s*([A-Za-z0-9_]+)\s*:\s*(\[\[.*\]\]|\{\{.*\}\})\s*;?\s*$", line)
-            if not m:
-                raise ValueError(f"Line does not match format: {line}")
-
-            name = m.group(1)
-            raw_list = m.group(2)
-            topo_in = parse_topology_list(raw_list, local_dict)
-            before = len(topo_in)
-
-            topo_ext = extend_topology(
-                topo_in, l, basis,
-                target_nprops=n,
-                eliminate_index=eliminate_index,
-            )
-
-            after = len(topo_ext)
-            print(f"[extend] {name}: {before} -> {after}")
-
-            extended.append(topo_ext)
-
-    write_extended_m(
-        str(out_path), extended, "Extended",
-        basis, eliminate_index, incoming_indices, outgoing_indices,
-    )
+    def read_topologies():
+        with open(in_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                m = re.match(r"^\s*([A-Za-z0-9_]+)\s*:\s*(\[\[.*\]\]|\{\{.*\}\})\s*;?\s*$", line)
+                if not m:
+                    raise ValueError(f"Line does not match format: {line}")
+                yield m.group(1), parse_topology_list(m.group(2), names)
+
+    # Pass 1: extend every distinct topology once
+    jobs = int(os.environ.get("GLAS_EXTEND_JOBS") or os.cpu_count() or 1)
+    topos = [tuple(topo_in) for _, topo_in in read_topologies()]
+    added = extend_distinct(topos, len(basis), target_nprops=n, eliminate_index=eliminate_index, jobs=jobs)
+    print(f"[extend] {len(topos)} topologies, {len(added)} distinct (jobs={jobs})")
+
+    # Pass 2: stream Extended.m in input order
+    with open(out_path, "w", encoding="utf-8") as out:
+        out.write("(* Auto-generated by extend.py *)\nExtended = {\n")
+        for k, (name, topo_in) in enumerate(read_topologies()):
+            topo_ext = list(topo_in) + list(added[tuple(topo_in)])
+            print(f"[extend] {name}: {len(topo_in)} -> {len(topo_ext)}")
+            if k:
+                out.write(",\n")
+            out.write(format_topology(topo_ext, names, eliminate_index, incoming_indices, outgoing_indices))
+        out.write("\n};\n")
     print(f"[extend] Wrote {out_path}")
 
 
@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import cmd
 
-from glaslib.commands import contract, evaluate, extract, generate, ioperator, ktexpand, linrels, micoef, misc, ratcombine, reduce, uvct
+from glaslib.commands import color, contract, evaluate, extract, generate, ioperator, kernels, ktexpand, linrels, micoef, misc, ratcombine, reduce, uvct
 from glaslib.commands.common import AppState, MODES
+from glaslib.core.kernelpool import active_pool, set_active_pool
 from glaslib.core.run_manager import RunContext
 from glaslib.formprep import prepare_form
 from glaslib.core.models import get_available_models, get_default_model_id, print_available_models
@@ -60,6 +61,9 @@ class GlasShell(cmd.Cmd):
     def complete_evaluate(self, text, line, begidx, endidx):
         return [m for m in MODES if not text or m.startswith(text)]
 
+    def do_color(self, arg: str) -> None:
+        color.run(self.state, arg)
+
     def do_contract(self, arg: str) -> None:
         if arg.strip().lower().startswith("full"):
             misc.contract_full(self.state, arg)
@@ -101,6 +105,9 @@ class GlasShell(cmd.Cmd):
         modes = ["lo", "nlo"]
         return [m for m in modes if not text or m.startswith(text)]
 
+    def do_kernels(self, arg: str) -> None:
+        kernels.run(self.state, arg)
+
     def do_runs(self, arg: str) -> None:
         misc.runs(self.state, arg)
 
@@ -173,4 +180,10 @@ class GlasShell(cmd.Cmd):
 
 
 def main() -> None:
-    GlasShell().cmdloop()
+    try:
+        GlasShell().cmdloop()
+    finally:
+        pool = active_pool()
+        if pool is not None:
+            pool.stop()
+            set_active_pool(None)
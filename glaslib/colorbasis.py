@@ -0,0 +1,461 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from glaslib.core.costs import size_weights
+from glaslib.core.parallel import batch_tag, form_do_range, partition_items
+
+# Amplitude folders under form/Files/Amps that are decomposed onto the color basis.
+# Tree amplitudes carry d<i> and dC<i>; loop and mass-CT amplitudes only d<i>.
+COLOR_KINDS = ("amp0l", "amp1l", "mct")
+CONJUGATED_KINDS = ("amp0l",)
+
+# form/Files/Color layout:
+#   Reduced/<kind>/d<i>.h  amplitude after #call color (open external indices)
+#   Scan/<kind>/d<i>.txt   its distinct color structures ("A:S1+S2+...;", "C:...;" for dC)
+#   Amps/<kind>/d<i>.h     color-stripped amplitude, sum_k cb(k)*coef (dC: cbC(l))
+#   cb.h / cbC.h           id statements mapping structures to cb(k) / cbC(l)
+#   ColorTables.h          Fill cmat(k,l) = color(S_k * SC_l), ccor(i,j,k,l) = <S_k|T_i.T_j|SC_l>
+COLOR_SUBDIR = "Color"
+COLOR_FUNCTIONS = ("T", "Tr", "SUND", "f", "Tp")
+
+
+def _resolve_procedures_dir(project_root: Path) -> Path:
+    from glaslib.core.paths import procedures_dir
+
+    return procedures_dir()
+
+
+def _ensure_symlink_or_copy(src: Path, dst: Path) -> None:
+    if dst.exists():
+        return
+    try:
+        os.symlink(str(src.resolve()), str(dst.resolve()), target_is_directory=True)
+    except Exception:
+        shutil.copytree(src, dst)
+
+
+def _diagram_indices(folder: Path) -> List[int]:
+    out = [int(p.stem[1:]) for p in folder.glob("d*.h") if p.stem[1:].isdigit()]
+    return sorted(out)
+
+
+def _read_meta(output_dir: Path) -> Dict[str, Any]:
+    meta_path = output_dir / "meta.json"
+    if not meta_path.exists():
+        raise FileNotFoundError(f"Missing meta.json in: {output_dir}")
+    return json.loads(meta_path.read_text(encoding="utf-8"))
+
+
+def color_kinds(form_dir: Path) -> List[str]:
+    """Amplitude kinds present in form/Files/Amps."""
+    amps = Path(form_dir) / "Files" / "Amps"
+    return [k for k in COLOR_KINDS if (amps / k).is_dir() and _diagram_indices(amps / k)]
+
+
+def color_setup(form_dir: Path, kinds: Tuple[str, ...]) -> Dict[str, str]:
+    """
+    FORM snippets for a contraction driver reading the amplitudes of `kinds`.
+
+    With an up-to-date color basis (ColorTables.h newer than every amplitude
+    of `kinds`) the drivers include the color-stripped amplitudes and replace
+    '#call color' by a color-matrix lookup; otherwise the original amplitudes
+    and '#call color' are used.
+
+    Keys: "amps" (folder holding amp0l/, amp1l/, mct/), "tables" (line after
+    declarations.h), "color" (replaces '#call color'), "corr" (I-operator
+    lookup with `in1'/`in2' preprocessor variables).
+    """
+    plain = {"amps": "Files/Amps", "tables": "", "color": "#call color", "corr": ""}
+    files_dir = Path(form_dir) / "Files"
+    tables = files_dir / COLOR_SUBDIR / "ColorTables.h"
+    if not tables.exists():
+        return plain
+    built = tables.stat().st_mtime
+    for kind in kinds:
+        src = files_dir / "Amps" / kind
+        dst = files_dir / COLOR_SUBDIR / "Amps" / kind
+        src_idx = _diagram_indices(src)
+        if src_idx != _diagram_indices(dst):
+            return plain
+        if any((src / f"d{i}.h").stat().st_mtime > built for i in src_idx):
+            return plain
+    return {
+        "amps": f"Files/{COLOR_SUBDIR}/Amps",
+        "tables": f"#include Files/{COLOR_SUBDIR}/ColorTables.h",
+        "color": "id cb(k?)*cbC(l?) = cmat(k,l);",
+        "corr": "id cb(k?)*cbC(l?) = ccor(`in1',`in2',k,l);",
+    }
+
+
+def prepare_color_scan(
+    output_dir: Path,
+    *,
+    jobs: int = 1,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Color decomposition, step 1: reduce every amplitude with '#call color' once.
+
+    Writes batched drivers form/ColorScan_<kind>_BkofN.frm. Each amplitude of
+    Files/Amps/<kind> is color-reduced on its own (external indices stay open)
+    and stored in Files/Color/Reduced/<kind>/, together with the list of its
+    color structures in Files/Color/Scan/<kind>/d<i>.txt.
+    """
+    output_dir = Path(output_dir).resolve()
+    meta = _read_meta(output_dir)
+    if int(meta.get("n0l") or 0) <= 0:
+        raise ValueError("n0l is 0: no tree amplitudes found.")
+
+    form_dir = output_dir / "form"
+    files_dir = form_dir / "Files"
+    kinds = color_kinds(form_dir)
+    if "amp0l" not in kinds:
+        raise FileNotFoundError(f"Missing {files_dir / 'Amps' / 'amp0l'}. Run evaluate first.")
+
+    project_root = output_dir.parent
+    _ensure_symlink_or_copy(_resolve_procedures_dir(project_root), form_dir / "procedures")
+
+    color_dir = files_dir / COLOR_SUBDIR
+    if color_dir.exists():
+        shutil.rmtree(color_dir)
+
+    jobs_requested = max(1, int(jobs))
+    drivers: Dict[str, Path] = {}
+    for kind in kinds:
+        src = files_dir / "Amps" / kind
+        for sub in ("Reduced", "Scan", "Amps"):
+            (color_dir / sub / kind).mkdir(parents=True, exist_ok=True)
+        indices = _diagram_indices(src)
+        weights = size_weights(indices, lambda i: [src / f"d{i}.h"])
+        batches = partition_items(indices, min(jobs_requested, len(indices)), weights=weights, batch_size=batch_size)
+        reduced_write = f"#write <Files/{COLOR_SUBDIR}/Reduced/{kind}/d`i'.h> \"l d`i' = (%E);\\n\" d`i'"
+        scan_write = f"#write <Files/{COLOR_SUBDIR}/Scan/{kind}/d`i'.txt> \"A:%E;\\n\" d`i'"
+        if kind in CONJUGATED_KINDS:
+            reduced_write += f"\n#write <Files/{COLOR_SUBDIR}/Reduced/{kind}/d`i'.h> \"l dC`i' = (%E);\\n\" dC`i'"
+            scan_write += f"\n#write <Files/{COLOR_SUBDIR}/Scan/{kind}/d`i'.txt> \"C:%E;\\n\" dC`i'"
+        for k, batch in enumerate(batches, start=1):
+            tag = batch_tag(f"ColorScan_{kind}", k, len(batches))
+            frm = form_dir / f"{tag}.frm"
+            frm.write_text(
+                f"""#-
+#: IncDir procedures
+#: SmallExtension 100M
+#: MaxTermSize    10M
+#: WorkSpace      1G
+Off Statistics;
+
+#include declarations.h
+CFunction ccoef;
+    .sort
+PolyRatFun rat;
+Format nospaces;
+
+#do i = {form_do_range(batch)}
+#include Files/Amps/{kind}/d`i'.h
+    .sort
+#call color
+b Color;
+    .sort
+{reduced_write}
+* keep one term per color structure
+Collect ccoef;
+id ccoef(?a) = 1;
+    .sort
+{scan_write}
+    .sort
+Drop;
+#message {kind} `i'
+#enddo
+
+.end
+""",
+                encoding="utf-8",
+            )
+            drivers[tag] = frm
+
+    return {
+        "form_dir": form_dir,
+        "kinds": kinds,
+        "jobs_requested": jobs_requested,
+        "jobs_effective": max(1, min(jobs_requested, len(drivers))),
+        "drivers": drivers,
+    }
+
+
+def _split_structures(text: str) -> List[str]:
+    """Split a FORM sum of color structures (all coefficients 1) into its terms."""
+    flat = "".join(text.split())
+    out: List[str] = []
+    depth = 0
+    start = 0
+    for pos, ch in enumerate(flat):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "+" and depth == 0:
+            if flat[start:pos]:
+                out.append(flat[start:pos])
+            start = pos + 1
+    if flat[start:]:
+        out.append(flat[start:])
+    return [s for s in out if s != "0"]
+
+
+def _id_lines(structures: List[str], fun: str) -> str:
+    """id statements mapping each structure to fun(k); products are matched before their factors."""
+    lines = []
+    singlet = None
+    order = sorted(range(len(structures)), key=lambda k: -structures[k].count("*"))
+    for k in order:
+        s = structures[k]
+        if s == "1":
+            singlet = k + 1
+            continue
+        lines.append(f"id {s} = {fun}({k + 1});")
+    if singlet is not None:
+        lines.append(f"if (count({fun},1) == 0) Multiply {fun}({singlet});")
+    return "\n".join(lines) + "\n"
+
+
+def build_color_basis(output_dir: Path) -> Dict[str, Any]:
+    """
+    Color decomposition, step 2: collect the structures found by the scan.
+
+    The basis is process specific: every distinct structure of the amplitudes
+    (cb) and of the conjugate amplitudes (cbC). The bases and the id files
+    Files/Color/cb.h and cbC.h are written; the basis is recorded as
+    meta["color_basis"] = {"cb": [...], "cbC": [...]}.
+    """
+    output_dir = Path(output_dir).resolve()
+    meta_path = output_dir / "meta.json"
+    meta = _read_meta(output_dir)
+    color_dir = output_dir / "form" / "Files" / COLOR_SUBDIR
+    scan_dir = color_dir / "Scan"
+    if not scan_dir.exists():
+        raise FileNotFoundError(f"Missing {scan_dir}. Run the color scan first.")
+
+    cb: List[str] = []
+    cbC: List[str] = []
+    for path in sorted(scan_dir.glob("*/d*.txt")):
+        # FORM may wrap long sums over several lines; entries end with ';'
+        flat = "".join(path.read_text(encoding="utf-8", errors="ignore").split())
+        for entry in flat.split(";"):
+            if entry[:2] not in ("A:", "C:"):
+                continue
+            target = cbC if entry.startswith("C:") else cb
+            for s in _split_structures(entry[2:]):
+                if s not in target:
+                    target.append(s)
+    if not cb or not cbC:
+        raise RuntimeError(f"No color structures found in {scan_dir} (did the scan drivers finish?).")
+    cb.sort(key=lambda s: (s.count("*"), len(s), s))
+    cbC.sort(key=lambda s: (s.count("*"), len(s), s))
+
+    (color_dir / "cb.h").write_text(_id_lines(cb, "cb"), encoding="utf-8")
+    (color_dir / "cbC.h").write_text(_id_lines(cbC, "cbC"), encoding="utf-8")
+
+    meta["color_basis"] = {"cb": cb, "cbC": cbC}
+    meta_path.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+    return {"cb": cb, "cbC": cbC}
+
+
+def prepare_color_strip(
+    output_dir: Path,
+    *,
+    jobs: int = 1,
+    batch_size: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Color decomposition, step 3: drivers writing the coefficient vectors.
+
+    form/ColorStrip_<kind>_BkofN.frm rewrite Files/Color/Reduced/<kind>/d<i>.h
+    as sum_k cb(k)*coef_k (and dC<i> as sum_l cbC(l)*coef_l) into
+    Files/Color/Amps/<kind>/d<i>.h. A term whose color structure is not in the
+    basis stops FORM.
+    """
+    output_dir = Path(output_dir).resolve()
+    form_dir = output_dir / "form"
+    color_dir = form_dir / "Files" / COLOR_SUBDIR
+    if not (color_dir / "cb.h").exists():
+        raise FileNotFoundError(f"Missing {color_dir / 'cb.h'}. Build the color basis first.")
+
+    unmatched = ",1,".join(COLOR_FUNCTIONS)
+    jobs_requested = max(1, int(jobs))
+    drivers: Dict[str, Path] = {}
+    for kind in color_kinds(form_dir):
+        src = color_dir / "Reduced" / kind
+        indices = _diagram_indices(form_dir / "Files" / "Amps" / kind)
+        weights = size_weights(indices, lambda i: [src / f"d{i}.h"])
+        batches = partition_items(indices, min(jobs_requested, len(indices)), weights=weights, batch_size=batch_size)
+        write_block = f"#write <Files/{COLOR_SUBDIR}/Amps/{kind}/d`i'.h> \"l d`i' = (%E);\\n\" d`i'"
+        if kind in CONJUGATED_KINDS:
+            strip_block = f"""Skip dC`i';
+#include Files/{COLOR_SUBDIR}/cb.h
+    .sort
+Skip d`i';
+#include Files/{COLOR_SUBDIR}/cbC.h
+    .sort"""
+            write_block += f"\n#write <Files/{COLOR_SUBDIR}/Amps/{kind}/d`i'.h> \"l dC`i' = (%E);\\n\" dC`i'"
+        else:
+            strip_block = f"""#include Files/{COLOR_SUBDIR}/cb.h
+    .sort"""
+        for k, batch in enumerate(batches, start=1):
+            tag = batch_tag(f"ColorStrip_{kind}", k, len(batches))
+            frm = form_dir / f"{tag}.frm"
+            frm.write_text(
+                f"""#-
+#: IncDir procedures
+#: SmallExtension 100M
+#: MaxTermSize    10M
+#: WorkSpace      1G
+Off Statistics;
+
+#include declarations.h
+CFunction cb, cbC;
+    .sort
+PolyRatFun rat;
+
+#do i = {form_do_range(batch)}
+#include Files/{COLOR_SUBDIR}/Reduced/{kind}/d`i'.h
+    .sort
+{strip_block}
+if (count({unmatched},1)) exit "unmatched color structure in {kind}/d`i'";
+b cb,cbC,diracChain,i_,gs,eps,epsC;
+    .sort
+{write_block}
+    .sort
+Drop;
+#message {kind} `i'
+#enddo
+
+.end
+""",
+                encoding="utf-8",
+            )
+            drivers[tag] = frm
+
+    return {
+        "form_dir": form_dir,
+        "jobs_requested": jobs_requested,
+        "jobs_effective": max(1, min(jobs_requested, len(drivers))),
+        "drivers": drivers,
+    }
+
+
+def prepare_color_matrix(output_dir: Path) -> Dict[str, Any]:
+    """
+    Color decomposition, step 4: the color matrix and the color correlators.
+
+    form/ColorMatrix.frm writes Files/Color/ColorTables.h with
+      cmat(k,l)       = color(S_k * SC_l)
+      ccor(i,j,k,l)   = color(S_k T_i.T_j * SC_l), i < j external legs,
+    using the same leg insertions as the I-operator drivers.
+    """
+    from glaslib.ioperator import LEG_RELABEL, _particles_from_meta, _t_definition
+
+    output_dir = Path(output_dir).resolve()
+    meta = _read_meta(output_dir)
+    basis = meta.get("color_basis") or {}
+    cb = list(basis.get("cb") or [])
+    cbC = list(basis.get("cbC") or [])
+    if not cb or not cbC:
+        raise RuntimeError("color_basis missing in meta.json. Build the color basis first.")
+
+    particles = _particles_from_meta(meta)
+    n_in = int(meta.get("n_in") or 0)
+    t_defs: List[str] = []
+    colored: List[int] = []
+    for idx, info in enumerate(particles, 1):
+        tok = info.get("token", "").lower()
+        if tok in ("h", "higgs"):
+            continue
+        side = info.get("side", "out" if idx > n_in else "in")
+        t_defs.append(_t_definition(idx, tok, side))
+        colored.append(idx)
+    leg_pairs = [(i, j) for i in colored for j in colored if i < j]
+
+    form_dir = output_dir / "form"
+    defines = "\n".join(f'#define cb{k} "{s}"' for k, s in enumerate(cb, 1))
+    defines += "\n" + "\n".join(f'#define cbC{k} "{s}"' for k, s in enumerate(cbC, 1))
+    corr_block = ""
+    if leg_pairs:
+        t_block = "\n".join(t_defs)
+        corr_block = f"""
+#do in1 = {form_do_range(colored)}
+#do in2 = {form_do_range(colored)}
+#if `in1' < `in2'
+#do k = 1,{len(cb)}
+Local amp = `cb`k'';
+    .sort
+{LEG_RELABEL}
+    .sort
+Mul replace_(a`in1',c`in1');
+Mul replace_(a`in2',c`in2');
+Mul replace_(b`in1',c`in1');
+Mul replace_(b`in2',c`in2');
+Mul T(`in1')*T(`in2');
+{t_block}
+    .sort
+Hide amp;
+#do l = 1,{len(cbC)}
+Local ampC = `cbC`l'';
+    .sort
+{LEG_RELABEL}
+    .sort
+Local cc = amp*ampC;
+    .sort
+Drop ampC;
+#call color
+#write <Files/{COLOR_SUBDIR}/ColorTables.h> "Fill ccor(`in1',`in2',`k',`l') = (%E);" cc
+Drop cc;
+    .sort
+#enddo
+Unhide amp;
+Drop amp;
+    .sort
+#enddo
+#endif
+#enddo
+#enddo
+"""
+
+    driver = form_dir / "ColorMatrix.frm"
+    driver.write_text(
+        f"""#-
+#: IncDir procedures
+#: SmallExtension 100M
+#: MaxTermSize    10M
+#: WorkSpace      1G
+Off Statistics;
+
+#include declarations.h
+    .sort
+Format nospaces;
+{defines}
+
+#write <Files/{COLOR_SUBDIR}/ColorTables.h> "CFunction cb, cbC;"
+#write <Files/{COLOR_SUBDIR}/ColorTables.h> "Table,sparse cmat(2);"
+#write <Files/{COLOR_SUBDIR}/ColorTables.h> "Table,sparse ccor(4);"
+
+#do k = 1,{len(cb)}
+#do l = 1,{len(cbC)}
+Local cc = (`cb`k'')*(`cbC`l'');
+    .sort
+#call color
+#write <Files/{COLOR_SUBDIR}/ColorTables.h> "Fill cmat(`k',`l') = (%E);" cc
+Drop cc;
+    .sort
+#enddo
+#enddo
+{corr_block}
+.end
+""",
+        encoding="utf-8",
+    )
+    return {"form_dir": form_dir, "driver": driver, "ncb": len(cb), "ncbC": len(cbC), "leg_pairs": leg_pairs}
@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import io
+import os
+import shlex
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
+
+from glaslib.commands import color, contract, evaluate, extract, generate, ioperator, ktexpand, linrels, micoef, misc, ratcombine, reduce, uvct
+from glaslib.commands.common import AppState
+from glaslib.core.logging import LOG_SUBDIR_BATCH, ensure_logs_dir
+from glaslib.core.models import get_model_by_id
+from glaslib.core.proc import set_process_budget
+from glaslib.core.refs import default_gluon_refs
+from glaslib.core.run_manager import RunContext
+
+USAGE = 'Usage: generate --batch FILE [--jobs K] [--stages "evaluate lo --dirac; contract lo; ..."]'
+
+# The quick-start sequence after generate/formprep
+DEFAULT_STAGES = (
+    "evaluate lo --dirac",
+    "evaluate nlo --dirac",
+    "contract lo",
+    "contract nlo",
+    "uvct",
+    "extract topologies",
+    "ibp",
+)
+
+# Stages that take --jobs; the batch budget is passed on unless the stage sets its own
+_JOBS_COMMANDS = ("evaluate", "color", "contract", "reduce", "micoef", "extract", "ibp")
+
+
+def _contract(state: AppState, arg: str) -> bool:
+    if arg.strip().lower().startswith("full"):
+        return misc.contract_full(state, arg)
+    return contract.run(state, arg)
+
+
+# Stage commands print their errors and return False (True once their outputs are written)
+_COMMANDS: Dict[str, Callable[[AppState, str], bool]] = {
+    "evaluate": evaluate.run,
+    "color": color.run,
+    "contract": _contract,
+    "uvct": uvct.run,
+    "ioperator": ioperator.run,
+    "extract": extract.run,
+    "ibp": extract.ibp,
+    "reduce": reduce.run,
+    "micoef": micoef.run,
+    "linrels": linrels.run,
+    "ratcombine": ratcombine.run,
+    "ktexpand": ktexpand.run,
+}
+
+
+@dataclass
+class BatchEntry:
+    process: str
+    model_id: str
+    run_name: Optional[str] = None
+
+
+def read_manifest(path: Path, default_model: str) -> List[BatchEntry]:
+    """
+    One run per line: `<process>[, <model_id>[, <run name>]]`, e.g.
+        g g > t t~, qcd_massive
+        q q~ > t t~, qcd_massless, qqtt_ml
+    Blank lines and lines starting with # are skipped.
+    """
+    entries: List[BatchEntry] = []
+    for lineno, line in enumerate(Path(path).read_text(encoding="utf-8").splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = [f.strip() for f in line.split(",")]
+        if len(fields) > 3 or not fields[0]:
+            raise ValueError(f"{path}:{lineno}: expected '<process>[, <model_id>[, <run name>]]'")
+        model_id = fields[1] if len(fields) > 1 and fields[1] else default_model
+        if get_model_by_id(model_id) is None:
+            raise ValueError(f"{path}:{lineno}: unknown model '{model_id}'")
+        run_name = fields[2] if len(fields) > 2 and fields[2] else None
+        entries.append(BatchEntry(fields[0], model_id, run_name))
+    if not entries:
+        raise ValueError(f"No processes in {path}")
+    return entries
+
+
+def _parse_args(arg: str) -> Tuple[Path, int, List[str]]:
+    toks = shlex.split(arg)
+    path: Optional[Path] = None
+    jobs = os.cpu_count() or 1
+    stages = list(DEFAULT_STAGES)
+    i = 0
+    while i < len(toks):
+        t = toks[i]
+        if t in ("--batch", "--jobs", "--stages"):
+            if i + 1 >= len(toks):
+                raise ValueError(f"Missing value after {t}")
+            val = toks[i + 1]
+            if t == "--batch":
+                path = Path(val)
+            elif t == "--jobs":
+                jobs = int(val)
+                if jobs < 1:
+                    raise ValueError("--jobs must be >= 1")
+            else:
+                stages = [s.strip() for s in val.split(";") if s.strip()]
+            i += 2
+            continue
+        raise ValueError(f"Unexpected argument: {t}")
+    if path is None:
+        raise ValueError("Missing manifest file")
+    for stage in stages:
+        if stage.split()[0] not in _COMMANDS:
+            raise ValueError(f"Unknown stage '{stage}' (one of: {', '.join(_COMMANDS)})")
+    return path, jobs, stages
+
+
+# Where print() of the current run goes; worker threads of run_jobs & co. inherit it
+_OUTPUT: ContextVar[Optional[TextIO]] = ContextVar("glas_batch_output", default=None)
+
+
+class _RunOutput(io.TextIOBase):
+    """sys.stdout stand-in writing to the output of the current run (_OUTPUT), else to the console."""
+
+    def __init__(self, console: TextIO) -> None:
+        self.console = console
+
+    def write(self, s: str) -> int:
+        (_OUTPUT.get() or self.console).write(s)
+        return len(s)
+
+    def flush(self) -> None:
+        (_OUTPUT.get() or self.console).flush()
+
+
+def _stage_command(stage: str, jobs: int) -> Tuple[Callable[[AppState, str], None], str]:
+    name, _, arg = stage.partition(" ")
+    if name in _JOBS_COMMANDS and "--jobs" not in arg.split():
+        arg = f"{arg} --jobs {jobs}".strip()
+    return _COMMANDS[name], arg
+
+
+def _run_pipeline(
+    entry: BatchEntry, template: AppState, stages: List[str], jobs: int, say: Callable[[str], None]
+) -> Tuple[Optional[Path], str]:
+    """Generate one run and push it through the stages. Returns (run dir, status)."""
+    state = AppState(
+        ctx=RunContext(),
+        form_exe=template.form_exe,
+        model_id=entry.model_id,
+        keep_temp=template.keep_temp,
+        verbose=template.verbose,
+    )
+    label = f"{entry.process} [{entry.model_id}]"
+
+    buf = io.StringIO()
+    token = _OUTPUT.set(buf)
+    ok = False
+    try:
+        gen_arg = f"{entry.process} --jobs {jobs}" + (f" --run {entry.run_name}" if entry.run_name else "")
+        ok = generate.run(state, gen_arg)
+    except Exception as exc:
+        print(f"Error: {exc}")
+    finally:
+        _OUTPUT.reset(token)
+    run_dir = state.ctx.run_dir
+    if run_dir is None or not ok:
+        say(f"[batch] {label}: generate failed\n{buf.getvalue().rstrip()}")
+        return run_dir, "generate failed"
+    logs_dir = ensure_logs_dir(run_dir, LOG_SUBDIR_BATCH)
+    (logs_dir / "00_generate.log").write_text(buf.getvalue(), encoding="utf-8")
+    say(f"[batch] {label}: generated {run_dir.name} (n0l={state.ctx.meta.get('n0l')}, n1l={state.ctx.meta.get('n1l')})")
+
+    if not state.ctx.meta.get("gluon_refs"):
+        refs = default_gluon_refs(entry.process)
+        if refs:
+            state.refs().refs = refs
+            state.refs().save_to_meta()
+
+    for k, stage in enumerate(stages, start=1):
+        fn, arg = _stage_command(stage, jobs)
+        slug = "_".join(t for t in stage.split() if not t.startswith("-"))
+        log_path = logs_dir / f"{k:02d}_{slug}.log"
+        t0 = time.time()
+        ok = False
+        with log_path.open("w", encoding="utf-8") as fh:
+            token = _OUTPUT.set(fh)
+            try:
+                ok = fn(state, arg)
+            except Exception as exc:
+                print(f"Error: {exc}")
+            finally:
+                _OUTPUT.reset(token)
+        if not ok:
+            say(f"[batch] {run_dir.name}: {stage} failed after {time.time() - t0:.0f}s (log: {log_path})")
+            return run_dir, f"{stage} failed"
+        say(f"[batch] {run_dir.name}: {stage} OK ({time.time() - t0:.0f}s)")
+    return run_dir, "OK"
+
+
+def run(state: AppState, arg: str) -> None:
+    """
+    generate --batch FILE [--jobs K] [--stages "s1; s2; ..."]
+
+    Generate every process/model of the manifest FILE (see read_manifest) and push each
+    run through the stages (default DEFAULT_STAGES) in its own thread, so one run's IBP
+    overlaps with another's evaluate. K (default: all CPUs) is the global budget: at
+    most K FORM/wolframscript/helper processes run at once over all runs, and it is
+    passed as --jobs to the stages that take it. Each stage's output goes to
+    logs/batch/ of its run; only progress is printed.
+    """
+    try:
+        path, jobs, stages = _parse_args(arg)
+        entries = read_manifest(path, state.model_id)
+    except (OSError, ValueError) as exc:
+        print(f"[batch] Error: {exc}")
+        print(USAGE)
+        return
+
+    print(f"[batch] {len(entries)} runs, {len(stages)} stages, budget {jobs} processes")
+    print(f"  stages: {'; '.join(stages)}")
+
+    console = sys.stdout
+    out = _RunOutput(console)
+    lock = threading.Lock()
+
+    def say(msg: str) -> None:
+        with lock:
+            console.write(msg + "\n")
+            console.flush()
+
+    set_process_budget(jobs)
+    sys.stdout = out
+    try:
+        with ThreadPoolExecutor(max_workers=len(entries)) as ex:
+            futures = [ex.submit(_run_pipeline, e, state, stages, jobs, say) for e in entries]
+            results = [f.result() for f in futures]
+    finally:
+        sys.stdout = console
+        set_process_budget(None)
+
+    print("[batch] Summary:")
+    for entry, (run_dir, status) in zip(entries, results):
+        name = run_dir.name if run_dir else "-"
+        print(f"  {entry.process:<20} {entry.model_id:<14} {name:<24} {status}")
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from glaslib.colorbasis import build_color_basis, prepare_color_matrix, prepare_color_scan, prepare_color_strip
+from glaslib.commands.common import AppState, parse_mode_and_flags
+from glaslib.core.logging import LOG_SUBDIR_COLOR
+from glaslib.core.parallel import run_jobs
+from glaslib.core.run_manager import load_meta
+
+
+def run(state: AppState, arg: str) -> bool:
+    try:
+        mode, jobs, _, verbose, batch, _ = parse_mode_and_flags(arg)
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        return False
+    verbose = verbose or state.verbose  # Also check state.verbose
+    if mode is not None:
+        print("Usage: color [--jobs K] [--batch N] [--verbose]")
+        return False
+    if not state.ensure_run():
+        return False
+    run_dir = state.ctx.run_dir
+    jobs_req = max(1, int(jobs or 1))
+
+    try:
+        scan = prepare_color_scan(run_dir, jobs=jobs_req, batch_size=batch)  # type: ignore[arg-type]
+    except Exception as exc:
+        print(f"Error: {exc}")
+        return False
+    tasks = [(tag, scan["form_dir"], drv) for tag, drv in scan["drivers"].items()]
+    if not run_jobs(state.form_exe, tasks, max_workers=scan["jobs_effective"], verbose=verbose, run_dir=run_dir, log_subdir=LOG_SUBDIR_COLOR):
+        return False
+
+    try:
+        basis = build_color_basis(run_dir)  # type: ignore[arg-type]
+        strip = prepare_color_strip(run_dir, jobs=jobs_req, batch_size=batch)  # type: ignore[arg-type]
+        matrix = prepare_color_matrix(run_dir)  # type: ignore[arg-type]
+    except Exception as exc:
+        print(f"Error: {exc}")
+        return False
+    state.ctx.meta = load_meta(run_dir)  # type: ignore[arg-type]
+    print(f"[color] Basis: {len(basis['cb'])} structures (amplitudes), {len(basis['cbC'])} (conjugates).")
+
+    tasks = [(tag, strip["form_dir"], drv) for tag, drv in strip["drivers"].items()]
+    tasks.append(("ColorMatrix", matrix["form_dir"], matrix["driver"]))
+    ok = run_jobs(state.form_exe, tasks, max_workers=max(strip["jobs_effective"], 1), verbose=verbose, run_dir=run_dir, log_subdir=LOG_SUBDIR_COLOR)
+    if ok:
+        print(f"[color] Color-stripped amplitudes and color matrix written ({', '.join(scan['kinds'])}).")
+    return ok
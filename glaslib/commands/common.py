@@ -85,16 +85,20 @@ def parse_generate_args(arg: str) -> Tuple[str, Optional[int], Optional[str], bo
     return " ".join(process).strip(), jobs, run_name, resume
 
 
-def parse_mode_and_flags(arg: str, *, allow_dirac: bool = False) -> Tuple[Optional[str], Optional[int], bool, bool]:
+def parse_mode_and_flags(
+    arg: str, *, allow_dirac: bool = False
+) -> Tuple[Optional[str], Optional[int], bool, bool, Optional[int], bool]:
     """
     Parse command arguments for mode and flags.
 
     Returns:
-        (mode, jobs, dirac, verbose)
+        (mode, jobs, dirac, verbose, batch, static)
     """
     toks = shlex.split(arg)
     mode: Optional[str] = None
     jobs: Optional[int] = None
+    batch: Optional[int] = None
+    static = False
     dirac = False
     verbose = False
     quiet = False
@@ -107,6 +111,16 @@ def parse_mode_and_flags(arg: str, *, allow_dirac: bool = False) -> Tuple[Option
             jobs = int(toks[i + 1])
             i += 2
             continue
+        if t == "--batch":
+            if i + 1 >= len(toks):
+                raise ValueError("Missing value after --batch")
+            batch = int(toks[i + 1])
+            i += 2
+            continue
+        if t == "--static":
+            static = True
+            i += 1
+            continue
         if allow_dirac and t == "--dirac":
             dirac = True
             i += 1
@@ -125,7 +139,7 @@ def parse_mode_and_flags(arg: str, *, allow_dirac: bool = False) -> Tuple[Option
     # --quiet wins over --verbose
     if quiet:
         verbose = False
-    return mode, jobs, dirac, verbose
+    return mode, jobs, dirac, verbose, batch, static
 
 
 def parse_simple_flags(arg: str) -> Tuple[str, bool]:
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import shlex
 from typing import Optional
 
 from glaslib.commands.common import AppState, MODES, parse_mode_and_flags
-from glaslib.contracts import prepare_lo, prepare_mct, prepare_nlo
+from glaslib.contracts import prepare_lo, prepare_mct, prepare_nlo, record_nlo_zero_pairs
 from glaslib.core.logging import LOG_SUBDIR_CONTRACT
-from glaslib.core.parallel import run_jobs
+from glaslib.core.pairs import CONTRACT_PAIRS, CONTRACT_SUMMED
+from glaslib.core.parallel import batch_tag, run_jobs
+from glaslib.core.run_manager import load_meta
 
 
 def _resolve_jobs_requested(state: AppState, jobs: Optional[int]) -> int:
@@ -18,20 +21,22 @@ def _resolve_jobs_requested(state: AppState, jobs: Optional[int]) -> int:
         return 1
 
 
-def run(state: AppState, arg: str) -> None:
-    mode, jobs, _, verbose = parse_mode_and_flags(arg, allow_dirac=False)
+def run(state: AppState, arg: str) -> bool:
+    mode, jobs, _, verbose, batch, static = parse_mode_and_flags(arg, allow_dirac=False)
     verbose = verbose or state.verbose  # Also check state.verbose
+    # nlo/mct contract with the summed Born by default; --pairs keeps one file per (tree, loop) pair
+    contract_mode = CONTRACT_PAIRS if "--pairs" in shlex.split(arg) else CONTRACT_SUMMED
     if mode not in MODES:
-        print("Usage: contract {lo|nlo|mct} [--jobs K] [--verbose]")
-        return
+        print("Usage: contract {lo|nlo|mct} [--jobs K] [--batch N] [--static] [--pairs] [--verbose]")
+        return False
     if not state.ensure_run():
-        return
+        return False
 
     # Check if massless model - no mass counterterms needed
     model_id = state.ctx.meta.get("model_id", "qcd_massive") if isinstance(state.ctx.meta, dict) else "qcd_massive"
     if mode == "mct" and model_id == "qcd_massless":
         print("[contract mct] Skipped: mass counterterms are zero for massless QCD.")
-        return
+        return True
 
     jobs_req = _resolve_jobs_requested(state, jobs)
     process_str = state.ctx.meta.get("process", "") if isinstance(state.ctx.meta, dict) else ""
@@ -39,18 +44,33 @@ def run(state: AppState, arg: str) -> None:
 
     try:
         if mode == "lo":
-            out = prepare_lo(state.ctx, gluon_refs=gluon_refs, jobs=jobs_req)
+            out = prepare_lo(state.ctx, gluon_refs=gluon_refs, jobs=jobs_req, batch_size=batch, static=static)
         elif mode == "nlo":
-            out = prepare_nlo(state.ctx, gluon_refs=gluon_refs, jobs=jobs_req)
+            out = prepare_nlo(
+                state.ctx, gluon_refs=gluon_refs, jobs=jobs_req, batch_size=batch, static=static, mode=contract_mode
+            )
         else:
-            out = prepare_mct(state.ctx, gluon_refs=gluon_refs, jobs=jobs_req)
+            out = prepare_mct(
+                state.ctx, gluon_refs=gluon_refs, jobs=jobs_req, batch_size=batch, static=static, mode=contract_mode
+            )
     except Exception as exc:
         print(f"Error: {exc}")
-        return
+        return False
+    if mode in ("lo", "nlo"):
+        # contractLO/contractNLO record m0m0_triangle / contract_mode in meta.json
+        state.ctx.meta = load_meta(state.ctx.run_dir)  # type: ignore[arg-type]
 
     form_dir = out["form_dir"]
     jobs_eff = out["jobs_effective"]
-    tasks = [(f"contract_{mode}_J{k}of{jobs_eff}", form_dir, drv) for k, drv in out["drivers"].items()]
+    nbatches = len(out["drivers"])
+    static = bool(out.get("static", False))
+    tasks = [(batch_tag(f"contract_{mode}", k, nbatches, static), form_dir, drv) for k, drv in out["drivers"].items()]
     ok = run_jobs(state.form_exe, tasks, max_workers=jobs_eff, verbose=verbose, run_dir=state.ctx.run_dir, log_subdir=LOG_SUBDIR_CONTRACT)
     if ok:
         print(f"[contract {mode}] All jobs finished OK.")
+        if mode == "nlo":
+            zero = record_nlo_zero_pairs(state.ctx)
+            state.ctx.meta = load_meta(state.ctx.run_dir)  # type: ignore[arg-type]
+            if zero:
+                print(f"[contract nlo] {len(zero)} identically zero pairs recorded; later stages skip them.")
+    return ok
@@ -3,14 +3,15 @@ from __future__ import annotations
 import json
 import shutil
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from glaslib.commands.common import AppState, MODES, clamp_jobs, parse_mode_and_flags
 from glaslib.counterterms import prepare_mass_ct
 from glaslib.dirac import prepare_dirac
 from glaslib.formprep import prepare_form
 from glaslib.core.logging import LOG_SUBDIR_EVALUATE, LOG_SUBDIR_DIRAC
-from glaslib.core.parallel import chunk_range_1based, run_jobs
+from glaslib.core.costs import reset_timings, stage_weights, timing_write_line
+from glaslib.core.parallel import batch_tag, form_do_range, partition_items, run_jobs
 from glaslib.core.paths import procedures_dir, setup_run_procedures
 
 
@@ -18,25 +19,22 @@ def _write_eval_driver(
     *,
     dst: Path,
     incdir: Path,
-    tag: str,
     n0l: int,
     n1l: int,
     mand_define_line: str,
-    i0: int,
-    i1: int,
-    j0: int,
-    j1: int,
+    indices: List[int],
     mode: str,
+    timing_line: str = "",
 ) -> None:
     tree_block = "\n* (tree skipped)\n"
-    if mode == "lo" and i0 <= i1:
+    if mode == "lo" and indices:
         tree_block = f"""
-#do i={i0},{i1}
-#include Files/{tag}0l
+#do i={form_do_range(indices)}
+#include Files/Diagrams/0l/d`i'.h
     .sort
 l amp = d`i';
     .sort
-Drop d1,...,d{n0l};
+Drop d`i';
 #call FeynmanRules
 `mand'
 #call SymToRat
@@ -48,18 +46,19 @@ b diracChain,Color,i_,gs,eps,epsC;
 #write <Files/Amps/amp0l/d`i'.h> "l dC`i' = (%E);\\n" ampC
     .sort
 Drop;
+{timing_line}
 #enddo
 """
 
     loop_block = "\n* (loop skipped)\n"
-    if mode == "nlo" and j0 <= j1:
+    if mode == "nlo" and indices:
         loop_block = f"""
-#do i={j0},{j1}
-#include Files/{tag}1l
+#do i={form_do_range(indices)}
+#include Files/Diagrams/1l/d`i'.h
     .sort
 l amp = d`i';
     .sort
-Drop d1,...,d{n1l};
+Drop d`i';
 #call FeynmanRules
 `mand'
 #call SymToRat
@@ -70,6 +69,7 @@ b diracChain,Color,i_,gs,eps,epsC,FAD;
     .sort
 Drop;
 #message loop `i' done
+{timing_line}
 #enddo
 """
 
@@ -105,37 +105,34 @@ def _prepare_eval_drivers(
     *,
     form_dir: Path,
     incdir: Path,
-    tag: str,
     n0l: int,
     n1l: int,
     mand_define: str,
     jobs_effective: int,
     mode: str,
+    batch_size: Optional[int] = None,
+    static: bool = False,
 ) -> Dict[int, Path]:
     drivers: Dict[int, Path] = {}
     total = n0l if mode == "lo" else n1l
-    for k in range(1, jobs_effective + 1):
-        i0, i1 = chunk_range_1based(total, jobs_effective, k)
-        if total <= 0 or i0 > i1:
-            continue
-        if mode == "lo":
-            j0, j1 = 1, 0
-        else:
-            j0, j1 = i0, i1
-            i0, i1 = 1, 0
-        drv = form_dir / f"eval_{mode}_J{k}of{jobs_effective}.frm"
+    items = list(range(1, total + 1))
+    stage = f"evaluate_{mode}"
+    diagrams = form_dir / "Files" / "Diagrams" / ("0l" if mode == "lo" else "1l")
+    weights = stage_weights(form_dir, stage, items, lambda i: [diagrams / f"d{i}.h"])
+    reset_timings(form_dir, stage)
+    batches = partition_items(items, jobs_effective, weights=weights, batch_size=batch_size, static=static)
+    for k, indices in enumerate(batches, start=1):
+        drv_tag = batch_tag(f"eval_{mode}", k, len(batches), static)
+        drv = form_dir / f"{drv_tag}.frm"
         _write_eval_driver(
             dst=drv,
             incdir=incdir,
-            tag=tag,
             n0l=n0l,
             n1l=n1l,
             mand_define_line=mand_define,
-            i0=i0,
-            i1=i1,
-            j0=j0,
-            j1=j1,
+            indices=indices,
             mode=mode,
+            timing_line=timing_write_line(stage, drv_tag, pair=False),
         )
         drivers[k] = drv
     return drivers
@@ -151,14 +148,14 @@ def _resolve_jobs_requested(state: AppState, jobs: Optional[int]) -> int:
         return 1
 
 
-def run(state: AppState, arg: str) -> None:
-    mode, jobs, use_dirac, verbose = parse_mode_and_flags(arg, allow_dirac=True)
+def run(state: AppState, arg: str) -> bool:
+    mode, jobs, use_dirac, verbose, batch, static = parse_mode_and_flags(arg, allow_dirac=True)
     verbose = verbose or state.verbose  # Also check state.verbose
     if mode not in MODES:
-        print("Usage: evaluate {lo|nlo|mct} [--jobs K] [--dirac] [--verbose]")
-        return
+        print("Usage: evaluate {lo|nlo|mct} [--jobs K] [--batch N] [--static] [--dirac] [--verbose]")
+        return False
     if not state.ensure_run():
-        return
+        return False
 
     jobs_req = _resolve_jobs_requested(state, jobs)
     meta = state.ctx.meta
@@ -173,7 +170,7 @@ def run(state: AppState, arg: str) -> None:
         form_dir = state.ctx.prep_form_dir or state.ctx.run_dir / "form"  # type: ignore[operator]
         if not form_dir:
             print("Error: form directory not prepared. Run generate first.")
-            return
+            return False
 
         # Set up model-specific procedures directory
         feynman_rules_prc = state.get_feynman_rules_file()
@@ -181,67 +178,71 @@ def run(state: AppState, arg: str) -> None:
         mand_define = meta.get("mand_define")
         if not mand_define:
             print("Error: mand_define missing in meta.json (run generate first).")
-            return
+            return False
 
         n_diagrams = n0l if mode == "lo" else n1l
         if n_diagrams <= 0:
             print(f"Error: no diagrams recorded for mode {mode}.")
-            return
+            return False
 
         jobs_req, jobs_eff = clamp_jobs(jobs_req, n_diagrams)
         drivers = _prepare_eval_drivers(
             form_dir=form_dir,
             incdir=incdir,
-            tag=meta["tag"],
             n0l=n0l,
             n1l=n1l,
             mand_define=mand_define,
             jobs_effective=jobs_eff,
             mode=mode,
+            batch_size=batch,
+            static=static,
         )
-        tasks = [(f"evaluate_{mode}_J{k}of{jobs_eff}", form_dir, drv) for k, drv in drivers.items()]
+        tasks = [(batch_tag(f"evaluate_{mode}", k, len(drivers), static), form_dir, drv) for k, drv in drivers.items()]
         ok = run_jobs(state.form_exe, tasks, max_workers=jobs_eff, verbose=verbose, run_dir=state.ctx.run_dir, log_subdir=LOG_SUBDIR_EVALUATE)
         if not ok:
-            return
+            return False
         print(f"[evaluate {mode}] All jobs finished OK.")
 
         if use_dirac:
             process_str = meta.get("process", "") or ""
             gluon_refs = state.refs().get_or_prompt(process_str)
             dirac_mode = "0" if mode == "lo" else "1"
-            out = prepare_dirac(state.ctx, mode=dirac_mode, jobs=jobs_req, gluon_orth=gluon_refs)
+            out = prepare_dirac(
+                state.ctx, mode=dirac_mode, jobs=jobs_req, gluon_orth=gluon_refs, batch_size=batch, static=static
+            )
             info = out.get("tree") if mode == "lo" else out.get("loop")
             if not info:
                 print("[dirac] No drivers produced.")
-                return
+                return False
             tasks = [
-                (f"DiracSimplify_{mode}_J{k}of{info.get('jobs_effective', jobs_req)}", out["form_dir"], drv)
+                (batch_tag(f"DiracSimplify_{mode}", k, len(info.get("drivers", {})), static), out["form_dir"], drv)
                 for k, drv in info.get("drivers", {}).items()
             ]
             ok_dirac = run_jobs(state.form_exe, tasks, max_workers=info.get("jobs_effective", jobs_req), verbose=verbose, run_dir=state.ctx.run_dir, log_subdir=LOG_SUBDIR_DIRAC)
             if ok_dirac:
                 print(f"[dirac {mode}] All jobs finished OK.")
-        return
+            return ok_dirac
+        return True
 
     # mode == "mct"
     # Check if massless model - no mass counterterms needed
     model_id = meta.get("model_id", "qcd_massive")
     if model_id == "qcd_massless":
         print("[evaluate mct] Skipped: mass counterterms are zero for massless QCD.")
-        return
+        return True
 
     try:
-        out = prepare_mass_ct(state.ctx, form_exe=state.form_exe, jobs=jobs_req)
+        out = prepare_mass_ct(state.ctx, form_exe=state.form_exe, jobs=jobs_req, batch_size=batch, static=static)
     except Exception as exc:
         print(f"Error: {exc}")
-        return
+        return False
     tasks = [
-        (f"mct_J{k}of{out['jobs_effective']}", out["form_dir"], drv)
+        (batch_tag("evaluate_mct", k, len(out["drivers"]), static), out["form_dir"], drv)
         for k, drv in out["drivers"].items()
     ]
     ok = run_jobs(state.form_exe, tasks, max_workers=out["jobs_effective"], verbose=verbose, run_dir=state.ctx.run_dir, log_subdir=LOG_SUBDIR_EVALUATE)
     if not ok:
-        return
+        return False
     print("[evaluate mct] All jobs finished OK.")
 
     if use_dirac:
@@ -256,15 +257,19 @@ def run(state: AppState, arg: str) -> None:
         process_str = meta.get("process", "") or ""
         gluon_refs = state.refs().get_or_prompt(process_str)
         try:
-            out_dirac = prepare_dirac(state.ctx, mode="mct", jobs=jobs_req, gluon_orth=gluon_refs)
+            out_dirac = prepare_dirac(
+                state.ctx, mode="mct", jobs=jobs_req, gluon_orth=gluon_refs, batch_size=batch, static=static
+            )
         except Exception as exc:
             print(f"Error: {exc}")
-            return
+            return False
         info = out_dirac.get("mct") or {}
         tasks = [
-            (f"DiracSimplify_mct_J{k}of{info.get('jobs_effective', jobs_req)}", out_dirac["form_dir"], drv)
+            (batch_tag("DiracSimplify_mct", k, len(info.get("drivers", {})), static), out_dirac["form_dir"], drv)
             for k, drv in info.get("drivers", {}).items()
         ]
         ok_dirac = run_jobs(state.form_exe, tasks, max_workers=info.get("jobs_effective", jobs_req), verbose=verbose, run_dir=state.ctx.run_dir, log_subdir=LOG_SUBDIR_DIRAC)
         if ok_dirac:
             print("[dirac mct] All jobs finished OK.")
+        return ok_dirac
+    return True
@@ -4,21 +4,27 @@ import json
 import os
 import shlex
 import shutil
-import subprocess
 import sys
 from pathlib import Path
 
-from glaslib.commands.common import AppState, parse_simple_flags, update_meta
+from glaslib.commands.common import AppState, update_meta
 from glaslib.core.logging import LOG_SUBDIR_EXTRACT, LOG_SUBDIR_IBP, LOG_SUBDIR_TOPOFORMAT, ensure_logs_dir
-from glaslib.core.parallel import run_jobs
+from glaslib.core.kernelpool import run_wolfram, run_wolfram_jobs
+from glaslib.core.pairs import m0m1_pairs
+from glaslib.core.parallel import batch_tag, partition_items, run_jobs
 from glaslib.core.proc import get_project_python, run_streaming
+from glaslib.formscan import write_amp_denominators, write_ibp_spec, write_loop_integrals
 from glaslib.topoformat import prepare_topoformat_project
+from glaslib.topomap import map_topologies
 
 
-def _parse_extract_args(arg: str) -> tuple[str, bool, bool]:
+def _parse_extract_args(arg: str) -> tuple[str, bool, bool, bool, int, str]:
     toks = shlex.split(arg)
     verbose = False
+    jobs = 0
+    mapper = "python"
     delete = False
+    from_amps = False
     target_parts = []
     i = 0
     while i < len(toks):
@@ -31,42 +37,129 @@ def _parse_extract_args(arg: str) -> tuple[str, bool, bool]:
             delete = True
             i += 1
             continue
+        if t == "--from-amps":
+            from_amps = True
+            i += 1
+            continue
+        if t == "--jobs":
+            if i + 1 >= len(toks):
+                raise ValueError("--jobs requires a value")
+            jobs = int(toks[i + 1])
+            if jobs < 1:
+                raise ValueError("--jobs must be >= 1")
+            i += 2
+            continue
+        if t == "--mapper":
+            if i + 1 >= len(toks):
+                raise ValueError("--mapper requires a value")
+            mapper = toks[i + 1].lower()
+            if mapper not in ("python", "mathematica"):
+                raise ValueError("--mapper must be python or mathematica")
+            i += 2
+            continue
         if t.startswith("-"):
             raise ValueError(f"Unknown flag: {t}")
         target_parts.append(t)
         i += 1
-    return " ".join(target_parts).strip().lower(), verbose, delete
+    return " ".join(target_parts).strip().lower(), verbose, delete, from_amps, jobs, mapper
 
 
-def run(state: AppState, arg: str) -> None:
+def run(state: AppState, arg: str) -> bool:
     try:
-        target, verbose, delete = _parse_extract_args(arg)
+        target, verbose, delete, from_amps, jobs, mapper = _parse_extract_args(arg)
     except ValueError as exc:
-        print(f"Usage: extract topologies [--delete] [--verbose] ({exc})")
-        return
+        print(f"Usage: extract topologies [--delete] [--from-amps] [--jobs K] [--mapper python|mathematica] [--verbose] ({exc})")
+        return False
 
     verbose = verbose or state.verbose
 
     if not target:
-        print("Usage: extract topologies [--delete] [--verbose]")
-        return
+        print("Usage: extract topologies [--delete] [--from-amps] [--jobs K] [--mapper python|mathematica] [--verbose]")
+        return False
     if target != "topologies":
-        print("Usage: extract topologies [--delete] [--verbose]")
-        return
+        print("Usage: extract topologies [--delete] [--from-amps] [--jobs K] [--mapper python|mathematica] [--verbose]")
+        return False
     if not state.ensure_run():
-        return
+        return False
 
     run_dir = state.ctx.run_dir
     if not run_dir:
         print("Error: no run attached.")
-        return
+        return False
 
     repo_root = Path(__file__).resolve().parents[2]
+    run_mat_dir = run_dir / "Mathematica"
+    try:
+        update_meta(run_dir, {"topology_source": "amplitudes" if from_amps else "pairs"})
+    except (OSError, ValueError) as exc:
+        print(f"[extract] Error: {exc}")
+        return False
+    # Create logs directory using centralized constants
+    logs_dir = ensure_logs_dir(run_dir, LOG_SUBDIR_EXTRACT)
+
+    # Python mapper (default): stages 1, 2 and 2b in one pass without FeynCalc;
+    # --mapper mathematica keeps the FeynCalc stages, e.g. as a cross-check
+    mapped = False
+    if mapper == "python":
+        print("[extract] Mapping topologies (glaslib.topomap)...")
+        try:
+            info = map_topologies(run_dir, jobs)
+            print(
+                f"[extract] {info['integrals']} distinct loop integrals -> "
+                f"{info['topologies']} topologies, {info['glis']} GLI"
+            )
+            mapped = True
+        except ValueError as exc:
+            print(f"[extract] Python mapper cannot handle this process ({exc}); using the Mathematica stages")
+        except OSError as exc:
+            print(f"[extract] Error: {exc}")
+            return False
+    if not mapped and not _run_mathematica_mapping(
+        run_dir, repo_root, state.ctx.meta or {}, jobs, from_amps, verbose
+    ):
+        return False
+
+    expected = [
+        run_mat_dir / "Files" / "integrals.m",
+        run_mat_dir.parent / "form" / "Files" / "intrule.h",
+    ]
+    missing = [p for p in expected if not p.exists()]
+    if missing:
+        print("[extract] Completed but outputs are missing:")
+        for p in missing:
+            print(f"  missing: {p}")
+        print(f"  Check logs in: {logs_dir}")
+        return False
+
+    print("[extract] OK -> Files/integrals.m, ../form/Files/intrule.h")
+
+    # Capture ntop (number of topologies) from lenTopos.txt
+    len_topos_path = run_mat_dir / "Files" / "lenTopos.txt"
+    if len_topos_path.exists():
+        try:
+            ntop_val = int(len_topos_path.read_text(encoding="utf-8").strip())
+            update_meta(run_dir, {"ntop": ntop_val})
+            if isinstance(state.ctx.meta, dict):
+                state.ctx.meta["ntop"] = ntop_val
+            print(f"[extract] Recorded ntop = {ntop_val} in meta.json")
+        except Exception as exc:
+            print(f"[extract] Warning: could not parse lenTopos.txt ({exc})")
+    else:
+        print("[extract] Warning: lenTopos.txt not found; ntop not recorded.")
+
+    print("[extract] Stage 3: Topology formatting with FORM (ToTopos)...")
+    return _run_topos_extraction(state, run_dir, repo_root, verbose=verbose, delete_m0m1=delete, jobs=jobs)
+
+
+def _run_mathematica_mapping(
+    run_dir: Path, repo_root: Path, meta: dict, jobs: int, from_amps: bool, verbose: bool
+) -> bool:
+    """Stages 1, 2 and 2b: FeynCalc topology finding, extend.py and FeynCalc mapping."""
     stage1_src = repo_root / "mathematica" / "scripts" / "extract_topologies_stage1.m"
     stage2_src = repo_root / "mathematica" / "scripts" / "extract_topologies_stage2.m"
     if not stage1_src.exists() or not stage2_src.exists():
         print("Error: missing stage scripts in mathematica/scripts.")
-        return
+        return False
 
     run_mat_dir = run_dir / "Mathematica"
     run_mat_dir.mkdir(parents=True, exist_ok=True)
@@ -77,7 +170,7 @@ def run(state: AppState, arg: str) -> None:
     extend_src = repo_root / "extend.py"
     if not extend_src.exists():
         print(f"Error: missing extend.py at {extend_src}")
-        return
+        return False
     extend_dst = run_mat_dir / "extend.py"
     extend_dst.write_text(extend_src.read_text(encoding="utf-8"), encoding="utf-8")
 
@@ -86,22 +179,29 @@ def run(state: AppState, arg: str) -> None:
     # Use project venv python
     python_exe = str(get_project_python())
     env["GLAS_PYTHON"] = python_exe
+    if jobs:
+        env["GLAS_EXTEND_JOBS"] = str(jobs)
 
-    sympy_check = subprocess.run(
-        [python_exe, "-c", "import sympy"],
-        cwd=str(run_mat_dir),
-        capture_output=True,
-        text=True,
-    )
-    if sympy_check.returncode != 0:
-        print("[extract] Error: selected python cannot import sympy (required by extend.py).")
-        print(f"  python: {python_exe}")
-        print("  Ensure GLAS runs with the Python environment that has sympy.")
-        return
+    # --from-amps: topology families from the n1l loop diagrams instead of the contracted pairs
+    try:
+        n1l = int(meta.get("n1l") or 0)
+        if from_amps:
+            (run_mat_dir / "Files").mkdir(parents=True, exist_ok=True)
+            nsets = write_amp_denominators(
+                run_dir / "form" / "Files" / "Amps" / "amp1l", n1l, run_mat_dir / "Files" / "AmpDenominators.m"
+            )
+            print(f"[extract] {nsets} distinct loop propagator sets in {n1l} one-loop diagrams")
+        # distinct LoopInt of the nonzero pairs, so stage1 does not load the M0M1 expressions
+        (run_mat_dir / "Files").mkdir(parents=True, exist_ok=True)
+        ints = write_loop_integrals(
+            run_dir / "form" / "Files" / "M0M1", m0m1_pairs(meta), run_mat_dir / "Files" / "LoopInts.m", jobs
+        )
+        print(f"[extract] {len(ints)} distinct loop integrals in Files/M0M1")
+    except (OSError, ValueError) as exc:
+        print(f"[extract] Error: {exc}")
+        return False
 
-    # Create logs directory using centralized constants
     logs_dir = ensure_logs_dir(run_dir, LOG_SUBDIR_EXTRACT)
-
     stage1_log = logs_dir / "stage1.log"
     extend_log = logs_dir / "extend.log"
     stage2_log = logs_dir / "stage2.log"
@@ -112,8 +212,8 @@ def run(state: AppState, arg: str) -> None:
     else:
         print("[extract] Running stage1...")
 
-    rc1 = run_streaming(
-        cmd=["wolframscript", "-file", str(stage1_dst)],
+    rc1 = run_wolfram(
+        script=stage1_dst,
         cwd=run_mat_dir,
         env=env,
         log_path=stage1_log,
@@ -122,7 +222,7 @@ def run(state: AppState, arg: str) -> None:
     )
     if rc1 != 0:
         print(f"[extract] Stage1 failed (code={rc1}). See {stage1_log}")
-        return
+        return False
 
     if not verbose:
         print(f"[extract] Stage1 OK (log: {stage1_log})")
@@ -143,7 +243,7 @@ def run(state: AppState, arg: str) -> None:
     )
     if rc_ext != 0:
         print(f"[extract] extend.py failed (code={rc_ext}). See {extend_log}")
-        return
+        return False
 
     if not verbose:
         print(f"[extract] extend.py OK (log: {extend_log})")
@@ -154,8 +254,8 @@ def run(state: AppState, arg: str) -> None:
     else:
         print("[extract] Running stage2...")
 
-    rc2 = run_streaming(
-        cmd=["wolframscript", "-file", str(stage2_dst)],
+    rc2 = run_wolfram(
+        script=stage2_dst,
         cwd=run_mat_dir,
         env=env,
         log_path=stage2_log,
@@ -164,61 +264,102 @@ def run(state: AppState, arg: str) -> None:
     )
     if rc2 != 0:
         print(f"[extract] Stage2 failed (code={rc2}). See {stage2_log}")
-        return
-
-    expected = [
-        run_mat_dir / "Files" / "integrals.m",
-        run_mat_dir.parent / "form" / "Files" / "intrule.h",
-    ]
-    missing = [p for p in expected if not p.exists()]
-    if missing:
-        print("[extract] Completed but outputs are missing:")
-        for p in missing:
-            print(f"  missing: {p}")
-        print(f"  Check logs in: {logs_dir}")
-        return
+        return False
 
     if not verbose:
         print(f"[extract] Stage2 OK (log: {stage2_log})")
 
-    print("[extract] OK -> Files/integrals.m, ../form/Files/intrule.h")
+    return True
 
-    # Capture ntop (number of topologies) from Mathematica output
-    len_topos_path = run_mat_dir / "Files" / "lenTopos.txt"
-    if len_topos_path.exists():
-        try:
-            ntop_val = int(len_topos_path.read_text(encoding="utf-8").strip())
-            update_meta(run_dir, {"ntop": ntop_val})
-            if isinstance(state.ctx.meta, dict):
-                state.ctx.meta["ntop"] = ntop_val
-            print(f"[extract] Recorded ntop = {ntop_val} in meta.json")
-        except Exception as exc:
-            print(f"[extract] Warning: could not parse lenTopos.txt ({exc})")
-    else:
-        print("[extract] Warning: lenTopos.txt not found; ntop not recorded. Run extract_topologies_stage2.m output check.")
 
-    print("[extract] Stage 3: Topology formatting with FORM (ToTopos)...")
-    _run_topos_extraction(state, run_dir, repo_root, verbose=verbose, delete_m0m1=delete)
+def _parse_ibp_args(arg: str) -> tuple[int, int, bool]:
+    """Parse ibp arguments. Returns (jobs, threads, verbose)."""
+    toks = shlex.split(arg)
+    jobs = 1
+    threads = 4
+    verbose = False
+    i = 0
+    while i < len(toks):
+        t = toks[i]
+        if t in ("--jobs", "--threads"):
+            if i + 1 >= len(toks):
+                raise ValueError(f"Missing value after {t}")
+            val = max(1, int(toks[i + 1]))
+            if t == "--jobs":
+                jobs = val
+            else:
+                threads = val
+            i += 2
+            continue
+        if t in ("--verbose", "-v"):
+            verbose = True
+        elif t in ("--quiet", "-q"):
+            verbose = False
+        else:
+            raise ValueError(f"Unknown argument: {t}")
+        i += 1
+    return jobs, threads, verbose
+
+
+def _run_ibp_fanout(
+    run_dir: Path,
+    run_mat_dir: Path,
+    ibp_dst: Path,
+    merge_dst: Path,
+    env: dict,
+    ntop: int,
+    jobs: int,
+    spec: dict,
+    verbose: bool,
+) -> bool:
+    """
+    Reduce the topologies in `jobs` wolframscript processes or pool kernels (LPT-packed
+    by the number of integrals in the IBP spec), then write the FORM tables with IBPMerge.m.
+    """
+    tops = list(range(1, ntop + 1))
+    weights = {k: 1.0 + float((spec.get(str(k)) or {}).get("integrals", 0)) for k in tops}
+    batches = partition_items(tops, min(jobs, ntop), weights=weights, static=True)
+    tasks = []
+    for k, batch in enumerate(batches, start=1):
+        job_env = dict(env, GLAS_IBP_TOPOS=",".join(str(t) for t in sorted(batch)), GLAS_IBP_MERGE="0")
+        tasks.append((batch_tag("IBP", k, len(batches), True), ibp_dst, run_mat_dir, job_env))
+
+    print(f"[ibp] Running IBP.m for {ntop} topologies in {len(batches)} processes ({env['GLAS_IBP_THREADS']} threads each)...")
+    if not run_wolfram_jobs(tasks, len(batches), run_dir, LOG_SUBDIR_IBP, verbose=verbose):
+        print("[ibp] IBP.m failed. Check logs.")
+        return False
+
+    merge_log = ensure_logs_dir(run_dir, LOG_SUBDIR_IBP) / "IBPMerge.log"
+    rc = run_wolfram(
+        script=merge_dst,
+        cwd=run_mat_dir,
+        env=env,
+        log_path=merge_log,
+        prefix="mma IBPMerge",
+        verbose=verbose,
+    )
+    if rc != 0:
+        print(f"[ibp] IBPMerge.m failed (code={rc}). See {merge_log}")
+        return False
+    return True
 
 
-def ibp(state: AppState, arg: str) -> None:
-    # Parse --verbose flag
-    remainder, verbose = parse_simple_flags(arg)
-    remainder = remainder.strip()
+def ibp(state: AppState, arg: str) -> bool:
+    try:
+        jobs, threads, verbose = _parse_ibp_args(arg)
+    except ValueError as exc:
+        print(f"Usage: ibp [--jobs K] [--threads T] [--verbose] ({exc})")
+        return False
 
     # Also check state.verbose
     verbose = verbose or state.verbose
-
-    if remainder:
-        print("Usage: ibp [--verbose]")
-        return
     if not state.ensure_run():
-        return
+        return False
 
     run_dir = state.ctx.run_dir
     if not run_dir:
         print("Error: no run attached.")
-        return
+        return False
 
     repo_root = Path(__file__).resolve().parents[2]
     mandibp_src = repo_root / "mathematica" / "scripts" / "mandIBP.m"
@@ -226,7 +367,7 @@ def ibp(state: AppState, arg: str) -> None:
     symrel_src = repo_root / "mathematica" / "scripts" / "SymmetryRelations.m"
     if not mandibp_src.exists() or not ibp_src.exists() or not symrel_src.exists():
         print("Error: missing IBP scripts in mathematica/scripts.")
-        return
+        return False
 
     run_mat_dir = run_dir / "Mathematica"
     run_mat_dir.mkdir(parents=True, exist_ok=True)
@@ -235,6 +376,9 @@ def ibp(state: AppState, arg: str) -> None:
     symrel_dst = run_mat_dir / "SymmetryRelations.m"
     mandibp_dst.write_text(mandibp_src.read_text(encoding="utf-8"), encoding="utf-8")
     ibp_dst.write_text(ibp_src.read_text(encoding="utf-8"), encoding="utf-8")
+    merge_src = repo_root / "mathematica" / "scripts" / "IBPMerge.m"
+    merge_dst = run_mat_dir / "IBPMerge.m"
+    merge_dst.write_text(merge_src.read_text(encoding="utf-8"), encoding="utf-8")
     symrel_dst.write_text(symrel_src.read_text(encoding="utf-8"), encoding="utf-8")
 
     env = os.environ.copy()
@@ -252,8 +396,8 @@ def ibp(state: AppState, arg: str) -> None:
     else:
         print("[ibp] Running mandIBP.m...")
 
-    rc1 = run_streaming(
-        cmd=["wolframscript", "-file", str(mandibp_dst)],
+    rc1 = run_wolfram(
+        script=mandibp_dst,
         cwd=run_mat_dir,
         env=env,
         log_path=mandibp_log,
@@ -262,43 +406,62 @@ def ibp(state: AppState, arg: str) -> None:
     )
     if rc1 != 0:
         print(f"[ibp] mandIBP.m failed (code={rc1}). See {mandibp_log}")
-        return
+        return False
 
     mands_file = run_mat_dir / "Files" / "mands.m"
     if not mands_file.exists():
         print(f"[ibp] mandIBP.m completed but Files/mands.m not created.")
         print(f"  See log: {mandibp_log}")
-        return
+        return False
 
     if not verbose:
         print(f"[ibp] mandIBP.m OK -> Files/mands.m (log: {mandibp_log})")
 
-    # Stage 2: IBP.m
-    if verbose:
-        print("[mma IBP] Running IBP.m...")
+    # IBP spec: only the integrals that occur in M0M1top, in their smallest top sector
+    spec_path = run_mat_dir / "Files" / "IBPSpec.json"
+    m0m1top_dir = run_dir / "form" / "Files" / "M0M1top"
+    meta = state.ctx.meta if isinstance(state.ctx.meta, dict) else {}
+    spec: dict = {}
+    if m0m1top_dir.exists():
+        spec = write_ibp_spec(m0m1top_dir, m0m1_pairs(meta), spec_path, int(meta.get("ntop") or 0))
+        nints = sum(int(t["integrals"]) for t in spec.values())
+        nempty = sum(1 for t in spec.values() if not t["integrals"])
+        print(f"[ibp] IBP spec: {nints} integrals in {len(spec) - nempty} topologies ({nempty} empty) -> {spec_path.name}")
+    elif spec_path.exists():
+        spec_path.unlink()
+
+    # Stage 2: IBP.m (one process, or one per batch of topologies with --jobs)
+    ntop = int(meta.get("ntop") or 0)
+    env["GLAS_IBP_THREADS"] = str(threads)
+    if jobs > 1 and ntop > 1:
+        if not _run_ibp_fanout(run_dir, run_mat_dir, ibp_dst, merge_dst, env, ntop, jobs, spec, verbose):
+            return False
     else:
-        print("[ibp] Running IBP.m...")
-
-    rc2 = run_streaming(
-        cmd=["wolframscript", "-file", str(ibp_dst)],
-        cwd=run_mat_dir,
-        env=env,
-        log_path=ibp_log_file,
-        prefix="mma IBP",
-        verbose=verbose,
-    )
-    if rc2 != 0:
-        print(f"[ibp] IBP.m failed (code={rc2}). See {ibp_log_file}")
-        return
+        if verbose:
+            print("[mma IBP] Running IBP.m...")
+        else:
+            print("[ibp] Running IBP.m...")
+
+        rc2 = run_wolfram(
+            script=ibp_dst,
+            cwd=run_mat_dir,
+            env=env,
+            log_path=ibp_log_file,
+            prefix="mma IBP",
+            verbose=verbose,
+        )
+        if rc2 != 0:
+            print(f"[ibp] IBP.m failed (code={rc2}). See {ibp_log_file}")
+            return False
 
     ibp_dir = run_mat_dir / "Files" / "IBP"
     if not ibp_dir.exists() or not any(ibp_dir.iterdir()):
         print(f"[ibp] IBP.m completed but Files/IBP/ is empty or missing.")
         print(f"  See log: {ibp_log_file}")
-        return
+        return False
 
     if not verbose:
-        print(f"[ibp] IBP.m OK -> Files/IBP/ ({len(list(ibp_dir.glob('*.m')))} topology files) (log: {ibp_log_file})")
+        print(f"[ibp] IBP.m OK -> Files/IBP/ ({len(list(ibp_dir.glob('*.m')))} topology files) (logs: {logs_dir})")
 
     # Stage 3: SymmetryRelations.m
     if verbose:
@@ -306,8 +469,8 @@ def ibp(state: AppState, arg: str) -> None:
     else:
         print("[ibp] Running SymmetryRelations.m...")
 
-    rc3 = run_streaming(
-        cmd=["wolframscript", "-file", str(symrel_dst)],
+    rc3 = run_wolfram(
+        script=symrel_dst,
         cwd=run_mat_dir,
         env=env,
         log_path=symrel_log,
@@ -316,13 +479,13 @@ def ibp(state: AppState, arg: str) -> None:
     )
     if rc3 != 0:
         print(f"[ibp] SymmetryRelations.m failed (code={rc3}). See {symrel_log}")
-        return
+        return False
 
     symrel_file = run_mat_dir / "Files" / "SymmetryRelations.m"
     if not symrel_file.exists():
         print(f"[ibp] SymmetryRelations.m completed but Files/SymmetryRelations.m not created.")
         print(f"  See log: {symrel_log}")
-        return
+        return False
 
     if not verbose:
         print(f"[ibp] SymmetryRelations.m OK -> Files/SymmetryRelations.m (log: {symrel_log})")
@@ -347,6 +510,7 @@ def ibp(state: AppState, arg: str) -> None:
         print(f"[ibp] Warning: MastersToSym.h not found in ../form/Files/")
     else:
         print("[ibp] Also generated ../form/Files/MastersToSym.h (master integral substitution rules)")
+    return True
 
 
 def _run_topos_extraction(
@@ -355,59 +519,63 @@ def _run_topos_extraction(
     repo_root: Path,
     verbose: bool = False,
     delete_m0m1: bool = False,
-) -> None:
+    jobs: int = 0,
+) -> bool:
     """
     Stage 3: Run ToTopos FORM driver in parallel to format topology integrals.
     
-    Prompts user for number of parallel jobs (1 = no parallelism, N > 1 = N jobs).
-    Generates ToTopos_J{k}of{N}.frm drivers and executes them in parallel.
+    Uses `jobs` FORM workers (at most one per pair) when given (extract --jobs K),
+    otherwise prompts for the number of parallel jobs (1 = no parallelism, N > 1 = N jobs).
+    Generates ToTopos_B{k}of{N}.frm batch drivers and executes them on a
+    pool of the requested number of FORM workers.
     """
     # Read n0l from meta.json to determine max parallelism
     meta_path = run_dir / "meta.json"
     if not meta_path.exists():
         print("[extract] Error: no meta.json found in run directory.")
-        return
+        return False
     
     try:
         meta = json.loads(meta_path.read_text(encoding="utf-8"))
         n0l = int(meta.get("n0l", 0))
         if n0l <= 0:
             print("[extract] Error: n0l is 0 or missing from meta.json.")
-            return
+            return False
+        max_jobs = max(1, len(m0m1_pairs(meta)))
     except (json.JSONDecodeError, ValueError) as e:
         print(f"[extract] Error reading meta.json: {e}")
-        return
+        return False
     
     # Validate that required files exist
     try:
         config_info = prepare_topoformat_project(run_dir, jobs=1)
     except (FileNotFoundError, ValueError) as e:
         print(f"[extract] ToTopos preparation failed: {e}")
-        return
+        return False
 
-    print(f"[extract] Topology extraction is ready to run with up to {n0l} parallel job(s).")
-    print(f"[extract] Enter number of parallel jobs: 1 = serial, {n0l} = maximum parallelism")
-    
-    jobs_requested = None
-    max_retries = 3
+    jobs_requested = min(jobs, max_jobs) if jobs else None
+    if jobs_requested is None:
+        print(f"[extract] Topology extraction is ready to run with up to {max_jobs} parallel job(s).")
+        print(f"[extract] Enter number of parallel jobs: 1 = serial, {max_jobs} = maximum parallelism")
+    max_retries = 3 if jobs_requested is None else 0
     for attempt in range(max_retries):
         try:
-            jobs_input = input(f"[extract] Jobs (1-{n0l}): ").strip()
+            jobs_input = input(f"[extract] Jobs (1-{max_jobs}): ").strip()
             if not jobs_input:
                 print("[extract] Cancelled.")
-                return
+                return False
             jobs_requested = int(jobs_input)
-            if jobs_requested < 1 or jobs_requested > n0l:
-                print(f"[extract] Invalid: must be 1-{n0l}. Try again.")
+            if jobs_requested < 1 or jobs_requested > max_jobs:
+                print(f"[extract] Invalid: must be 1-{max_jobs}. Try again.")
                 continue
             break
         except ValueError:
-            print(f"[extract] Invalid: must be an integer 1-{n0l}. Try again.")
+            print(f"[extract] Invalid: must be an integer 1-{max_jobs}. Try again.")
             continue
     
-    if jobs_requested is None or jobs_requested < 1 or jobs_requested > n0l:
+    if jobs_requested is None or jobs_requested < 1 or jobs_requested > max_jobs:
         print("[extract] Cancelled: invalid input.")
-        return
+        return False
 
     print(f"[extract] Running ToTopos with {jobs_requested} parallel job(s)...")
 
@@ -415,21 +583,22 @@ def _run_topos_extraction(
     form_dir = config_info["form_dir"]
     drivers = config_info["drivers"]
     jobs_effective = config_info["jobs_effective"]
+    nbatches = len(drivers)
 
     form_exe = shutil.which("form")
     if not form_exe:
         print("[extract] Error: FORM executable not found on PATH.")
-        return
+        return False
 
     jobs_list = [
-        (f"ToTopos_J{k}of{jobs_effective}", form_dir, drivers[k])
+        (f"ToTopos_B{k}of{nbatches}", form_dir, drivers[k])
         for k in sorted(drivers.keys())
     ]
 
     if not run_jobs(form_exe, jobs_list, jobs_effective, verbose=verbose, run_dir=run_dir, log_subdir=LOG_SUBDIR_TOPOFORMAT):
         print(f"[extract] ToTopos failed on one or more jobs.")
         print(f"  Check logs in: {run_dir / 'logs' / LOG_SUBDIR_TOPOFORMAT}")
-        return
+        return False
 
     m0m1top_form = form_dir / "Files" / "M0M1top"
     m0m1top_math = run_dir / "Mathematica" / "Files" / "M0M1top"
@@ -437,13 +606,13 @@ def _run_topos_extraction(
     # Check for output files with better diagnostics
     if not m0m1top_form.exists():
         print(f"[extract] ToTopos completed but output directory not found: {m0m1top_form}")
-        return
+        return False
     
     h_files = list(m0m1top_form.glob("*.h"))
     if not h_files:
         print(f"[extract] ToTopos completed but no .h files found in {m0m1top_form}")
         print(f"  Directory contents: {list(m0m1top_form.iterdir())}")
-        return
+        return False
 
     print(f"[extract] ToTopos OK -> Files/M0M1top/ ({len(h_files)} .h files)")
     if m0m1top_math.exists():
@@ -460,3 +629,4 @@ def _run_topos_extraction(
             shutil.rmtree(m0m1_math)
             print(f"[extract] Deleted {m0m1_math}")
     print("[extract] Topology extraction complete!")
+    return True
@@ -6,22 +6,27 @@ from glaslib.formprep import prepare_form
 from glaslib.qgraf import generate_run
 
 
-def run(state: AppState, arg: str) -> None:
+def run(state: AppState, arg: str) -> bool:
+    if "--batch" in arg.split():
+        from glaslib.commands import batch
+
+        batch.run(state, arg)
+        return True
     try:
         process_str, jobs, run_name, resume = parse_generate_args(arg)
     except Exception as exc:
         print(f"Error: {exc}")
-        print("Usage: generate q q~ > t t~ --jobs 8 [--run NAME] [--resume]")
-        return
+        print("Usage: generate q q~ > t t~ --jobs 8 [--run NAME] [--resume] | generate --batch FILE [--jobs K] [--stages ...]")
+        return False
 
     if not process_str:
-        print("Usage: generate q q~ > t t~ --jobs 8 [--run NAME] [--resume]")
-        return
+        print("Usage: generate q q~ > t t~ --jobs 8 [--run NAME] [--resume] | generate --batch FILE [--jobs K] [--stages ...]")
+        return False
 
     jobs_req = max(1, int(jobs or 1))
     if resume and not run_name:
         print("Error: --resume requires --run NAME.")
-        return
+        return False
 
     try:
         if run_name:
@@ -29,13 +34,13 @@ def run(state: AppState, arg: str) -> None:
             if run_dir.exists():
                 if not resume:
                     print(f"Error: run '{run_name}' already exists. Use --resume to attach.")
-                    return
+                    return False
                 state.ctx.attach(run_dir)
                 state.refs().load_from_meta()
             else:
                 if resume:
                     print(f"Error: run '{run_name}' does not exist to resume.")
-                    return
+                    return False
                 out = generate_run(
                     process_str,
                     root=project_root(),
@@ -63,7 +68,7 @@ def run(state: AppState, arg: str) -> None:
 
         if not state.ctx.run_dir:
             print("Error: no run directory attached.")
-            return
+            return False
 
         prepare_form(state.ctx, jobs=jobs_req)
 
@@ -85,3 +90,5 @@ def run(state: AppState, arg: str) -> None:
         print(f"  jobs eff   : {jobs_eff}")
     except Exception as exc:
         print(f"Error: {exc}")
+        return False
+    return True
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+
+from glaslib.commands.common import AppState
+from glaslib.core.kernelpool import KernelPool, active_pool, fake_kernel_command, set_active_pool, wolfram_kernel_command
+from glaslib.core.logging import LOG_SUBDIR_KERNELS, ensure_logs_dir
+
+USAGE = "Usage: kernels start [--n K] [--preload PKG,PKG,...] [--fake] | kernels stop | kernels status"
+
+
+def run(state: AppState, arg: str) -> None:
+    """
+    Manage the pool of long-lived Wolfram kernels.
+
+    Usage:
+        kernels start [--n K] [--preload PKG,...] [--fake]
+                                  - start K kernels (default 2); PKG may be a context
+                                    (FeynCalc`) or a .m/.wl file loaded once per kernel
+        kernels status            - ping every kernel
+        kernels stop              - shut the pool down
+
+    While the pool runs, extract, ibp, linrels, ratcombine and ktexpand send their
+    Mathematica scripts to a free kernel instead of starting wolframscript.
+    --fake starts Python stand-ins that speak the same protocol (no Mathematica needed).
+    """
+    toks = arg.split()
+    if not toks or toks[0] not in ("start", "stop", "status"):
+        print(USAGE)
+        return
+    action, rest = toks[0], toks[1:]
+
+    if action == "stop":
+        pool = active_pool()
+        if pool is None:
+            print("[kernels] No kernel pool running.")
+            return
+        pool.stop()
+        set_active_pool(None)
+        print(f"[kernels] Stopped {len(pool)} kernels.")
+        return
+
+    if action == "status":
+        pool = active_pool()
+        if pool is None:
+            print("[kernels] No kernel pool running.")
+            return
+        for entry in pool.status():
+            if entry.get("ok"):
+                warm = ", ".join(entry.get("warm") or []) or "-"
+                print(f"  port {entry['port']}: pid {entry.get('pid')}, preloaded: {warm}")
+            else:
+                print(f"  port {entry['port']}: not responding ({entry.get('error', 'no reply')})")
+        return
+
+    n = 2
+    preload: list = []
+    fake = False
+    try:
+        while rest:
+            tok = rest.pop(0)
+            if tok == "--n":
+                n = int(rest.pop(0))
+            elif tok == "--preload":
+                preload = [p for p in rest.pop(0).split(",") if p]
+            elif tok == "--fake":
+                fake = True
+            else:
+                raise ValueError(tok)
+        if n < 1:
+            raise ValueError(n)
+    except (IndexError, ValueError):
+        print(USAGE)
+        return
+
+    if active_pool() is not None:
+        print("[kernels] A kernel pool is already running (kernels stop first).")
+        return
+
+    run_dir = state.ctx.run_dir
+    if run_dir:
+        log_dir = ensure_logs_dir(run_dir, LOG_SUBDIR_KERNELS)
+    else:
+        log_dir = Path(tempfile.gettempdir()) / "glas_kernels"
+    # package files are given relative to where glas was started
+    preload = [str(Path(p).resolve()) if p.endswith((".m", ".wl")) else p for p in preload]
+
+    print(f"[kernels] Starting {n} {'fake ' if fake else ''}kernels...")
+    try:
+        pool = KernelPool.start(n, log_dir, preload, command=fake_kernel_command if fake else wolfram_kernel_command)
+    except (OSError, RuntimeError) as exc:
+        print(f"[kernels] Error: {exc}")
+        return
+    set_active_pool(pool)
+    print(f"[kernels] OK: {len(pool)} kernels on ports {', '.join(str(p) for _, p in pool.endpoints)}")
+    print(f"  logs: {log_dir}")
@@ -17,7 +17,7 @@ from typing import Tuple, Optional
 
 from glaslib.commands.common import AppState
 from glaslib.core.logging import LOG_SUBDIR_KTEXPAND, ensure_logs_dir
-from glaslib.core.proc import run_streaming
+from glaslib.core.kernelpool import run_wolfram
 
 
 def _parse_args(arg: str) -> Tuple[Optional[str], bool]:
@@ -63,8 +63,8 @@ def _run_sudakov(state: AppState, run_dir: Path, run_mat_dir: Path, logs_dir: Pa
     else:
         print("[ktexpand] Running Sudakov.m ...")
 
-    rc = run_streaming(
-        cmd=["wolframscript", "-file", str(dst_sudakov)],
+    rc = run_wolfram(
+        script=dst_sudakov,
         cwd=run_mat_dir,
         env=env,
         log_path=log_sudakov,
@@ -88,7 +88,7 @@ def _run_sudakov(state: AppState, run_dir: Path, run_mat_dir: Path, logs_dir: Pa
     return True
 
 
-def run(state: AppState, arg: str) -> None:
+def run(state: AppState, arg: str) -> bool:
     """
     Run the ktexpand command.
     
@@ -101,15 +101,15 @@ def run(state: AppState, arg: str) -> None:
 
     if mode is None:
         print("[ktexpand] Usage: ktexpand {lo|nlo} [--verbose]")
-        return
+        return False
 
     if not state.ensure_run():
-        return
+        return False
 
     run_dir = state.ctx.run_dir
     if not run_dir:
         print("[ktexpand] Error: no run attached.")
-        return
+        return False
 
     repo_root = Path(__file__).resolve().parents[2]
     run_mat_dir = run_dir / "Mathematica"
@@ -126,7 +126,7 @@ def run(state: AppState, arg: str) -> None:
     if not sudakov_output.exists():
         print("[ktexpand] Files/Sudakov.m not found, running Sudakov.m first...")
         if not _run_sudakov(state, run_dir, run_mat_dir, logs_dir, repo_root, env, verbose):
-            return
+            return False
 
     # Determine script to run based on mode
     if mode == "lo":
@@ -141,7 +141,7 @@ def run(state: AppState, arg: str) -> None:
     src_script = repo_root / "mathematica" / "scripts" / script_name
     if not src_script.exists():
         print(f"[ktexpand] Missing script: {src_script}")
-        return
+        return False
 
     dst_script = run_mat_dir / script_name
     dst_script.write_text(src_script.read_text(encoding="utf-8"), encoding="utf-8")
@@ -153,8 +153,8 @@ def run(state: AppState, arg: str) -> None:
     else:
         print(f"[ktexpand {mode}] Running {script_name} ...")
 
-    rc = run_streaming(
-        cmd=["wolframscript", "-file", str(dst_script)],
+    rc = run_wolfram(
+        script=dst_script,
         cwd=run_mat_dir,
         env=env,
         log_path=log_path,
@@ -163,7 +163,7 @@ def run(state: AppState, arg: str) -> None:
     )
     if rc != 0:
         print(f"[ktexpand {mode}] Failed (code={rc}). See {log_path}")
-        return
+        return False
 
     expected = run_mat_dir / output_file
     if expected.exists():
@@ -173,3 +173,5 @@ def run(state: AppState, arg: str) -> None:
             print(f"[ktexpand {mode}] OK -> {output_file} (log: {log_path})")
     else:
         print(f"[ktexpand {mode}] Completed but {output_file} not created. See {log_path}")
+        return False
+    return True
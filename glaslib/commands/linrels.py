@@ -7,7 +7,7 @@ from typing import Tuple
 
 from glaslib.commands.common import AppState
 from glaslib.core.logging import LOG_SUBDIR_LINRELS, ensure_logs_dir
-from glaslib.core.proc import run_streaming
+from glaslib.core.kernelpool import run_wolfram
 
 
 def _parse_args(arg: str) -> Tuple[bool, bool]:
@@ -29,7 +29,7 @@ def _parse_args(arg: str) -> Tuple[bool, bool]:
     return combine, verbose
 
 
-def run(state: AppState, arg: str) -> None:
+def run(state: AppState, arg: str) -> bool:
     """
     Run the linrels command.
     
@@ -41,12 +41,12 @@ def run(state: AppState, arg: str) -> None:
     verbose = verbose or state.verbose  # Also check state.verbose
     
     if not state.ensure_run():
-        return
+        return False
 
     run_dir = state.ctx.run_dir
     if not run_dir:
         print("[linrels] Error: no run attached.")
-        return
+        return False
 
     repo_root = Path(__file__).resolve().parents[2]
     run_mat_dir = run_dir / "Mathematica"
@@ -62,7 +62,7 @@ def run(state: AppState, arg: str) -> None:
     src_linrel = repo_root / "mathematica" / "scripts" / "LinearRelations.m"
     if not src_linrel.exists():
         print(f"[linrels] Missing script: {src_linrel}")
-        return
+        return False
 
     dst_linrel = run_mat_dir / "LinearRelations.m"
     dst_linrel.write_text(src_linrel.read_text(encoding="utf-8"), encoding="utf-8")
@@ -74,8 +74,8 @@ def run(state: AppState, arg: str) -> None:
     else:
         print("[linrels] Running LinearRelations.m ...")
 
-    rc = run_streaming(
-        cmd=["wolframscript", "-file", str(dst_linrel)],
+    rc = run_wolfram(
+        script=dst_linrel,
         cwd=run_mat_dir,
         env=env,
         log_path=log_linrel,
@@ -84,7 +84,7 @@ def run(state: AppState, arg: str) -> None:
     )
     if rc != 0:
         print(f"[linrels] Failed (code={rc}). See {log_linrel}")
-        return
+        return False
 
     print(f"[linrels] LinearRelations.m OK. (log: {log_linrel})")
 
@@ -93,7 +93,7 @@ def run(state: AppState, arg: str) -> None:
         src_combine = repo_root / "mathematica" / "scripts" / "CombineLinearRelations.m"
         if not src_combine.exists():
             print(f"[linrels --combine] Missing script: {src_combine}")
-            return
+            return False
 
         dst_combine = run_mat_dir / "CombineLinearRelations.m"
         dst_combine.write_text(src_combine.read_text(encoding="utf-8"), encoding="utf-8")
@@ -105,8 +105,8 @@ def run(state: AppState, arg: str) -> None:
         else:
             print("[linrels --combine] Running CombineLinearRelations.m ...")
 
-        rc = run_streaming(
-            cmd=["wolframscript", "-file", str(dst_combine)],
+        rc = run_wolfram(
+            script=dst_combine,
             cwd=run_mat_dir,
             env=env,
             log_path=log_combine,
@@ -115,7 +115,7 @@ def run(state: AppState, arg: str) -> None:
         )
         if rc != 0:
             print(f"[linrels --combine] Failed (code={rc}). See {log_combine}")
-            return
+            return False
 
         expected = run_mat_dir / "Files" / "MasterCoefficients.m"
         if expected.exists():
@@ -128,6 +128,8 @@ def run(state: AppState, arg: str) -> None:
             _copy_amp_result_script(run_dir, run_mat_dir, repo_root, state)
         else:
             print(f"[linrels --combine] Completed but Files/MasterCoefficients.m not found. See {log_combine}")
+            return False
+    return True
 
 
 def _copy_amp_result_script(run_dir: Path, run_mat_dir: Path, repo_root: Path, state: AppState) -> None:
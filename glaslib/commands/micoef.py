@@ -5,21 +5,24 @@ from typing import Optional, Tuple
 
 from glaslib.commands.common import AppState
 from glaslib.core.logging import LOG_SUBDIR_REDUCE, ensure_logs_dir
-from glaslib.core.parallel import run_jobs
+from glaslib.core.parallel import batch_tag, run_jobs
 from glaslib.reduce import prepare_micoef_project
 
 
-def _parse_args(arg: str) -> Tuple[Optional[int], bool, bool, bool]:
+def _parse_args(arg: str) -> Tuple[Optional[int], bool, bool, bool, Optional[int], bool, bool]:
     """Parse micoef arguments.
     
     Returns:
-        (jobs, combine, delete, verbose)
+        (jobs, combine, delete, verbose, batch, static, per_master)
     """
     toks = shlex.split(arg)
     jobs: Optional[int] = None
+    batch: Optional[int] = None
+    static: bool = False
     combine: bool = False
     delete: bool = False
     verbose: bool = False
+    per_master: bool = False
     i = 0
     while i < len(toks):
         t = toks[i]
@@ -29,6 +32,16 @@ def _parse_args(arg: str) -> Tuple[Optional[int], bool, bool, bool]:
             continue
         if t == "--jobs":
             raise ValueError("Missing value after --jobs")
+        if t == "--batch" and i + 1 < len(toks):
+            batch = int(toks[i + 1])
+            i += 2
+            continue
+        if t == "--batch":
+            raise ValueError("Missing value after --batch")
+        if t == "--static":
+            static = True
+            i += 1
+            continue
         if t == "--combine":
             combine = True
             i += 1
@@ -37,6 +50,10 @@ def _parse_args(arg: str) -> Tuple[Optional[int], bool, bool, bool]:
             delete = True
             i += 1
             continue
+        if t == "--per-master":
+            per_master = True
+            i += 1
+            continue
         if t in ("--verbose", "-v"):
             verbose = True
             i += 1
@@ -45,8 +62,8 @@ def _parse_args(arg: str) -> Tuple[Optional[int], bool, bool, bool]:
             verbose = False
             i += 1
             continue
-        i += 1
-    return jobs, combine, delete, verbose
+        raise ValueError(f"Unknown argument: {t}")
+    return jobs, combine, delete, verbose, batch, static, per_master
 
 
 def _resolve_jobs(state: AppState, jobs: Optional[int]) -> int:
@@ -61,45 +78,46 @@ def _resolve_jobs(state: AppState, jobs: Optional[int]) -> int:
         return 1
 
 
-def run(state: AppState, arg: str) -> None:
+def run(state: AppState, arg: str) -> bool:
     """
     Run the micoef command (master integral coefficient extraction).
     
     Usage:
-        micoef [--jobs K] [--verbose]                    - Run MasterCoefficients only (parallelized by nmis)
-        micoef --combine [--jobs K] [--delete] [--verbose] - Run MasterCoefficients + SumMasterCoefs
+        micoef [--jobs K] [--batch N] [--static] [--per-master] [--verbose] - Run MasterCoefficients only
+        micoef --combine [--jobs K] [--batch N] [--delete] [--verbose] - Run MasterCoefficients + SumMasterCoefs
     """
     try:
-        jobs_opt, combine, delete, verbose = _parse_args(arg)
+        jobs_opt, combine, delete, verbose, batch, static, per_master = _parse_args(arg)
     except ValueError as exc:
-        print(f"Usage: micoef [--jobs K] [--combine] [--delete] [--verbose] ({exc})")
-        return
+        print(f"Usage: micoef [--jobs K] [--batch N] [--static] [--per-master] [--combine] [--delete] [--verbose] ({exc})")
+        return False
 
     verbose = verbose or state.verbose
 
     if not state.ensure_run():
-        return
+        return False
 
     jobs_req = _resolve_jobs(state, jobs_opt)
 
     try:
-        out = prepare_micoef_project(state.ctx.run_dir, jobs=jobs_req)
+        out = prepare_micoef_project(
+            state.ctx.run_dir, jobs=jobs_req, batch_size=batch, static=static, per_master=per_master
+        )
     except Exception as exc:
         print(f"[micoef] Error: {exc}")
-        return
+        return False
 
     form_dir = out["form_dir"]
     jobs_eff_master = out["jobs_eff_master"]
     jobs_eff_sum = out["jobs_eff_sum"]
-    n0l = out["n0l"]
     nmis = out["nmis"]
     master_drivers = out["master_drivers"]
     sum_drivers = out["sum_drivers"]
 
-    # Always run MasterCoefficients (parallelized by n0l)
-    print(f"[micoef] Running MasterCoefficients ({jobs_eff_master} jobs for {n0l} tree diagrams)...")
+    # Always run MasterCoefficients (batched over (i,j) pairs)
+    print(f"[micoef] Running MasterCoefficients ({len(master_drivers)} batches on {jobs_eff_master} workers)...")
     master_tasks = [
-        (f"MasterCoefficients_J{k}of{jobs_eff_master}", form_dir, drv)
+        (batch_tag("MasterCoefficients", k, len(master_drivers), static), form_dir, drv)
         for k, drv in master_drivers.items()
     ]
     ok_master = run_jobs(
@@ -113,15 +131,15 @@ def run(state: AppState, arg: str) -> None:
 
     if not ok_master:
         print("[micoef] MasterCoefficients failed. Check logs.")
-        return
+        return False
 
     print("[micoef] MasterCoefficients finished OK.")
 
     if combine:
         # Also run SumMasterCoefs (parallelized by nmis)
-        print(f"[micoef --combine] Running SumMasterCoefs ({jobs_eff_sum} jobs for {nmis} master integrals)...")
+        print(f"[micoef --combine] Running SumMasterCoefs ({len(sum_drivers)} batches for {nmis} master integrals)...")
         sum_tasks = [
-            (f"SumMasterCoefs_J{k}of{jobs_eff_sum}", form_dir, drv)
+            (batch_tag("SumMasterCoefs", k, len(sum_drivers)), form_dir, drv)
             for k, drv in sum_drivers.items()
         ]
         ok_sum = run_jobs(
@@ -140,8 +158,9 @@ def run(state: AppState, arg: str) -> None:
                 _delete_m0m1_reduced(state.ctx.run_dir)
         else:
             print("[micoef --combine] SumMasterCoefs failed. Check logs.")
-    else:
-        print("[micoef] Run 'micoef --combine' to sum coefficients across diagrams.")
+        return ok_sum
+    print("[micoef] Run 'micoef --combine' to sum coefficients across diagrams.")
+    return True
 
 
 def _copy_amp_results5_if_needed(run_dir) -> None:
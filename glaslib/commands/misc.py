@@ -125,9 +125,9 @@ def smoke(state: AppState, arg: str) -> None:
         print("[smoke] OK.")
 
 
-def contract_full(state: AppState, arg: str) -> None:
+def contract_full(state: AppState, arg: str) -> bool:
     if not state.ensure_run():
-        return
+        return False
     jobs = None
     toks = shlex.split(arg)
     if "--jobs" in toks:
@@ -136,16 +136,18 @@ def contract_full(state: AppState, arg: str) -> None:
             jobs = int(toks[idx + 1])
         except Exception:
             print("Usage: contract full [--jobs K]")
-            return
+            return False
     for mode in ("lo", "nlo", "mct"):
         cmd = mode if jobs is None else f"{mode} --jobs {jobs}"
-        evaluate.run(state, cmd)
+        if not evaluate.run(state, cmd):
+            return False
     for mode in ("lo", "nlo", "mct"):
         cmd = mode if jobs is None else f"{mode} --jobs {jobs}"
         from glaslib.commands import contract
 
-        contract.run(state, cmd)
-    uvct.run(state, "")
+        if not contract.run(state, cmd):
+            return False
+    return uvct.run(state, "")
 
 
 def model(state: AppState, arg: str) -> None:
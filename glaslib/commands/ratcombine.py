@@ -5,10 +5,10 @@ from pathlib import Path
 
 from glaslib.commands.common import AppState, parse_simple_flags
 from glaslib.core.logging import LOG_SUBDIR_RATCOMBINE, ensure_logs_dir
-from glaslib.core.proc import run_streaming
+from glaslib.core.kernelpool import run_wolfram
 
 
-def run(state: AppState, arg: str) -> None:
+def run(state: AppState, arg: str) -> bool:
     """
     Run the ratcombine command.
     
@@ -26,15 +26,15 @@ def run(state: AppState, arg: str) -> None:
     
     if remainder:
         print("Usage: ratcombine [--verbose]")
-        return
+        return False
 
     if not state.ensure_run():
-        return
+        return False
 
     run_dir = state.ctx.run_dir
     if not run_dir:
         print("[ratcombine] Error: no run attached.")
-        return
+        return False
 
     repo_root = Path(__file__).resolve().parents[2]
     run_mat_dir = run_dir / "Mathematica"
@@ -51,7 +51,7 @@ def run(state: AppState, arg: str) -> None:
     src_script = repo_root / "mathematica" / "scripts" / "CombineRationalFunctions.m"
     if not src_script.exists():
         print(f"[ratcombine] Missing script: {src_script}")
-        return
+        return False
 
     dst_script = run_mat_dir / "CombineRationalFunctions.m"
     dst_script.write_text(src_script.read_text(encoding="utf-8"), encoding="utf-8")
@@ -63,15 +63,15 @@ def run(state: AppState, arg: str) -> None:
     if not mi_dir.exists() or not any(mi_dir.iterdir()):
         print("[ratcombine] Error: Files/MasterCoefficients/ is empty or missing.")
         print("  Run 'micoef' first to generate master coefficient files.")
-        return
+        return False
 
     if verbose:
         print("[mma ratcombine] Running CombineRationalFunctions.m...")
     else:
         print("[ratcombine] Running CombineRationalFunctions.m ...")
 
-    rc = run_streaming(
-        cmd=["wolframscript", "-file", str(dst_script)],
+    rc = run_wolfram(
+        script=dst_script,
         cwd=run_mat_dir,
         env=env,
         log_path=log_file,
@@ -81,19 +81,20 @@ def run(state: AppState, arg: str) -> None:
 
     if rc != 0:
         print(f"[ratcombine] Failed (code={rc}). See {log_file}")
-        return
+        return False
 
     # Check output file was created
     output_file = run_mat_dir / "Files" / "MasterCoefficients.m"
     if not output_file.exists():
         print(f"[ratcombine] Completed but Files/MasterCoefficients.m not created.")
         print(f"  See log: {log_file}")
-        return
+        return False
 
     if not verbose:
         print(f"[ratcombine] OK -> Files/MasterCoefficients.m (log: {log_file})")
     else:
         print("[ratcombine] OK -> Files/MasterCoefficients.m")
+    return True
 
 
 def _copy_amp_results_template(run_dir: Path, repo_root: Path) -> None:
@@ -5,19 +5,24 @@ from typing import Optional, Tuple
 
 from glaslib.commands.common import AppState
 from glaslib.core.logging import LOG_SUBDIR_REDUCE
-from glaslib.core.parallel import run_jobs
-from glaslib.reduce import prepare_reduce_project
+from glaslib.core.parallel import batch_tag, run_jobs
+from glaslib.reduce import prepare_fused_project, prepare_reduce_project
 
 
-def _parse_args(arg: str) -> Tuple[Optional[int], bool]:
+def _parse_args(arg: str) -> Tuple[Optional[int], bool, Optional[int], bool, bool, bool, bool]:
     """Parse reduce arguments.
     
     Returns:
-        (jobs, verbose)
+        (jobs, verbose, batch, static, fused, keep_reduced, combine)
     """
     toks = shlex.split(arg)
     jobs: Optional[int] = None
+    batch: Optional[int] = None
+    static: bool = False
     verbose: bool = False
+    fused: bool = False
+    keep_reduced: bool = False
+    combine: bool = False
     i = 0
     while i < len(toks):
         t = toks[i]
@@ -27,6 +32,28 @@ def _parse_args(arg: str) -> Tuple[Optional[int], bool]:
             continue
         if t == "--jobs":
             raise ValueError("Missing value after --jobs")
+        if t == "--batch" and i + 1 < len(toks):
+            batch = int(toks[i + 1])
+            i += 2
+            continue
+        if t == "--batch":
+            raise ValueError("Missing value after --batch")
+        if t == "--static":
+            static = True
+            i += 1
+            continue
+        if t == "--fused":
+            fused = True
+            i += 1
+            continue
+        if t == "--keep-reduced":
+            keep_reduced = True
+            i += 1
+            continue
+        if t == "--combine":
+            combine = True
+            i += 1
+            continue
         if t in ("--verbose", "-v"):
             verbose = True
             i += 1
@@ -35,8 +62,8 @@ def _parse_args(arg: str) -> Tuple[Optional[int], bool]:
             verbose = False
             i += 1
             continue
-        i += 1
-    return jobs, verbose
+        raise ValueError(f"Unknown argument: {t}")
+    return jobs, verbose, batch, static, fused, keep_reduced, combine
 
 
 def _resolve_jobs(state: AppState, jobs: Optional[int]) -> int:
@@ -51,37 +78,42 @@ def _resolve_jobs(state: AppState, jobs: Optional[int]) -> int:
         return 1
 
 
-def run(state: AppState, arg: str) -> None:
+def run(state: AppState, arg: str) -> bool:
     """
     Run the reduce command (M0M1top -> M0M1Reduced).
     
     Usage:
-        reduce [--jobs K] [--verbose] - Run IBP reduction to produce M0M1Reduced
+        reduce [--jobs K] [--batch N] [--static] [--verbose] - Run IBP reduction to produce M0M1Reduced
+        reduce --fused [--keep-reduced] [--combine] [--jobs K] [--batch N] [--static] [--verbose]
+            - Reduce and extract master coefficients in one FORM pass per pair (no M0M1Reduced)
     """
     try:
-        jobs_opt, verbose = _parse_args(arg)
+        jobs_opt, verbose, batch, static, fused, keep_reduced, combine = _parse_args(arg)
     except ValueError as exc:
-        print(f"Usage: reduce [--jobs K] [--verbose] ({exc})")
-        return
+        print(f"Usage: reduce [--jobs K] [--batch N] [--static] [--fused] [--keep-reduced] [--combine] [--verbose] ({exc})")
+        return False
 
     verbose = verbose or state.verbose
 
     if not state.ensure_run():
-        return
+        return False
 
     jobs_req = _resolve_jobs(state, jobs_opt)
 
+    if fused:
+        return _run_fused(state, jobs_req, batch, static, verbose, keep_reduced, combine)
+
     try:
-        out = prepare_reduce_project(state.ctx.run_dir, jobs=jobs_req)
+        out = prepare_reduce_project(state.ctx.run_dir, jobs=jobs_req, batch_size=batch, static=static)
     except Exception as exc:
         print(f"[reduce] Error: {exc}")
-        return
+        return False
 
     form_dir = out["form_dir"]
     jobs_eff = out["jobs_effective"]
     drivers = out["drivers"]
 
-    tasks = [(f"reduce_J{k}of{jobs_eff}", form_dir, drv) for k, drv in drivers.items()]
+    tasks = [(batch_tag("reduce", k, len(drivers), static), form_dir, drv) for k, drv in drivers.items()]
     ok_reduce = run_jobs(
         state.form_exe,
         tasks,
@@ -95,3 +127,59 @@ def run(state: AppState, arg: str) -> None:
         print("[reduce] All reduction jobs finished OK.")
     else:
         print("[reduce] Reduction failed. Check logs.")
+    return ok_reduce
+
+
+def _run_fused(
+    state: AppState, jobs_req: int, batch: Optional[int], static: bool, verbose: bool, keep_reduced: bool, combine: bool
+) -> bool:
+    """reduce --fused: M0M1top -> MasterCoefficients, optionally followed by SumMasterCoefs."""
+    from glaslib.commands.micoef import _copy_amp_results5_if_needed
+
+    try:
+        out = prepare_fused_project(
+            state.ctx.run_dir, jobs=jobs_req, batch_size=batch, static=static, keep_reduced=keep_reduced
+        )
+    except Exception as exc:
+        print(f"[reduce --fused] Error: {exc}")
+        return False
+
+    form_dir = out["form_dir"]
+    drivers = out["drivers"]
+    sum_drivers = out["sum_drivers"]
+
+    print(f"[reduce --fused] Running ReduceMicoef ({len(drivers)} batches on {out['jobs_effective']} workers)...")
+    tasks = [(batch_tag("ReduceMicoef", k, len(drivers), static), form_dir, drv) for k, drv in drivers.items()]
+    ok = run_jobs(
+        state.form_exe,
+        tasks,
+        max_workers=out["jobs_effective"],
+        verbose=verbose,
+        run_dir=state.ctx.run_dir,
+        log_subdir=LOG_SUBDIR_REDUCE,
+    )
+    if not ok:
+        print("[reduce --fused] Reduction failed. Check logs.")
+        return False
+    print("[reduce --fused] Master coefficients of all pairs written.")
+
+    if not combine:
+        print("[reduce --fused] Pass --combine to also sum coefficients across diagrams.")
+        return True
+
+    print(f"[reduce --fused] Running SumMasterCoefs ({len(sum_drivers)} batches for {out['nmis']} master integrals)...")
+    sum_tasks = [(batch_tag("SumMasterCoefs", k, len(sum_drivers)), form_dir, drv) for k, drv in sum_drivers.items()]
+    ok_sum = run_jobs(
+        state.form_exe,
+        sum_tasks,
+        max_workers=out["jobs_eff_sum"],
+        verbose=verbose,
+        run_dir=state.ctx.run_dir,
+        log_subdir=LOG_SUBDIR_REDUCE,
+    )
+    if ok_sum:
+        print("[reduce --fused] SumMasterCoefs finished OK.")
+        _copy_amp_results5_if_needed(state.ctx.run_dir)
+    else:
+        print("[reduce --fused] SumMasterCoefs failed. Check logs.")
+    return ok_sum
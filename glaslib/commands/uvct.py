@@ -10,22 +10,22 @@ from glaslib.core.logging import LOG_SUBDIR_UVCT
 from glaslib.core.parallel import run_jobs
 
 
-def run(state: AppState, arg: str) -> None:
+def run(state: AppState, arg: str) -> bool:
     # Parse --verbose flag
     remainder, verbose = parse_simple_flags(arg)
     verbose = verbose or state.verbose  # Also check state.verbose
     
     if remainder.strip():
         print("Usage: uvct [--verbose]")
-        return
+        return False
     if not state.ensure_run():
-        return
+        return False
 
     try:
         drivers = prepare_getct(state.ctx, form_exe=state.form_exe)
     except Exception as exc:
         print(f"Error: {exc}")
-        return
+        return False
 
     is_massless = drivers.get("is_massless", False)
     is_higgs = drivers.get("is_higgs", False)
@@ -35,11 +35,11 @@ def run(state: AppState, arg: str) -> None:
         driver = drivers.get(name)
         if not driver:
             print(f"Error: missing driver for {name}")
-            return
+            return False
         form_dir = driver.parent
         ok = run_jobs(state.form_exe, [(name, form_dir, driver)], max_workers=1, verbose=verbose, run_dir=state.ctx.run_dir, log_subdir=LOG_SUBDIR_UVCT)
         if not ok:
-            return
+            return False
         if state.ctx.run_dir and write_total_to_uvct(state.ctx.run_dir, name, name):
             print(f"  UVCT/{name}.m updated.")
         else:
@@ -51,7 +51,7 @@ def run(state: AppState, arg: str) -> None:
         form_dir = driver.parent
         ok = run_jobs(state.form_exe, [("Vyuk", form_dir, driver)], max_workers=1, verbose=verbose, run_dir=state.ctx.run_dir, log_subdir=LOG_SUBDIR_UVCT)
         if not ok:
-            return
+            return False
         if state.ctx.run_dir and write_total_to_uvct(state.ctx.run_dir, "Vyuk", "Vyuk"):
             print("  UVCT/Vyuk.m updated.")
         else:
@@ -78,3 +78,4 @@ def run(state: AppState, arg: str) -> None:
             print("  UVCT/Vm.m not written (missing inputs).")
 
     print("[uvct] Completed.")
+    return True
@@ -6,6 +6,11 @@ import shutil
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
 
+from glaslib.colorbasis import color_setup
+from glaslib.core.costs import reset_timings, stage_weights, timing_write_line
+from glaslib.core.pairs import m0m0_pairs
+from glaslib.core.parallel import batch_tag, form_pair_loops, partition_items
+
 
 def _resolve_procedures_dir(project_root: Path) -> Path:
     from glaslib.core.paths import procedures_dir
@@ -100,38 +105,32 @@ def _write_gluon_polarization_section(process_str: str, gluon_refs: Dict[str, st
     return "\n".join(lines)
 
 
-def _chunk_range_1based(total: int, jobs: int, job_index: int) -> Tuple[int, int]:
-    if total <= 0:
-        return 1, 0
-    base = total // jobs
-    rem = total % jobs
-    if job_index <= rem:
-        size = base + 1
-        start = (job_index - 1) * size + 1
-    else:
-        size = base
-        start = rem * (base + 1) + (job_index - rem - 1) * base + 1
-    end = start + size - 1
-    if size <= 0:
-        return 1, 0
-    return start, end
-
-
 def prepare_contractLO_project(
     output_dir: Path,
     *,
     gluon_refs: Optional[Dict[str, str]] = None,
     jobs: int = 1,
+    batch_size: Optional[int] = None,
+    static: bool = False,
 ) -> Dict[str, Any]:
     """
-    Chunked LO contraction drivers:
-      form/contractLO_JkofN.frm
+    Batched LO contraction drivers:
+      form/contractLO_BkofN.frm
 
     Assumption:
       Uses Files/Amps/amp0l/d<i>.h containing d<i> and dC<i>.
 
-    Chunking:
-      outer i=1..n0l split across jobs, each job runs all j=1..n0l
+    Symmetry:
+      d<j>x<i> is the complex conjugate of d<i>x<j>, so only the upper triangle
+      i <= j is contracted. For i < j the file d<i>x<j> holds
+      d<i>x<j> + d<j>x<i> = 2*Re(d<i>x<j>); summing all files still gives |M0|^2.
+      Recorded as meta["m0m0_triangle"] (see glaslib.core.pairs).
+
+    Batching:
+      the n0l*(n0l+1)/2 pairs are cut into small batches queued on a pool of
+      `jobs` FORM workers, weighted by the timings of the previous run, else by
+      size(amp0l/d<i>.h) * size(amp0l/d<j>.h); with static=True they are
+      LPT-packed into exactly `jobs` drivers (form/contractLO_JkofN.frm).
     """
     gluon_refs = gluon_refs or {}
     output_dir = Path(output_dir).resolve()
@@ -159,22 +158,35 @@ def prepare_contractLO_project(
 
     (files_dir / "M0M0").mkdir(parents=True, exist_ok=True)
     (output_dir / "Mathematica" / "Files" / "M0M0").mkdir(parents=True, exist_ok=True)
+    # A full-square M0M0 from an older run would leave d<j>x<i> (i < j) behind and
+    # double count the off-diagonal pairs next to the 2*Re files written below.
+    for stale in list((files_dir / "M0M0").glob("d*x*.h")) + list(
+        (output_dir / "Mathematica" / "Files" / "M0M0").glob("d*x*.m")
+    ):
+        stale.unlink()
 
     project_root = output_dir.parent
     procs_global = _resolve_procedures_dir(project_root)
     _ensure_symlink_or_copy(procs_global, form_dir / "procedures")
 
+    meta["m0m0_triangle"] = True
+    meta_path.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+    pairs = m0m0_pairs(meta)
+
     jobs_requested = max(1, int(jobs))
-    jobs_effective = max(1, min(jobs_requested, n0l))
+    jobs_effective = max(1, min(jobs_requested, len(pairs)))
 
     drivers: Dict[int, Path] = {}
+    color = color_setup(form_dir, ("amp0l",))
 
-    for k in range(1, jobs_effective + 1):
-        i0, i1 = _chunk_range_1based(n0l, jobs_effective, k)
-        if i0 > i1:
-            continue
-
-        frm = form_dir / f"contractLO_J{k}of{jobs_effective}.frm"
+    stage = "contract_lo"
+    weights = stage_weights(form_dir, stage, pairs, lambda p: [amps0 / f"d{p[0]}.h", amps0 / f"d{p[1]}.h"])
+    reset_timings(form_dir, stage)
+    batches = partition_items(pairs, jobs_effective, weights=weights, batch_size=batch_size, static=static)
+    for k, batch in enumerate(batches, start=1):
+        tag = batch_tag("contractLO", k, len(batches), static)
+        frm = form_dir / f"{tag}.frm"
+        j_defines, i_range, j_range = form_pair_loops(batch)
 
         # NOTE: if your LO body differs, paste it inside the do-loops below.
         frm.write_text(
@@ -184,22 +196,24 @@ Off Statistics;
 
 {mand_define}
 #include declarations.h
+{color["tables"]}
     .sort
 PolyRatFun rat;
+{j_defines}
 
-#do i = {i0},{i1}
-#do j = 1,{n0l}
+#do i = {i_range}
+#do j = {j_range}
 
     .sort
-#include Files/Amps/amp0l/d`i'.h
+#include {color["amps"]}/amp0l/d`i'.h
     .sort
-#include Files/Amps/amp0l/d`j'.h
+#include {color["amps"]}/amp0l/d`j'.h
 
 * Example: amp_i * (amp_j)^*
 * You likely already have your own exact conventions:
 Mul dC`j';
     .sort
-#call color
+{color["color"]}
 
 {pol_section}
 repeat id D = 4-2*ep;
@@ -214,6 +228,17 @@ repeat id D = 4-2*ep;
     .sort
 #call SymToRat
 
+#if `i' < `j'
+* d`j'x`i' = conj(d`i'x`j'): store the pair once as 2*Re(d`i'x`j')
+Skip;
+Local dRe = d`i';
+id i_ = -i_;
+id I = -I;
+    .sort
+Local d`i' = d`i' + dRe;
+    .sort
+#endif
+
 format;
 .sort
 #write <Files/M0M0/d`i'x`j'.h> "l d`i'x`j' = (%E);\\n" d`i'
@@ -224,6 +249,7 @@ format mathematica;
 .sort
 Drop;
 #message `i'x`j'
+{timing_write_line(stage, tag)}
 
 #enddo
 #enddo
@@ -238,5 +264,7 @@ Drop;
         "form_dir": form_dir,
         "jobs_requested": jobs_requested,
         "jobs_effective": jobs_effective,
+        "batches": len(drivers),
+        "static": static,
         "drivers": drivers,
     }
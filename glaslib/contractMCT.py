@@ -4,7 +4,12 @@ import json
 import os
 import shutil
 from pathlib import Path
-from typing import Dict, Tuple, List, Optional, Any
+from typing import Dict, List, Optional, Any
+
+from glaslib.colorbasis import color_setup
+from glaslib.core.costs import reset_timings, stage_weights, timing_write_line
+from glaslib.core.pairs import CONTRACT_MODES, CONTRACT_SUMMED, SUMMED_BORN_INDEX
+from glaslib.core.parallel import batch_tag, form_pair_loops, partition_items
 
 
 def _ensure_symlink_or_copy(src: Path, dst: Path) -> None:
@@ -33,23 +38,6 @@ def _count_diagrams(dir_path: Path) -> int:
     return n
 
 
-def _chunk_range_1based(total: int, jobs: int, job_index: int) -> Tuple[int, int]:
-    if total <= 0:
-        return 1, 0
-    base = total // jobs
-    rem = total % jobs
-    if job_index <= rem:
-        size = base + 1
-        start = (job_index - 1) * size + 1
-    else:
-        size = base
-        start = rem * (base + 1) + (job_index - rem - 1) * base + 1
-    end = start + size - 1
-    if size <= 0:
-        return 1, 0
-    return start, end
-
-
 def _polarization_rules_form(gluon_refs: Dict[str, str]) -> str:
     if not gluon_refs:
         return (
@@ -85,14 +73,22 @@ def prepare_contractMCT_project(
     *,
     gluon_refs: Optional[Dict[str, str]] = None,
     jobs: int = 1,
+    batch_size: Optional[int] = None,
+    static: bool = False,
+    mode: str = CONTRACT_SUMMED,
 ) -> Dict[str, Any]:
     """
-    Chunked drivers:
-      form/contractMCT_JkofN.frm
-
-    Outer loop chunked over i=1..nct
-    Each job runs all j=1..ntree
+    Batched drivers:
+      form/contractMCT_BkofN.frm (form/contractMCT_JkofN.frm with static=True)
+
+    mode "summed": each CT diagram i is contracted with the conjugate Born sum
+    -2*(dC1+...+dC<ntree>), built once per driver, giving Vm/d<i>x0.m.
+    mode "pairs": the (i,j) grid i=1..nct x j=1..ntree, giving Vm/d<i>x<j>.m.
+    Either way the work is cut into cost-weighted batches queued on a pool of
+    `jobs` FORM workers, or packed into exactly `jobs` drivers with static=True.
     """
+    if mode not in CONTRACT_MODES:
+        raise ValueError(f"Unknown contraction mode '{mode}' (expected one of: {', '.join(CONTRACT_MODES)})")
     output_dir = Path(output_dir).resolve()
     meta_path = output_dir / "meta.json"
     if not meta_path.exists():
@@ -118,7 +114,6 @@ def prepare_contractMCT_project(
 
     nct = _count_diagrams(mct_dir)
     ntree = _count_diagrams(tree_dir)
-    n0l = int(meta.get("n0l") or 0)
     if nct <= 0:
         raise RuntimeError(f"No CT diagrams found in {mct_dir}")
     if ntree <= 0:
@@ -130,42 +125,51 @@ def prepare_contractMCT_project(
 
     math_out = output_dir / "Mathematica" / "Files" / "Vm"
     math_out.mkdir(parents=True, exist_ok=True)
+    # AmpResult4/5.m load every Vm/d* file: results of the other contraction mode
+    # (d<i>x0 summed, d<i>x<j> pairs) would double count the mass counterterm.
+    for stale in math_out.glob("d*x*.m"):
+        stale.unlink()
 
     mand_define = meta.get("mand_define") or '#define mand "#call mandelstam2x3(p1,p2,p3,p4,p5,0,0,mt,mt,0)"'
 
     gluon_refs = gluon_refs or {}
     pol_block = _polarization_rules_form(gluon_refs)
 
+    summed = mode == CONTRACT_SUMMED
+    if summed:
+        pairs = [(i, SUMMED_BORN_INDEX) for i in range(1, nct + 1)]
+    else:
+        pairs = [(i, j) for i in range(1, nct + 1) for j in range(1, ntree + 1)]
+
     jobs_requested = max(1, int(jobs))
-    jobs_effective = max(1, min(jobs_requested, nct, n0l or nct))
+    jobs_effective = max(1, min(jobs_requested, len(pairs)))
 
     drivers: Dict[int, Path] = {}
+    color = color_setup(form_dir, ("amp0l", "mct"))
 
-    for k in range(1, jobs_effective + 1):
-        i0, i1 = _chunk_range_1based(nct, jobs_effective, k)
-        if i0 > i1:
-            continue
-
-        frm_path = form_dir / f"contractMCT_J{k}of{jobs_effective}.frm"
-        frm_path.write_text(
-            f"""#- 
-#: IncDir procedures
-Off Statistics;
-
-#include declarations.h
-
-{mand_define}
-
-#do i = {i0}, {i1}
-#do j = 1, {ntree}
-    .sort 
-#include Files/Amps/mct/d`i'.h
+    if summed:
+        born_section = f"""
+#do j = 1,{ntree}
+#include {color["amps"]}/amp0l/d`j'.h
+#enddo
+    .sort
+Local ampC = -2*(dC1+...+dC{ntree});
+    .sort
+Drop d1,...,d{ntree},dC1,...,dC{ntree};
+    .sort
+Hide ampC;
+"""
+        contract_section = """l amp = d`i'*ampC; 
     .sort 
-l amp = d`i'; 
+Drop d`i'; 
+    .sort """
+    else:
+        born_section = ""
+        contract_section = f"""l amp = d`i'; 
     .sort 
 Drop d`i'; 
     .sort
-#include Files/Amps/amp0l/d`j'.h
+#include {color["amps"]}/amp0l/d`j'.h
 Local ampC = -2* dC`j';
     .sort 
 
@@ -173,9 +177,40 @@ Mul ampC;
     .sort 
 
 Drop d`j',dC`j', ampC;
+    .sort """
+
+    stage = "contract_mct"
+    weights = stage_weights(
+        form_dir,
+        stage,
+        pairs,
+        lambda p: [mct_dir / f"d{p[0]}.h"] if summed else [mct_dir / f"d{p[0]}.h", tree_dir / f"d{p[1]}.h"],
+    )
+    reset_timings(form_dir, stage)
+    batches = partition_items(pairs, jobs_effective, weights=weights, batch_size=batch_size, static=static)
+    for k, batch in enumerate(batches, start=1):
+        tag = batch_tag("contractMCT", k, len(batches), static)
+        frm_path = form_dir / f"{tag}.frm"
+        j_defines, i_range, j_range = form_pair_loops(batch)
+        frm_path.write_text(
+            f"""#- 
+#: IncDir procedures
+Off Statistics;
+
+#include declarations.h
+{color["tables"]}
+
+{mand_define}
+{j_defines}
+{born_section}
+#do i = {i_range}
+#do j = {j_range}
+    .sort 
+#include {color["amps"]}/mct/d`i'.h
     .sort 
+{contract_section}
 
-#call color
+{color["color"]}
 
 {pol_block}
 
@@ -205,9 +240,10 @@ Format Mathematica;
 #write <../Mathematica/Files/Vm/d`i'x`j'.m> "d[`i',`j'] = (%E );" amp
 
     .sort 
-Drop;
+Drop amp;
 
 #message `i'x`j'
+{timing_write_line(stage, tag)}
 #enddo
 #enddo
     .end
@@ -220,5 +256,8 @@ Drop;
         "form_dir": form_dir,
         "jobs_requested": jobs_requested,
         "jobs_effective": jobs_effective,
+        "batches": len(drivers),
+        "static": static,
+        "mode": mode,
         "drivers": drivers,
     }
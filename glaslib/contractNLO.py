@@ -6,6 +6,11 @@ import shutil
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
 
+from glaslib.colorbasis import color_setup
+from glaslib.core.costs import reset_timings, stage_weights, timing_write_line
+from glaslib.core.pairs import CONTRACT_MODES, CONTRACT_SUMMED, m0m1_pairs, scan_zero_pairs
+from glaslib.core.parallel import batch_tag, form_pair_loops, partition_items
+
 
 def _resolve_procedures_dir(project_root: Path) -> Path:
     from glaslib.core.paths import procedures_dir
@@ -101,32 +106,24 @@ def _write_gluon_polarization_section(process_str: str, gluon_refs: Dict[str, st
     return "\n".join(lines)
 
 
-def _chunk_range_1based(total: int, jobs: int, job_index: int) -> Tuple[int, int]:
-    if total <= 0:
-        return 1, 0
-    base = total // jobs
-    rem = total % jobs
-    if job_index <= rem:
-        size = base + 1
-        start = (job_index - 1) * size + 1
-    else:
-        size = base
-        start = rem * (base + 1) + (job_index - rem - 1) * base + 1
-    end = start + size - 1
-    if size <= 0:
-        return 1, 0
-    return start, end
-
-
 def prepare_contractNLO_project(
     output_dir: Path,
     *,
     gluon_refs: Optional[Dict[str, str]] = None,
     jobs: int = 1,
+    batch_size: Optional[int] = None,
+    static: bool = False,
+    mode: str = CONTRACT_SUMMED,
 ) -> Dict[str, Any]:
     """
-    Writes chunked drivers:
-      form/contractNLO_JkofN.frm
+    Writes batched drivers:
+      form/contractNLO_BkofN.frm
+
+    Modes (recorded as meta["contract_mode"], see glaslib.core.pairs):
+      "summed": the conjugate Born ampC = dC1+...+dC<n0l> is built once per
+                driver and hidden; every loop diagram j gives d0x<j>.
+      "pairs":  every tree diagram i is contracted separately, d<i>x<j>
+                (n0l x n1l files; kept for debugging).
 
     Input required:
       form/Files/Amps/amp0l/*.h and form/Files/Amps/amp1l/*.h exist.
@@ -134,9 +131,12 @@ def prepare_contractNLO_project(
     Output:
       form/Files/M0M1/*.h  and ../Mathematica/Files/M0M1/*.m
 
-    Chunking:
-      split outer loop i=1..n0l across jobs
-      each job runs all j=1..n1l
+    Batching:
+      the (i,j) pairs are cut into small batches queued on a pool of `jobs`
+      FORM workers. Pairs are weighted by the timings of the previous run,
+      else by size(amp0l/d<i>.h) * size(amp1l/d<j>.h); with
+      static=True they are LPT-packed into exactly `jobs` drivers
+      (form/contractNLO_JkofN.frm).
     """
     gluon_refs = gluon_refs or {}
     output_dir = Path(output_dir).resolve()
@@ -154,6 +154,8 @@ def prepare_contractNLO_project(
         raise ValueError("n0l is 0: no tree amplitudes found.")
     if n1l <= 0:
         raise ValueError("n1l is 0: no 1-loop amplitudes found.")
+    if mode not in CONTRACT_MODES:
+        raise ValueError(f"Unknown contraction mode '{mode}' (expected one of: {', '.join(CONTRACT_MODES)})")
     model_id = meta.get("model_id")
     mand_define = meta.get("mand_define") or _build_mandelstam_define(process_str, model_id)
     pol_section = _write_gluon_polarization_section(process_str, gluon_refs)
@@ -178,17 +180,67 @@ def prepare_contractNLO_project(
     if not (form_dir / "procedures" / "declarations.h").exists():
         raise FileNotFoundError(f"declarations.h not found in: {form_dir / 'procedures'}")
 
-    jobs_requested = max(1, int(jobs))
-    jobs_effective = max(1, min(jobs_requested, n0l))
+    meta["contract_mode"] = mode
+    # the sparsity manifest is rebuilt by record_zero_pairs once these drivers have run
+    meta.pop("m0m1_zero", None)
+    meta_path.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
 
-    drivers: Dict[int, Path] = {}
+    summed = mode == CONTRACT_SUMMED
+    pairs = m0m1_pairs(meta, skip_zero=False)
 
-    for k in range(1, jobs_effective + 1):
-        i0, i1 = _chunk_range_1based(n0l, jobs_effective, k)
-        if i0 > i1:
-            continue  # should not happen with clamp, but safe
+    jobs_requested = max(1, int(jobs))
+    jobs_effective = max(1, min(jobs_requested, len(pairs)))
 
-        contract_frm = form_dir / f"contractNLO_J{k}of{jobs_effective}.frm"
+    drivers: Dict[int, Path] = {}
+    color = color_setup(form_dir, ("amp0l", "amp1l"))
+
+    if summed:
+        # Build the conjugate Born sum once per driver; it stays hidden while
+        # the loop diagrams of the batch are contracted with it.
+        born_section = f"""
+#do i = 1,{n0l}
+#include {color["amps"]}/amp0l/d`i'.h
+#enddo
+    .sort
+Local ampC = dC1+...+dC{n0l};
+    .sort
+Drop d1,...,d{n0l},dC1,...,dC{n0l};
+    .sort
+Hide ampC;
+"""
+        contract_section = f"""#include {color["amps"]}/amp1l/d`j'.h
+    .sort 
+Local d`i'x`j' = d`j'*ampC;
+    .sort 
+Drop d`j';"""
+        expr = "d`i'x`j'"
+        drop_line = "Drop d`i'x`j';"
+    else:
+        born_section = ""
+        contract_section = f"""#include {color["amps"]}/amp0l/d`i'.h
+    .sort
+Drop d`i';
+#include {color["amps"]}/amp1l/d`j'.h
+    .sort 
+Mul dC`i';
+    .sort 
+Drop dC`i';"""
+        expr = "d`j'"
+        drop_line = "Drop;"
+
+    stage = "contract_nlo"
+    weights = stage_weights(
+        form_dir,
+        stage,
+        pairs,
+        lambda p: [amps_src1 / f"d{p[1]}.h"] if summed else [amps_src0 / f"d{p[0]}.h", amps_src1 / f"d{p[1]}.h"],
+    )
+    reset_timings(form_dir, stage)
+    batches = partition_items(pairs, jobs_effective, weights=weights, batch_size=batch_size, static=static)
+    for k, batch in enumerate(batches, start=1):
+        tag = batch_tag("contractNLO", k, len(batches), static)
+        contract_frm = form_dir / f"{tag}.frm"
+        j_defines, i_range, j_range = form_pair_loops(batch)
 
         contract_text = f"""#-
 #: IncDir procedures
@@ -199,22 +251,17 @@ Off Statistics;
 
 {mand_define}
 #include declarations.h
+{color["tables"]}
     .sort 
 PolyRatFun rat;
+{j_defines}
+{born_section}
+#do i = {i_range}
+#do j = {j_range}
 
-#do i = {i0},{i1}
-#do j = 1,{n1l}
-
-    .sort 
-#include Files/Amps/amp0l/d`i'.h
-    .sort
-Drop d`i';
-#include Files/Amps/amp1l/d`j'.h
     .sort 
-Mul dC`i';
-    .sort 
-Drop dC`i';
-#call color
+{contract_section}
+{color["color"]}
 
 {pol_section}
 repeat id D = 4-2*ep; 
@@ -241,17 +288,18 @@ format;
 .sort 
 b LoopInt, gs, i_; 
     .sort 
-#write <Files/M0M1/d`i'x`j'.h> "l d`i'x`j' = (%E); \\n" d`j'
+#write <Files/M0M1/d`i'x`j'.h> "l d`i'x`j' = (%E); \\n" {expr}
     .sort 
 id i_=I; 
 format mathematica;
 b LoopInt, gs, i_; 
     .sort 
-#write <../Mathematica/Files/M0M1/d`i'x`j'.m> " d[`i',`j'] = (%E); \\n" d`j'
+#write <../Mathematica/Files/M0M1/d`i'x`j'.m> " d[`i',`j'] = (%E); \\n" {expr}
     .sort 
-Drop;
+{drop_line}
     .sort 
 #message `i'x`j'
+{timing_write_line(stage, tag)}
 #enddo
 #enddo
 
@@ -264,5 +312,25 @@ Drop;
         "form_dir": form_dir,
         "jobs_requested": jobs_requested,
         "jobs_effective": jobs_effective,
+        "batches": len(drivers),
+        "static": static,
+        "mode": mode,
         "drivers": drivers,
     }
+
+
+def record_zero_pairs(output_dir: Path) -> List[Tuple[int, int]]:
+    """
+    Record the identically zero Files/M0M1/d<i>x<j>.h as meta["m0m1_zero"]
+    (see glaslib.core.pairs); later stages skip these pairs.
+    """
+    output_dir = Path(output_dir).resolve()
+    meta_path = output_dir / "meta.json"
+    if not meta_path.exists():
+        raise FileNotFoundError(f"Missing meta.json in: {output_dir}")
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+
+    zero = scan_zero_pairs(output_dir / "form" / "Files" / "M0M1", m0m1_pairs(meta, skip_zero=False))
+    meta["m0m1_zero"] = [[i, j] for i, j in zero]
+    meta_path.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+    return zero
@@ -3,7 +3,7 @@ Contract driver helpers.
 """
 
 from glaslib.contracts.lo import prepare_lo
-from glaslib.contracts.nlo import prepare_nlo
+from glaslib.contracts.nlo import prepare_nlo, record_nlo_zero_pairs
 from glaslib.contracts.mct import prepare_mct
 
-__all__ = ["prepare_lo", "prepare_nlo", "prepare_mct"]
+__all__ = ["prepare_lo", "prepare_nlo", "prepare_mct", "record_nlo_zero_pairs"]
@@ -1,12 +1,20 @@
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, Optional
 
 from glaslib.contractLO import prepare_contractLO_project
 from glaslib.core.run_manager import RunContext
 
 
-def prepare_lo(ctx: RunContext, gluon_refs: Dict[str, str], jobs: int):
+def prepare_lo(
+    ctx: RunContext,
+    gluon_refs: Dict[str, str],
+    jobs: int,
+    batch_size: Optional[int] = None,
+    static: bool = False,
+):
     if not ctx.run_dir:
         raise RuntimeError("No run attached.")
-    return prepare_contractLO_project(ctx.run_dir, gluon_refs=gluon_refs, jobs=jobs)
+    return prepare_contractLO_project(
+        ctx.run_dir, gluon_refs=gluon_refs, jobs=jobs, batch_size=batch_size, static=static
+    )
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, Optional
 
 from glaslib.contractMCT import prepare_contractMCT_project
+from glaslib.core.pairs import CONTRACT_SUMMED
 from glaslib.core.run_manager import RunContext
 
 
-def prepare_mct(ctx: RunContext, gluon_refs: Dict[str, str], jobs: int):
+def prepare_mct(
+    ctx: RunContext,
+    gluon_refs: Dict[str, str],
+    jobs: int,
+    batch_size: Optional[int] = None,
+    static: bool = False,
+    mode: str = CONTRACT_SUMMED,
+):
     if not ctx.run_dir:
         raise RuntimeError("No run attached.")
-    return prepare_contractMCT_project(ctx.run_dir, gluon_refs=gluon_refs, jobs=jobs)
+    return prepare_contractMCT_project(
+        ctx.run_dir, gluon_refs=gluon_refs, jobs=jobs, batch_size=batch_size, static=static, mode=mode
+    )
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Iterable, Optional, Sequence, TypeVar
+
+T = TypeVar("T", bound=Hashable)
+
+# Per-item FORM timings live in form/Files/Timings/<stage>/<driver tag>.txt.
+# Each line is "<i> [<j>] <time_>", where time_ is FORM's cumulative CPU time,
+# so the cost of an item is the difference to the previous line of the same file.
+TIMINGS_SUBDIR = "Timings"
+
+
+def timings_dir(form_dir: Path, stage: str) -> Path:
+    return Path(form_dir) / "Files" / TIMINGS_SUBDIR / stage
+
+
+def timing_write_line(stage: str, tag: str, pair: bool = True) -> str:
+    """FORM '#write' recording the cumulative CPU time after the current item."""
+    keys = "`i' `j'" if pair else "`i'"
+    return f'#write <Files/{TIMINGS_SUBDIR}/{stage}/{tag}.txt> "{keys} `time_\'"'
+
+
+def load_timings(form_dir: Path, stage: str) -> Dict[Hashable, float]:
+    """
+    Read per-item timings recorded by a previous run of a stage.
+
+    Keys are ints for single-index stages and (i, j) tuples for pair stages.
+    Unreadable lines are skipped; an item seen twice keeps its latest cost.
+    """
+    out: Dict[Hashable, float] = {}
+    tdir = timings_dir(form_dir, stage)
+    if not tdir.exists():
+        return out
+    for path in sorted(tdir.glob("*.txt")):
+        prev = 0.0
+        for line in path.read_text(encoding="utf-8", errors="ignore").splitlines():
+            parts = line.split()
+            if len(parts) not in (2, 3):
+                continue
+            try:
+                idx = tuple(int(x) for x in parts[:-1])
+                now = float(parts[-1])
+            except ValueError:
+                continue
+            out[idx[0] if len(idx) == 1 else idx] = max(0.0, now - prev)
+            prev = now
+    return out
+
+
+def reset_timings(form_dir: Path, stage: str) -> Path:
+    """Clear the timings of a stage before its drivers are rerun."""
+    tdir = timings_dir(form_dir, stage)
+    if tdir.exists():
+        shutil.rmtree(tdir)
+    tdir.mkdir(parents=True, exist_ok=True)
+    return tdir
+
+
+def size_weights(items: Iterable[T], paths_of: Callable[[T], Sequence[Path]]) -> Dict[T, float]:
+    """
+    Weight each item by the byte size of its input file(s).
+
+    With several inputs (e.g. amp0l/d<i>.h and amp1l/d<j>.h) the sizes are
+    multiplied, matching the size of the product FORM has to expand.
+    Missing files count as one byte.
+    """
+    out: Dict[T, float] = {}
+    for item in items:
+        w = 1.0
+        for path in paths_of(item):
+            try:
+                w *= max(1, Path(path).stat().st_size)
+            except OSError:
+                pass
+        out[item] = w
+    return out
+
+
+def stage_weights(
+    form_dir: Path,
+    stage: str,
+    items: Sequence[T],
+    paths_of: Optional[Callable[[T], Sequence[Path]]] = None,
+) -> Optional[Dict[T, float]]:
+    """
+    Cost estimate for every item of a stage.
+
+    Timings from the previous run win when they cover all items; otherwise
+    input file sizes are used if paths_of is given. None means no information
+    (uniform cost).
+    """
+    timings = load_timings(form_dir, stage)
+    if items and all(it in timings for it in items):
+        return {it: timings[it] for it in items}
+    if paths_of is not None:
+        return size_weights(items, paths_of)
+    return None
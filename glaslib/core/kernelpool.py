@@ -0,0 +1,362 @@
+"""
+Optional pool of long-lived Wolfram kernels for the Mathematica stages.
+
+Without a pool every stage starts `wolframscript -file <script>` and pays for
+kernel startup and package loading. `kernels start` launches N kernels running
+mathematica/scripts/KernelServer.wl once; run_wolfram() then hands scripts to a
+free kernel instead.
+
+Protocol (TCP on 127.0.0.1, one request per connection, one JSON object per line):
+    {"op": "ping"}                                    -> {"ok": true, "pid": <int>, "warm": [<package>, ...]}
+    {"op": "run", "script": <abs path>, "cwd": <abs dir>,
+     "env": {<name>: <value>}, "log": <abs path>}     -> {"ok": true, "rc": <int>}   (when the script is done)
+    {"op": "quit"}                                    -> {"ok": true}                 (kernel exits)
+The kernel writes the script's output to "log", sets "env" for the duration of the
+script, runs it in Global` and clears Global` afterwards; pings are answered while
+a script runs. Preloaded packages stay loaded; a later `<<Package`` in a script is
+a no-op. Pool runs count against the process budget of glaslib.core.proc. FakeKernel speaks the same protocol.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import queue
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from glaslib.core.proc import process_slot, run_streaming
+
+HOST = "127.0.0.1"
+STARTUP_TIMEOUT = 600.0
+
+Endpoint = Tuple[str, int]
+
+
+def request(endpoint: Endpoint, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Send one request to a kernel and return its reply."""
+    with socket.create_connection(endpoint, timeout=timeout) as sock:
+        sock.settimeout(timeout)
+        sock.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+        buf = b""
+        while not buf.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            buf += chunk
+    if not buf.strip():
+        raise ConnectionError(f"No reply from kernel at {endpoint[0]}:{endpoint[1]}")
+    return json.loads(buf.decode("utf-8"))
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((HOST, 0))
+        return int(sock.getsockname()[1])
+
+
+def wolfram_kernel_command(port: int, preload: Iterable[str]) -> List[str]:
+    server = Path(__file__).resolve().parents[2] / "mathematica" / "scripts" / "KernelServer.wl"
+    return ["wolframscript", "-file", str(server), str(port), ",".join(preload)]
+
+
+def fake_kernel_command(port: int, preload: Iterable[str]) -> List[str]:
+    return [sys.executable, "-m", "glaslib.core.kernelpool", "--fake", str(port), ",".join(preload)]
+
+
+def _tail(path: Path, prefix: str, done: threading.Event) -> None:
+    """Print lines appended to `path` until `done` is set (verbose runs)."""
+    pos = 0
+    while True:
+        finished = done.is_set()
+        try:
+            with path.open("r", encoding="utf-8", errors="replace") as fh:
+                fh.seek(pos)
+                for line in fh:
+                    print(f"[{prefix}] {line}", end="", flush=True)
+                pos = fh.tell()
+        except OSError:
+            pass
+        if finished:
+            return
+        time.sleep(0.2)
+
+
+class KernelPool:
+    """A set of kernel endpoints; run() blocks until one of them is free."""
+
+    def __init__(self, endpoints: List[Endpoint], procs: Optional[List[subprocess.Popen]] = None) -> None:
+        self.endpoints = list(endpoints)
+        self.procs = list(procs or [])
+        self._free: "queue.Queue[Endpoint]" = queue.Queue()
+        for ep in self.endpoints:
+            self._free.put(ep)
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    @classmethod
+    def start(
+        cls,
+        n: int,
+        log_dir: Path,
+        preload: Iterable[str] = (),
+        command: Callable[[int, Iterable[str]], List[str]] = wolfram_kernel_command,
+        timeout: float = STARTUP_TIMEOUT,
+    ) -> "KernelPool":
+        """Launch n kernels with `command(port, preload)` and wait until all answer a ping."""
+        preload = list(preload)
+        log_dir = Path(log_dir)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        endpoints: List[Endpoint] = []
+        procs: List[subprocess.Popen] = []
+        for k in range(1, max(1, int(n)) + 1):
+            port = _free_port()
+            with (log_dir / f"kernel{k}.log").open("w", encoding="utf-8") as log:
+                procs.append(
+                    subprocess.Popen(command(port, preload), stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+                )
+            endpoints.append((HOST, port))
+
+        pool = cls(endpoints, procs)
+        deadline = time.monotonic() + timeout
+        for ep, proc in zip(endpoints, procs):
+            while True:
+                try:
+                    if request(ep, {"op": "ping"}, timeout=5.0).get("ok"):
+                        break
+                except (OSError, ValueError):
+                    pass
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    pool.stop()
+                    raise RuntimeError(f"Kernel on port {ep[1]} did not start (see {log_dir})")
+                time.sleep(0.5)
+        return pool
+
+    def run(
+        self,
+        script: Path,
+        cwd: Path,
+        env: Optional[Dict[str, str]] = None,
+        log_path: Optional[Path] = None,
+        prefix: str = "mma",
+        verbose: bool = False,
+    ) -> int:
+        """Run a Wolfram script on the next free kernel (within the process budget); returns its exit code."""
+        log_path = Path(log_path) if log_path else Path(cwd) / f"{Path(script).stem}.log"
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "op": "run",
+            "script": str(Path(script).resolve()),
+            "cwd": str(Path(cwd).resolve()),
+            "env": dict(env or {}),
+            "log": str(log_path.resolve()),
+        }
+        # a pool job counts against the process budget like a wolframscript process
+        with process_slot():
+            return self._run_on_kernel(payload, log_path, prefix, verbose)
+
+    def _run_on_kernel(self, payload: Dict[str, Any], log_path: Path, prefix: str, verbose: bool) -> int:
+        ep = self._free.get()
+        done = threading.Event()
+        tail = (
+            threading.Thread(target=contextvars.copy_context().run, args=(_tail, log_path, prefix, done), daemon=True)
+            if verbose
+            else None
+        )
+        try:
+            if tail is not None:
+                tail.start()
+            reply = request(ep, payload)
+            return int(reply.get("rc", 1)) if reply.get("ok") else 1
+        except (OSError, ValueError) as exc:
+            print(f"[kernels] Kernel {ep[0]}:{ep[1]} failed: {exc}")
+            return 1
+        finally:
+            done.set()
+            if tail is not None:
+                tail.join(timeout=5.0)
+            self._free.put(ep)
+
+    def status(self) -> List[Dict[str, Any]]:
+        out = []
+        for ep in self.endpoints:
+            try:
+                reply = request(ep, {"op": "ping"}, timeout=5.0)
+            except (OSError, ValueError) as exc:
+                reply = {"ok": False, "error": str(exc)}
+            out.append({"port": ep[1], **reply})
+        return out
+
+    def stop(self) -> None:
+        for ep in self.endpoints:
+            try:
+                request(ep, {"op": "quit"}, timeout=5.0)
+            except (OSError, ValueError):
+                pass
+        for proc in self.procs:
+            try:
+                proc.wait(timeout=10.0)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+_ACTIVE: Optional[KernelPool] = None
+
+
+def active_pool() -> Optional[KernelPool]:
+    return _ACTIVE
+
+
+def set_active_pool(pool: Optional[KernelPool]) -> None:
+    global _ACTIVE
+    _ACTIVE = pool
+
+
+def run_wolfram(
+    script: Path,
+    cwd: Path,
+    env: Optional[Dict[str, str]] = None,
+    log_path: Optional[Path] = None,
+    prefix: str = "mma",
+    verbose: bool = False,
+) -> int:
+    """
+    Run a Wolfram script on the active kernel pool, or with `wolframscript -file`
+    when no pool is running. `env` may be a full environment; only the variables
+    that differ from os.environ are sent to a pool kernel.
+    """
+    pool = active_pool()
+    if pool is None:
+        return run_streaming(
+            cmd=["wolframscript", "-file", str(script)],
+            cwd=cwd,
+            env=env,
+            log_path=log_path,
+            prefix=prefix,
+            verbose=verbose,
+        )
+    overrides = {k: v for k, v in (env or {}).items() if os.environ.get(k) != v}
+    return pool.run(script, cwd, overrides, log_path, prefix, verbose)
+
+
+def run_wolfram_jobs(
+    jobs: Iterable[Tuple[str, Path, Path, Optional[Dict[str, str]]]],
+    max_workers: int,
+    run_dir: Path,
+    log_subdir: str,
+    verbose: bool = False,
+) -> bool:
+    """
+    Run (tag, script, cwd, env) jobs concurrently: on the kernel pool when one is
+    active (at most one job per kernel), otherwise as wolframscript processes.
+    """
+    from glaslib.core.logging import ensure_logs_dir
+    from glaslib.core.parallel import run_commands
+
+    job_list = list(jobs)
+    pool = active_pool()
+    if pool is None:
+        cmds = [(tag, ["wolframscript", "-file", str(script)], cwd, env) for tag, script, cwd, env in job_list]
+        return run_commands(cmds, max_workers, run_dir, log_subdir, verbose=verbose, prefix="mma")
+
+    logs = ensure_logs_dir(run_dir, log_subdir)
+
+    def _one(tag: str, script: Path, cwd: Path, env: Optional[Dict[str, str]]) -> bool:
+        if not verbose:
+            print(f"[start {tag}] {Path(script).name} (kernel pool)")
+        rc = run_wolfram(script, cwd, env, logs / f"{tag}.log", f"mma {tag}", verbose)
+        if rc != 0:
+            print(f"[fail {tag}] code={rc}")
+            print(f"  log: {logs / f'{tag}.log'}")
+            return False
+        if not verbose:
+            print(f"[done {tag}]")
+        return True
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pool)))) as ex:
+        futs = [ex.submit(contextvars.copy_context().run, _one, *job) for job in job_list]
+        results = [f.result() for f in futs]
+    return all(results)
+
+
+class FakeKernel(socketserver.ThreadingTCPServer):
+    """
+    Stand-in kernel for testing the pool without Mathematica: answers the same
+    protocol, writes "[fake kernel] <script>" plus the env overrides to the log and
+    returns `handler(request)` (default 0) as the exit code.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        preload: Iterable[str] = (),
+        handler: Optional[Callable[[Dict[str, Any]], int]] = None,
+    ) -> None:
+        self.warm = list(preload)
+        self.handler = handler or (lambda req: 0)
+        self.runs: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        super().__init__((HOST, port), _FakeKernelHandler)
+
+    @property
+    def endpoint(self) -> Endpoint:
+        return (HOST, int(self.server_address[1]))
+
+    def serve_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def reply(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        op = req.get("op")
+        if op == "ping":
+            return {"ok": True, "pid": os.getpid(), "warm": self.warm}
+        if op == "run":
+            with self._lock:  # one script at a time, like a real kernel
+                self.runs.append(req)
+                with open(req["log"], "w", encoding="utf-8") as log:
+                    log.write(f"[fake kernel] {req['script']}\n")
+                    for k, v in sorted((req.get("env") or {}).items()):
+                        log.write(f"[fake kernel] {k}={v}\n")
+                return {"ok": True, "rc": int(self.handler(req))}
+        if op == "quit":
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+
+class _FakeKernelHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        try:
+            reply = self.server.reply(json.loads(line.decode("utf-8")))  # type: ignore[attr-defined]
+        except ValueError as exc:
+            reply = {"ok": False, "error": str(exc)}
+        self.wfile.write((json.dumps(reply) + "\n").encode("utf-8"))
+
+
+def _main(argv: List[str]) -> int:
+    if len(argv) >= 2 and argv[0] == "--fake":
+        preload = [p for p in (argv[2] if len(argv) > 2 else "").split(",") if p]
+        server = FakeKernel(int(argv[1]), preload)
+        print(f"[fake kernel] listening on {server.endpoint[1]}", flush=True)
+        server.serve_forever()
+        return 0
+    print("Usage: python -m glaslib.core.kernelpool --fake PORT [PRELOAD,...]")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -9,6 +9,8 @@ All logs are written to runs/{tag}_{nnnn}/logs/ with subdirectories:
 - logs/uvct/       - UV counterterm logs
 - logs/ioperator/  - I-operator logs
 - logs/reduce/     - Reduction logs
+- logs/color/      - Color basis logs
+- logs/batch/      - Per-stage output of generate --batch
 """
 
 from __future__ import annotations
@@ -159,3 +161,6 @@ LOG_SUBDIR_DIRAC = "dirac"
 LOG_SUBDIR_TOPOFORMAT = "topoformat"
 LOG_SUBDIR_RATCOMBINE = "ratcombine"
 LOG_SUBDIR_KTEXPAND = "ktexpand"
+LOG_SUBDIR_COLOR = "color"
+LOG_SUBDIR_KERNELS = "kernels"
+LOG_SUBDIR_BATCH = "batch"
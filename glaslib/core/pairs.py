@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+# How the one-loop interference M0* x M1 is organised on disk (meta["contract_mode"]).
+#   "summed": the conjugate Born sum_i dC<i> is contracted with every loop
+#             diagram j, giving n1l expressions d0x<j> (tree index 0).
+#   "pairs":  every tree diagram i is contracted separately, giving the
+#             n0l x n1l expressions d<i>x<j> (runs made before "summed" existed).
+CONTRACT_SUMMED = "summed"
+CONTRACT_PAIRS = "pairs"
+CONTRACT_MODES = (CONTRACT_SUMMED, CONTRACT_PAIRS)
+
+# Tree index used for the summed Born in file and expression names.
+SUMMED_BORN_INDEX = 0
+
+
+def contract_mode(meta: Dict[str, Any]) -> str:
+    mode = str(meta.get("contract_mode") or CONTRACT_PAIRS)
+    return mode if mode in CONTRACT_MODES else CONTRACT_PAIRS
+
+
+def born_indices(meta: Dict[str, Any]) -> List[int]:
+    """Tree indices i of the d<i>x<j> interference files of this run."""
+    if contract_mode(meta) == CONTRACT_SUMMED:
+        return [SUMMED_BORN_INDEX]
+    return list(range(1, int(meta.get("n0l") or 0) + 1))
+
+
+# Sparsity manifest: pairs whose M0M1 expression is identically zero (color
+# orthogonality, non-interfering diagrams), recorded after 'contract nlo' as
+# meta["m0m1_zero"] = [[i, j], ...]. Every later stage skips them.
+_ZERO_BODY_RE = re.compile(r"=\s*\(\s*0\s*\)\s*;\s*$")
+_ZERO_MAX_BYTES = 256
+
+
+def zero_pairs(meta: Dict[str, Any]) -> Set[Tuple[int, int]]:
+    return {(int(i), int(j)) for i, j in meta.get("m0m1_zero") or []}
+
+
+def m0m1_pairs(meta: Dict[str, Any], *, skip_zero: bool = True) -> List[Tuple[int, int]]:
+    """
+    All (i, j) of the M0M1 files (and of M0M1top, M0M1Reduced, MasterCoefficients).
+    Pairs of the sparsity manifest are left out unless skip_zero=False.
+    """
+    n1l = int(meta.get("n1l") or 0)
+    pairs = [(i, j) for i in born_indices(meta) for j in range(1, n1l + 1)]
+    if skip_zero:
+        zero = zero_pairs(meta)
+        pairs = [p for p in pairs if p not in zero]
+    return pairs
+
+
+def is_zero_file(path: Path) -> bool:
+    """True for a FORM output 'l d<i>x<j> = (0);' (only short files are read)."""
+    path = Path(path)
+    try:
+        if path.stat().st_size > _ZERO_MAX_BYTES:
+            return False
+        return bool(_ZERO_BODY_RE.search(path.read_text(encoding="utf-8")))
+    except OSError:
+        return False
+
+
+def scan_zero_pairs(folder: Path, pairs: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Pairs whose d<i>x<j>.h in `folder` is identically zero."""
+    return [(i, j) for i, j in pairs if is_zero_file(Path(folder) / f"d{i}x{j}.h")]
+
+
+# Tree x tree contractions (M0M0). Since d<j>x<i> = conj(d<i>x<j>), contractLO only
+# computes i <= j and stores d<i>x<j> + d<j>x<i> = 2*Re(d<i>x<j>) for i < j;
+# meta["m0m0_triangle"] marks runs written this way (older runs hold the full square).
+def m0m0_triangle(meta: Dict[str, Any]) -> bool:
+    return bool(meta.get("m0m0_triangle", False))
+
+
+def m0m0_pairs(meta: Dict[str, Any]) -> List[Tuple[int, int]]:
+    """All (i, j) of the M0M0 files of this run; summing them gives |M0|^2."""
+    n0l = int(meta.get("n0l") or 0)
+    if m0m0_triangle(meta):
+        return [(i, j) for i in range(1, n0l + 1) for j in range(i, n0l + 1)]
+    return [(i, j) for i in range(1, n0l + 1) for j in range(1, n0l + 1)]
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import contextvars
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Iterable, Optional, Tuple
+import heapq
+from typing import Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple, TypeVar
 
 from glaslib.core.logging import ensure_logs_dir, LOG_SUBDIR_FORM
 from glaslib.core.proc import run_streaming
 
+T = TypeVar("T", bound=Hashable)
+
 
 def chunk_range_1based(total: int, jobs: int, job_index: int) -> Tuple[int, int]:
     if total <= 0:
@@ -28,6 +32,191 @@ def effective_jobs(total: int, requested: int) -> int:
     return max(1, min(max(1, requested), total))
 
 
+# Number of batches handed to each worker on average when no explicit batch
+# size is given. Small batches let fast workers pick up the slack of slow ones.
+BATCHES_PER_WORKER = 4
+
+
+def default_batch_size(total: int, jobs: int) -> int:
+    if total <= 0:
+        return 1
+    jobs = max(1, jobs)
+    return max(1, -(-total // (jobs * BATCHES_PER_WORKER)))
+
+
+def plan_batches(total: int, jobs: int, batch_size: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Split indices 1..total into small contiguous batches (1-based, inclusive).
+
+    Unlike chunk_range_1based, the number of batches is not tied to the number
+    of workers: run_jobs hands batches to the worker pool as workers free up.
+    """
+    if total <= 0:
+        return []
+    size = batch_size if batch_size and batch_size > 0 else default_batch_size(total, jobs)
+    nbatches = -(-total // size)
+    return [chunk_range_1based(total, nbatches, k) for k in range(1, nbatches + 1)]
+
+
+def plan_pair_batches(
+    n_outer: int,
+    n_inner: int,
+    jobs: int,
+    batch_size: Optional[int] = None,
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Split the (i, j) grid 1..n_outer x 1..n_inner into rectangular batches.
+
+    Returns (i0, i1, j0, j1) tuples. batch_size counts pairs: when it covers at
+    least one full row, several outer indices are grouped with the full inner
+    range; otherwise each outer index is split along the inner range.
+    """
+    if n_outer <= 0 or n_inner <= 0:
+        return []
+    total = n_outer * n_inner
+    size = batch_size if batch_size and batch_size > 0 else default_batch_size(total, jobs)
+    if size >= n_inner:
+        rows = size // n_inner
+        return [(i0, i1, 1, n_inner) for i0, i1 in plan_batches(n_outer, jobs, rows)]
+    out: List[Tuple[int, int, int, int]] = []
+    for i in range(1, n_outer + 1):
+        for j0, j1 in plan_batches(n_inner, jobs, size):
+            out.append((i, i, j0, j1))
+    return out
+
+
+def lpt_partition(items: Sequence[T], bins: int, weights: Mapping[T, float]) -> List[List[T]]:
+    """
+    Longest-processing-time-first bin packing of items into at most `bins` bins.
+
+    Items are taken heaviest first and each goes to the currently lightest bin.
+    Every bin keeps its items in their original order; empty bins are dropped.
+    """
+    if not items:
+        return []
+    bins = max(1, min(bins, len(items)))
+    order = {item: pos for pos, item in enumerate(items)}
+    heap = [(0.0, b) for b in range(bins)]
+    contents: List[List[T]] = [[] for _ in range(bins)]
+    for item in sorted(items, key=lambda it: (-float(weights.get(it, 0.0)), order[it])):
+        load, b = heapq.heappop(heap)
+        contents[b].append(item)
+        heapq.heappush(heap, (load + float(weights.get(item, 0.0)), b))
+    out = [sorted(c, key=order.__getitem__) for c in contents if c]
+    out.sort(key=lambda c: -sum(float(weights.get(it, 0.0)) for it in c))
+    return out
+
+
+def partition_items(
+    items: Sequence[T],
+    jobs: int,
+    *,
+    weights: Optional[Mapping[T, float]] = None,
+    batch_size: Optional[int] = None,
+    static: bool = False,
+) -> List[List[T]]:
+    """
+    Group work items (diagram indices or (i, j) pairs) into driver batches.
+
+    static=True packs the items into exactly `jobs` drivers with LPT bin packing
+    (uniform weights if none are given). Otherwise items are cut into small
+    contiguous batches for the run_jobs queue: batch_size items each, or, with
+    weights and no batch_size, batches of roughly equal weight. Weighted batches
+    are returned heaviest first so the expensive ones start early.
+    """
+    items = list(items)
+    if not items:
+        return []
+    if static:
+        return lpt_partition(items, jobs, weights or {it: 1.0 for it in items})
+    if weights is None or batch_size:
+        return [items[i0 - 1:i1] for i0, i1 in plan_batches(len(items), jobs, batch_size)]
+
+    total = sum(float(weights.get(it, 0.0)) for it in items)
+    if total <= 0:
+        return partition_items(items, jobs, batch_size=batch_size)
+    target = total / (max(1, jobs) * BATCHES_PER_WORKER)
+    out: List[List[T]] = []
+    current: List[T] = []
+    acc = 0.0
+    for it in items:
+        current.append(it)
+        acc += float(weights.get(it, 0.0))
+        if acc >= target:
+            out.append(current)
+            current, acc = [], 0.0
+    if current:
+        out.append(current)
+    out.sort(key=lambda c: -sum(float(weights.get(it, 0.0)) for it in c))
+    return out
+
+
+def batch_tag(prefix: str, k: int, n: int, static: bool = False) -> str:
+    """Driver/log tag: <prefix>_J<k>of<n> for static drivers, <prefix>_B<k>of<n> for queued batches."""
+    return f"{prefix}_{'J' if static else 'B'}{k}of{n}"
+
+
+def form_do_range(indices: Iterable[int]) -> str:
+    """Right-hand side of a FORM #do loop: 'a,b' for a contiguous range, '{a,b,...}' otherwise."""
+    idx = sorted(set(indices))
+    if not idx:
+        return "1,0"
+    if idx == list(range(idx[0], idx[-1] + 1)):
+        return f"{idx[0]},{idx[-1]}"
+    return "{" + ",".join(str(i) for i in idx) + "}"
+
+
+def form_pair_loops(pairs: Iterable[Tuple[int, int]], var: str = "jlist") -> Tuple[str, str, str]:
+    """
+    Loop ranges for a nested '#do i' / '#do j' over an arbitrary set of (i, j) pairs.
+
+    Returns (defines, i_range, j_range). When every i shares the same j set the
+    defines are empty; otherwise one '#define <var><i>' per i holds its j range
+    and j_range reads it back as `<var>`i''.
+    """
+    rows: Dict[int, List[int]] = {}
+    for i, j in pairs:
+        rows.setdefault(i, []).append(j)
+    i_range = form_do_range(rows)
+    j_ranges = {i: form_do_range(js) for i, js in rows.items()}
+    if len(set(j_ranges.values())) <= 1:
+        return "", i_range, next(iter(j_ranges.values()), "1,0")
+    defines = "\n".join(f'#define {var}{i} "{r}"' for i, r in sorted(j_ranges.items()))
+    return defines, i_range, f"`{var}`i''"
+
+
+def _run_command(
+    cmd: List[str],
+    cwd: Path,
+    tag: str,
+    label: str,
+    verbose: bool = False,
+    log_path: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+    prefix: str = "cmd",
+) -> bool:
+    if not verbose:
+        print(f"[start {tag}] {label}")
+
+    rc = run_streaming(
+        cmd=cmd,
+        cwd=cwd,
+        env=env,
+        log_path=log_path,
+        prefix=f"{prefix} {tag}",
+        verbose=verbose,
+    )
+
+    if rc != 0:
+        print(f"[fail {tag}] code={rc}")
+        print(f"  log: {log_path}")
+        return False
+
+    if not verbose:
+        print(f"[done {tag}]")
+    return True
+
+
 def _run_once(
     form_exe: str,
     form_dir: Path,
@@ -48,25 +237,56 @@ def _run_once(
         # Fallback to form_dir for backwards compatibility
         log_path = form_dir / f"form_{tag}.log"
 
-    if not verbose:
-        print(f"[start {tag}] {driver.name}")
+    return _run_command([form_exe, driver.name], form_dir, tag, driver.name, verbose, log_path, prefix="form")
 
-    rc = run_streaming(
-        cmd=[form_exe, driver.name],
-        cwd=form_dir,
-        log_path=log_path,
-        prefix=f"form {tag}",
-        verbose=verbose,
-    )
 
-    if rc != 0:
-        print(f"[fail {tag}] code={rc}")
-        print(f"  log: {log_path}")
-        return False
+def _run_pool(calls: List[Tuple], fn, max_workers: int, verbose: bool, run_dir: Optional[Path], log_subdir: str) -> bool:
+    ok_all = True
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        # workers run in a copy of the caller's context (e.g. the output of a batch run)
+        futs = [ex.submit(contextvars.copy_context().run, fn, *args) for args in calls]
+        for fut in as_completed(futs):
+            ok_all = ok_all and bool(fut.result())
 
-    if not verbose:
-        print(f"[done {tag}]")
-    return True
+    # Print logs location summary
+    if run_dir is not None and not verbose:
+        logs_loc = run_dir / "logs" / log_subdir
+        if ok_all:
+            print(f"  Logs: {logs_loc}/")
+
+    return ok_all
+
+
+def run_commands(
+    jobs: Iterable[Tuple[str, List[str], Path, Optional[Dict[str, str]]]],
+    max_workers: int,
+    run_dir: Path,
+    log_subdir: str,
+    verbose: bool = False,
+    prefix: str = "cmd",
+) -> bool:
+    """
+    Run arbitrary commands (e.g. wolframscript) on the same worker pool as run_jobs.
+
+    Args:
+        jobs: Iterable of (tag, cmd, cwd, env overrides) tuples
+        max_workers: Maximum parallel workers
+        run_dir: Run directory; logs go to run_dir/logs/<log_subdir>/<tag>.log
+        prefix: Prefix for verbose output lines
+
+    Returns:
+        True if all jobs succeeded, False otherwise
+    """
+    job_list = list(jobs)
+    if not job_list:
+        print("[run] No jobs to run.")
+        return True
+    logs_path = ensure_logs_dir(run_dir, log_subdir)
+    calls = [
+        (cmd, Path(cwd), tag, Path(cmd[-1]).name, verbose, logs_path / f"{tag}.log", env, prefix)
+        for tag, cmd, cwd, env in job_list
+    ]
+    return _run_pool(calls, _run_command, max_workers, verbose, run_dir, log_subdir)
 
 
 def run_jobs(
@@ -80,6 +300,10 @@ def run_jobs(
     """
     Run FORM jobs in parallel with optional verbose streaming.
 
+    Jobs are queued in order and picked up by at most max_workers FORM
+    processes as they free up, so callers may pass many more jobs (batches)
+    than workers.
+
     Args:
         form_exe: Path to FORM executable
         jobs: Iterable of (tag, form_dir, driver_path) tuples
@@ -95,18 +319,5 @@ def run_jobs(
     if not job_list:
         print("[run] No jobs to run.")
         return True
-    ok_all = True
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futs = []
-        for tag, form_dir, drv in job_list:
-            futs.append(ex.submit(_run_once, form_exe, form_dir, drv, tag, verbose, run_dir, log_subdir))
-        for fut in as_completed(futs):
-            ok_all = ok_all and bool(fut.result())
-    
-    # Print logs location summary
-    if run_dir is not None and not verbose:
-        logs_loc = run_dir / "logs" / log_subdir
-        if ok_all:
-            print(f"  Logs: {logs_loc}/")
-    
-    return ok_all
+    calls = [(form_exe, form_dir, drv, tag, verbose, run_dir, log_subdir) for tag, form_dir, drv in job_list]
+    return _run_pool(calls, _run_once, max_workers, verbose, run_dir, log_subdir)
@@ -7,13 +7,36 @@ and IBP tools with optional verbose streaming to terminal.
 
 from __future__ import annotations
 
+import contextvars
 import os
 import shlex
 import sys
 import threading
+from contextlib import contextmanager
 from pathlib import Path
 from subprocess import DEVNULL, PIPE, Popen
-from typing import Dict, List, Optional, TextIO
+from typing import Dict, Iterator, List, Optional, TextIO
+
+# Optional cap on external processes running at once across all threads; set by
+# `generate --batch`, which runs the stages of several runs side by side.
+_BUDGET: Optional[threading.BoundedSemaphore] = None
+
+
+def set_process_budget(n: Optional[int]) -> None:
+    """Allow at most n concurrent run_streaming processes (None: no limit)."""
+    global _BUDGET
+    _BUDGET = threading.BoundedSemaphore(n) if n else None
+
+
+@contextmanager
+def process_slot() -> Iterator[None]:
+    """Hold one slot of the process budget (no-op without a budget)."""
+    budget = _BUDGET
+    if budget is None:
+        yield
+        return
+    with budget:
+        yield
 
 
 def _stream_reader(
@@ -60,9 +83,21 @@ def run_streaming(
 
     Returns:
         Exit code of the process
+
+    With a process budget (set_process_budget) the call first waits for a free slot.
     """
-    import subprocess
-    
+    with process_slot():
+        return _run_streaming(cmd, cwd, env, log_path, prefix, verbose)
+
+
+def _run_streaming(
+    cmd: List[str],
+    cwd: Path,
+    env: Optional[Dict[str, str]],
+    log_path: Optional[Path],
+    prefix: str,
+    verbose: bool,
+) -> int:
     # Build environment: inherit os.environ, overlay with env overrides
     full_env = os.environ.copy()
     # Set PYTHONUNBUFFERED by default for Python subprocesses
@@ -81,6 +116,11 @@ def run_streaming(
         cmd_str = " ".join(shlex.quote(c) for c in cmd)
         log_str = shlex.quote(str(log_path)) if log_path else "/dev/null"
         
+        # os.system inherits os.environ only: pass the overrides through env(1)
+        overrides = {k: v for k, v in (env or {}).items() if os.environ.get(k) != v}
+        if overrides:
+            cmd_str = "env " + " ".join(f"{k}={shlex.quote(v)}" for k, v in overrides.items()) + " " + cmd_str
+
         # Use shell to run command with stdin closed and output redirected
         # This completely bypasses Python's file descriptor handling
         shell_cmd = f"cd {shlex.quote(str(cwd))} && {cmd_str} </dev/null >{log_str} 2>&1"
@@ -114,13 +154,13 @@ def run_streaming(
 
         # Start threads to read stdout and stderr concurrently
         stdout_thread = threading.Thread(
-            target=_stream_reader,
-            args=(proc.stdout, log_file, prefix, verbose, print_lock),
+            target=contextvars.copy_context().run,
+            args=(_stream_reader, proc.stdout, log_file, prefix, verbose, print_lock),
             daemon=True,
         )
         stderr_thread = threading.Thread(
-            target=_stream_reader,
-            args=(proc.stderr, log_file, f"{prefix}:err", verbose, print_lock),
+            target=contextvars.copy_context().run,
+            args=(_stream_reader, proc.stderr, log_file, f"{prefix}:err", verbose, print_lock),
             daemon=True,
         )
 
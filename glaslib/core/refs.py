@@ -132,3 +132,11 @@ def _ask_gluon_refs_if_needed(process_str: str) -> Dict[str, str]:
             break
 
     return gluon_refs
+
+
+def default_gluon_refs(process_str: str) -> Dict[str, str]:
+    """The defaults _ask_gluon_refs_if_needed offers, without prompting (for batch runs)."""
+    gluon_moms, default_ref, _, _ = _collect_gluons_and_default_ref(process_str)
+    if len(gluon_moms) <= 1:
+        return {}
+    return {gm: default_ref for gm in gluon_moms}
@@ -7,6 +7,10 @@ import subprocess
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
+from glaslib.core.costs import reset_timings, stage_weights, timing_write_line
+from glaslib.core.parallel import batch_tag, form_do_range, partition_items
+from glaslib.generate_diagrams import split_diagram_file
+
 
 def _resolve_procedures_dir(project_root: Path) -> Path:
     from glaslib.core.paths import procedures_dir
@@ -48,23 +52,6 @@ def _read_int(p: Path) -> int:
     return int(s)
 
 
-def _chunk_range_1based(total: int, jobs: int, job_index: int) -> Tuple[int, int]:
-    if total <= 0:
-        return 1, 0
-    base = total // jobs
-    rem = total % jobs
-    if job_index <= rem:
-        size = base + 1
-        start = (job_index - 1) * size + 1
-    else:
-        size = base
-        start = rem * (base + 1) + (job_index - rem - 1) * base + 1
-    end = start + size - 1
-    if size <= 0:
-        return 1, 0
-    return start, end
-
-
 def _probe_single_diagram_gs_power(
     output_dir: Path,
     *,
@@ -167,6 +154,8 @@ def prepare_mass_ct_project(
     *,
     form_exe: str = "form",
     jobs: int = 1,
+    batch_size: Optional[int] = None,
+    static: bool = False,
 ) -> Dict[str, Any]:
     """
     Stage A: generate RAW mass counterterm amplitudes into:
@@ -176,7 +165,8 @@ def prepare_mass_ct_project(
     Stage B: DiracSimplify mct (handled by dirac.py) writes simplified CTs to:
         form/Files/Amps/mct/d<i>.h
 
-    Returns chunked drivers for Stage A so glas.py can run them in parallel.
+    Returns cost-weighted batched drivers for Stage A so glas.py can run them in
+    parallel (exactly `jobs` drivers with static=True).
     """
     output_dir = Path(output_dir).resolve()
     meta_path = output_dir / "meta.json"
@@ -199,6 +189,14 @@ def prepare_mass_ct_project(
             f"Run: glas> formprep   (it copies diagrams into form/Files/)"
         )
 
+    # Runs prepared before the per-diagram split only have the full QGRAF file.
+    tree_diagrams = files_dir / "Diagrams" / "0l"
+    if not (tree_diagrams / "d1.h").exists():
+        # form/Files/<tag>0l is a copy of the QGRAF output indexed at generate time
+        m0_path = output_dir / "diagrams" / "0l" / "meta.json"
+        m0 = json.loads(m0_path.read_text(encoding="utf-8")) if m0_path.exists() else {}
+        split_diagram_file(tree_file, tree_diagrams, index=m0.get("diagram_index"))
+
     N, i_found = detect_gs_power_from_oneloop(output_dir, form_exe=form_exe)
 
     project_root = output_dir.parent
@@ -216,12 +214,14 @@ def prepare_mass_ct_project(
 
     drivers: Dict[int, Path] = {}
 
-    for k in range(1, jobs_effective + 1):
-        i0, i1 = _chunk_range_1based(n0l, jobs_effective, k)
-        if i0 > i1:
-            continue
-
-        frm_path = form_dir / f"mass_ct_J{k}of{jobs_effective}.frm"
+    items = list(range(1, n0l + 1))
+    stage = "evaluate_mct"
+    weights = stage_weights(form_dir, stage, items, lambda i: [tree_diagrams / f"d{i}.h"])
+    reset_timings(form_dir, stage)
+    batches = partition_items(items, jobs_effective, weights=weights, batch_size=batch_size, static=static)
+    for k, indices in enumerate(batches, start=1):
+        tag = batch_tag("mass_ct", k, len(batches), static)
+        frm_path = form_dir / f"{tag}.frm"
         frm_path.write_text(
             f"""#- 
 #:IncDir procedures
@@ -232,16 +232,16 @@ Off Statistics;
 #include declarations.h
 .sort
 
-#do i = {i0}, {i1}
+#do i = {form_do_range(indices)}
 
-#include Files/{tree_main}
+#include Files/Diagrams/0l/d`i'.h
 #call MassCT(mt, {N})
 `mand'
 
 .sort
 L amp = d`i';
 .sort
-Drop d1,...,d{n0l};
+Drop d`i';
 
 *  output for later DiracSimplify stage:
 #write <Files/Amps/mct/d`i'.h> "l d`i' = (%E);\\n" amp
@@ -249,6 +249,7 @@ Drop d1,...,d{n0l};
 Drop;
 
 #message mct_raw `i'
+{timing_write_line(stage, tag, pair=False)}
 #enddo
 
 .end
@@ -265,13 +266,16 @@ Drop;
         "form_dir": form_dir,
         "jobs_requested": jobs_requested,
         "jobs_effective": jobs_effective,
+        "static": static,
         "drivers": drivers,
         "N": N,
         "raw_dir": mct_dir,
     }
 
 
-def prepare_mass_ct(ctx, form_exe: str, jobs: int) -> Dict[str, Any]:
+def prepare_mass_ct(
+    ctx, form_exe: str, jobs: int, batch_size: Optional[int] = None, static: bool = False
+) -> Dict[str, Any]:
     if not ctx.run_dir:
         raise RuntimeError("No run attached.")
-    return prepare_mass_ct_project(ctx.run_dir, form_exe=form_exe, jobs=jobs)
+    return prepare_mass_ct_project(ctx.run_dir, form_exe=form_exe, jobs=jobs, batch_size=batch_size, static=static)
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from glaslib.extend import format_linear, parse_linear
+
+# Classes of identical QGRAF diagrams (mystyle.sty output).
+#
+# A diagram block is
+#     Local d<n> =
+#     <sign>(<symmetry factor>)* <in/out fields>* <propagators>* <vertices>;
+# with commuting functions only (declarations.h), so the product is a set of
+# factors. Two diagrams are identical when their factor sets agree up to a
+# relabelling of the internal field indices (those carried by propagators) and
+# the sign of the loop momentum; they may still differ in sign and symmetry
+# factor. Each class is evaluated once: its representative (first member) is
+# written with the summed prefactor, so contract and reduce carry the
+# multiplicity without knowing about it.
+
+_BODY_RE = re.compile(r"=(.*?);", re.S)
+_PREFACTOR_RE = re.compile(r"^([+-])\(([^()]*)\)$")
+_PREFACTOR_SUB_RE = re.compile(r"(=\s*)([+-])\(([^()]*)\)(\s*\*)")
+_LOCAL_RE = re.compile(r"Local[ \t]+d\d+")
+_MOMENTUM_NAME_RE = re.compile(r"\b(?:lm|p)\d+\b")
+_INT_RE = re.compile(r"-?\d+")
+
+# A parsed factor: an atom, or (name, args) for a function call.
+Node = Union[str, Tuple[str, List[Any]]]
+
+
+@dataclass
+class DiagramClass:
+    # (QGRAF diagram number, sign * symmetry factor); the first one is the representative
+    members: List[Tuple[int, Fraction]] = field(default_factory=list)
+
+    @property
+    def representative(self) -> int:
+        return self.members[0][0]
+
+    @property
+    def prefactor(self) -> Fraction:
+        """Sum of the members' prefactors, written for the representative."""
+        return sum((c for _, c in self.members), Fraction(0))
+
+
+def _split_top_level(s: str, sep: str) -> List[str]:
+    out: List[str] = []
+    depth = 0
+    cur = ""
+    for ch in s:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == sep and depth == 0:
+            out.append(cur.strip())
+            cur = ""
+        else:
+            cur += ch
+    out.append(cur.strip())
+    return out
+
+
+def _parse_node(s: str) -> Node:
+    s = s.strip()
+    k = s.find("(")
+    if k > 0 and s.endswith(")") and re.fullmatch(r"[A-Za-z][A-Za-z0-9_]*", s[:k]):
+        return s[:k], [_parse_node(a) for a in _split_top_level(s[k + 1 : -1], ",")]
+    return "".join(s.split())
+
+
+def parse_diagram(block: str) -> Optional[Tuple[Fraction, List[Node]]]:
+    """(sign * symmetry factor, factors) of a 'Local d<n> = ...;' block, None if not understood."""
+    m = _BODY_RE.search(block)
+    if not m:
+        return None
+    factors = [f for f in _split_top_level(m.group(1), "*") if f]
+    if not factors:
+        return None
+    pm = _PREFACTOR_RE.match("".join(factors[0].split()))
+    if not pm:
+        return None
+    try:
+        coeff = Fraction(pm.group(2))
+    except (ValueError, ZeroDivisionError):
+        return None
+    if pm.group(1) == "-":
+        coeff = -coeff
+    return coeff, [_parse_node(f) for f in factors[1:]]
+
+
+def _internal_indices(factors: Sequence[Node]) -> Set[str]:
+    """Field indices carried by propagators, name(i1, i2, momentum, mass)."""
+    out: Set[str] = set()
+    for f in factors:
+        if isinstance(f, tuple) and f[0] != "vx" and len(f[1]) == 4:
+            out.update(a for a in f[1][:2] if isinstance(a, str) and _INT_RE.fullmatch(a))
+    return out
+
+
+class _Renderer:
+    def __init__(self, internal: Set[str], names: Sequence[str], flip: bool) -> None:
+        self.internal = internal
+        self.names = list(names)
+        self.flip = flip
+        self.labels: Dict[str, int] = {}
+
+    def momentum(self, s: str) -> str:
+        try:
+            vec = parse_linear(s, self.names)
+        except Exception:
+            return s
+        if self.flip:
+            vec = tuple(-c if n.startswith("lm") else c for c, n in zip(vec, self.names))
+        return "".join(format_linear(vec, self.names).split())
+
+    def field(self, call: Tuple[str, List[Any]], seen: List[str]) -> str:
+        name, args = call
+        if any(not isinstance(a, str) for a in args):
+            return f"{name}(?)"
+        out: List[str] = []
+        k = 0
+        while k < len(args) and _INT_RE.fullmatch(args[k]):
+            idx = args[k]
+            if idx in self.internal:
+                seen.append(idx)
+                label = self.labels.get(idx)
+                out.append(f"#{label}" if label is not None else "#?")
+            else:
+                out.append(idx)
+            k += 1
+        if k < len(args):
+            out.append(self.momentum(args[k]))
+            out.extend(args[k + 1 :])
+        return f"{name}({','.join(out)})"
+
+    def factor(self, node: Node) -> Tuple[str, List[str]]:
+        seen: List[str] = []
+        if isinstance(node, str):
+            return node, seen
+        name, args = node
+        if name == "vx":
+            # legs of a vertex are Bose-symmetric or in model order: compare them sorted
+            legs: List[Tuple[str, List[str]]] = []
+            for a in args:
+                leg_seen: List[str] = []
+                legs.append((self.field(a, leg_seen), leg_seen) if not isinstance(a, str) else (a, leg_seen))
+            legs.sort()
+            seen = [idx for _, ls in legs for idx in ls]
+            return f"vx({','.join(r for r, _ in legs)})", seen
+        return self.field(node, seen), seen
+
+    def canonical(self, factors: Sequence[Node]) -> str:
+        """Relabel the internal indices in order of appearance in the sorted product, to a fixed point."""
+        text = ""
+        for _ in range(len(self.internal) + 2):
+            rendered = sorted(self.factor(f) for f in factors)
+            labels: Dict[str, int] = {}
+            for _, seen in rendered:
+                for idx in seen:
+                    labels.setdefault(idx, len(labels) + 1)
+            new_text = "*".join(r for r, _ in rendered)
+            if labels == self.labels and new_text == text:
+                break
+            self.labels, text = labels, new_text
+        return text
+
+
+def diagram_key(factors: Sequence[Node]) -> str:
+    """Canonical form of the product of factors (without the prefactor)."""
+    names = sorted({n for f in factors for n in _MOMENTUM_NAME_RE.findall(repr(f))})
+    internal = _internal_indices(factors)
+    return min(_Renderer(internal, names, flip).canonical(factors) for flip in (False, True))
+
+
+def find_classes(path: Path, index: Dict[str, Any]) -> List[DiagramClass]:
+    """
+    Group the diagrams of a QGRAF output (index from generate_diagrams.index_diagrams)
+    into classes of identical diagrams, in the order of their first member. Blocks
+    that cannot be parsed form a class of their own.
+    """
+    classes: List[DiagramClass] = []
+    by_key: Dict[str, DiagramClass] = {}
+    with Path(path).open("rb") as fh:
+        for n, offset, length in index["diagrams"]:
+            fh.seek(offset)
+            parsed = parse_diagram(fh.read(length).decode("utf-8", errors="ignore"))
+            if parsed is None:
+                classes.append(DiagramClass([(n, Fraction(1))]))
+                continue
+            coeff, factors = parsed
+            key = diagram_key(factors)
+            cls = by_key.get(key)
+            if cls is None:
+                cls = by_key[key] = DiagramClass()
+                classes.append(cls)
+            cls.members.append((n, coeff))
+    return classes
+
+
+def classes_to_meta(classes: Sequence[DiagramClass]) -> List[List[List[Any]]]:
+    """JSON form: one list of [qgraf number, "prefactor"] per class."""
+    return [[[n, str(c)] for n, c in cls.members] for cls in classes]
+
+
+def classes_from_meta(data: Sequence[Sequence[Sequence[Any]]]) -> List[DiagramClass]:
+    return [DiagramClass([(int(n), Fraction(str(c))) for n, c in members]) for members in data]
+
+
+def write_class_diagrams(
+    path: Path, index: Dict[str, Any], classes: Sequence[DiagramClass], dst_dir: Path
+) -> int:
+    """
+    dst_dir/d<k>.h for class k (1-based): the block of its representative renamed to
+    d<k>, with the summed prefactor of the class. Returns the number of files written.
+    """
+    from glaslib.generate_diagrams import read_diagram
+
+    dst_dir = Path(dst_dir)
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    for old in dst_dir.glob("d*.h"):
+        old.unlink()
+
+    for k, cls in enumerate(classes, start=1):
+        block = read_diagram(path, index, cls.representative).decode("utf-8")
+        text = _LOCAL_RE.sub(f"Local d{k}", block, count=1)
+        if len(cls.members) > 1:
+            w = cls.prefactor
+            text = _PREFACTOR_SUB_RE.sub(
+                lambda m: f"{m.group(1)}{'-' if w < 0 else '+'}({abs(w)}){m.group(4)}", text, count=1
+            )
+        (dst_dir / f"d{k}.h").write_text(text, encoding="utf-8")
+    return len(classes)
@@ -4,7 +4,10 @@ import json
 import os
 import shutil
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+from glaslib.core.costs import reset_timings, stage_weights, timing_write_line
+from glaslib.core.parallel import batch_tag, form_do_range, partition_items
 
 
 def _resolve_procedures_dir(project_root: Path) -> Path:
@@ -22,23 +25,6 @@ def _ensure_symlink_or_copy(src: Path, dst: Path) -> None:
         shutil.copytree(src, dst)
 
 
-def _chunk_range_1based(total: int, jobs: int, job_index: int) -> Tuple[int, int]:
-    if total <= 0:
-        return 1, 0
-    base = total // jobs
-    rem = total % jobs
-    if job_index <= rem:
-        size = base + 1
-        start = (job_index - 1) * size + 1
-    else:
-        size = base
-        start = rem * (base + 1) + (job_index - rem - 1) * base + 1
-    end = start + size - 1
-    if size <= 0:
-        return 1, 0
-    return start, end
-
-
 def _count_diagrams(folder: Path) -> int:
     n = 0
     while (folder / f"d{n + 1}.h").exists():
@@ -90,11 +76,11 @@ def _write_dirac_driver(
     src_dir: str,
     dst_dir: str,
     total: int,
-    i0: int,
-    i1: int,
+    indices: List[int],
     orth_block: str,
     mand_define: str,
     write_conjugate: bool = False,
+    timing_line: str = "",
 ) -> None:
     if write_conjugate:
         conjugate_block = "#call Conjugate(amp, ampC)\n    .sort\n"
@@ -120,7 +106,7 @@ Off Statistics;
 PolyRatFun rat;
 .sort
 
-#do i = {i0},{i1}
+#do i = {form_do_range(indices)}
 #include Files/Amps/{src_dir}/d`i'.h
     .sort
 L amp = d`i';
@@ -135,6 +121,7 @@ Drop d1,...,d{total};
 {write_block}    .sort
 Drop;
 #message dirac_{dst_dir} `i'
+{timing_line}
 #enddo
 
 .end
@@ -142,15 +129,61 @@ Drop;
     dst.write_text(text, encoding="utf-8")
 
 
+def _write_dirac_batches(
+    *,
+    form_dir: Path,
+    incdir: Path,
+    target: str,
+    src_dir: str,
+    dst_dir: str,
+    total: int,
+    jobs_effective: int,
+    batch_size: Optional[int],
+    static: bool,
+    orth_block: str,
+    mand_define: str,
+    write_conjugate: bool = False,
+) -> Dict[int, Path]:
+    """Cost-weighted batches of one target; weights from previous timings or input sizes."""
+    items = list(range(1, total + 1))
+    stage = f"dirac_{target}"
+    src = form_dir / "Files" / "Amps" / src_dir
+    weights = stage_weights(form_dir, stage, items, lambda i: [src / f"d{i}.h"])
+    reset_timings(form_dir, stage)
+    batches = partition_items(items, jobs_effective, weights=weights, batch_size=batch_size, static=static)
+    drivers: Dict[int, Path] = {}
+    for k, indices in enumerate(batches, start=1):
+        tag = batch_tag(f"dirac_simplify_{target}", k, len(batches), static)
+        frm = form_dir / f"{tag}.frm"
+        _write_dirac_driver(
+            dst=frm,
+            incdir=incdir,
+            src_dir=src_dir,
+            dst_dir=dst_dir,
+            total=total,
+            indices=indices,
+            orth_block=orth_block,
+            mand_define=mand_define,
+            write_conjugate=write_conjugate,
+            timing_line=timing_write_line(stage, tag, pair=False),
+        )
+        drivers[k] = frm
+    return drivers
+
+
 def prepare_dirac_projects(
     output_dir: Path,
     *,
     mode: str = "2",
     jobs: int = 1,
     gluon_orth: Optional[Dict[str, str]] = None,
+    batch_size: Optional[int] = None,
+    static: bool = False,
 ) -> Dict[str, Any]:
     """
-    Generates chunked DiracSimplify driver files.
+    Generates batched DiracSimplify driver files (one per batch of diagrams).
+    Batches are weighted by previous per-diagram timings or input file sizes;
+    static=True packs them into exactly `jobs` drivers instead.
 
     mode:
       "0"   -> simplify tree only (amp0l)
@@ -207,25 +240,20 @@ def prepare_dirac_projects(
         if not amps0.exists():
             raise FileNotFoundError(f"Missing tree amplitudes: {amps0}. Run evaluate first.")
         jobs_eff_tree = max(1, min(jobs_requested, n0l or 1))
-        tree_drivers: Dict[int, Path] = {}
-        for k in range(1, jobs_eff_tree + 1):
-            i0, i1 = _chunk_range_1based(n0l, jobs_eff_tree, k)
-            if i0 > i1:
-                continue
-            frm = form_dir / f"dirac_simplify_tree_J{k}of{jobs_eff_tree}.frm"
-            _write_dirac_driver(
-                dst=frm,
-                incdir=incdir,
-                src_dir="amp0l",
-                dst_dir="amp0l",
-                total=n0l,
-                i0=i0,
-                i1=i1,
-                orth_block=orth_block,
-                mand_define=mand_define,
-                write_conjugate=True,
-            )
-            tree_drivers[k] = frm
+        tree_drivers = _write_dirac_batches(
+            form_dir=form_dir,
+            incdir=incdir,
+            target="tree",
+            src_dir="amp0l",
+            dst_dir="amp0l",
+            total=n0l,
+            jobs_effective=jobs_eff_tree,
+            batch_size=batch_size,
+            static=static,
+            orth_block=orth_block,
+            mand_define=mand_define,
+            write_conjugate=True,
+        )
         result["tree"] = {"drivers": tree_drivers, "jobs_effective": jobs_eff_tree}
 
     if mode in ("1", "2"):
@@ -234,24 +262,19 @@ def prepare_dirac_projects(
         if not amps1.exists():
             raise FileNotFoundError(f"Missing one-loop amplitudes: {amps1}. Run evaluate first.")
         jobs_eff_loop = max(1, min(jobs_requested, n1l or 1))
-        loop_drivers: Dict[int, Path] = {}
-        for k in range(1, jobs_eff_loop + 1):
-            j0, j1 = _chunk_range_1based(n1l, jobs_eff_loop, k)
-            if j0 > j1:
-                continue
-            frm = form_dir / f"dirac_simplify_loop_J{k}of{jobs_eff_loop}.frm"
-            _write_dirac_driver(
-                dst=frm,
-                incdir=incdir,
-                src_dir="amp1l",
-                dst_dir="amp1l",
-                total=n1l,
-                i0=j0,
-                i1=j1,
-                orth_block=orth_block,
-                mand_define=mand_define,
-            )
-            loop_drivers[k] = frm
+        loop_drivers = _write_dirac_batches(
+            form_dir=form_dir,
+            incdir=incdir,
+            target="loop",
+            src_dir="amp1l",
+            dst_dir="amp1l",
+            total=n1l,
+            jobs_effective=jobs_eff_loop,
+            batch_size=batch_size,
+            static=static,
+            orth_block=orth_block,
+            mand_define=mand_define,
+        )
         result["loop"] = {"drivers": loop_drivers, "jobs_effective": jobs_eff_loop}
 
     if mode == "mct":
@@ -265,30 +288,34 @@ def prepare_dirac_projects(
             raise RuntimeError(f"No CT amplitudes found in {mct_raw}")
         mct_out.mkdir(parents=True, exist_ok=True)
         jobs_eff_mct = max(1, min(jobs_requested, nct_raw))
-        mct_drivers: Dict[int, Path] = {}
-        for k in range(1, jobs_eff_mct + 1):
-            c0, c1 = _chunk_range_1based(nct_raw, jobs_eff_mct, k)
-            if c0 > c1:
-                continue
-            frm = form_dir / f"dirac_simplify_mct_J{k}of{jobs_eff_mct}.frm"
-            _write_dirac_driver(
-                dst=frm,
-                incdir=incdir,
-                src_dir="mct_raw",
-                dst_dir="mct",
-                total=nct_raw,
-                i0=c0,
-                i1=c1,
-                orth_block=orth_block,
-                mand_define=mand_define,
-            )
-            mct_drivers[k] = frm
+        mct_drivers = _write_dirac_batches(
+            form_dir=form_dir,
+            incdir=incdir,
+            target="mct",
+            src_dir="mct_raw",
+            dst_dir="mct",
+            total=nct_raw,
+            jobs_effective=jobs_eff_mct,
+            batch_size=batch_size,
+            static=static,
+            orth_block=orth_block,
+            mand_define=mand_define,
+        )
         result["mct"] = {"drivers": mct_drivers, "jobs_effective": jobs_eff_mct}
 
     return result
 
 
-def prepare_dirac(ctx, mode: str, jobs: int, gluon_orth: Dict[str, str]):
+def prepare_dirac(
+    ctx,
+    mode: str,
+    jobs: int,
+    gluon_orth: Dict[str, str],
+    batch_size: Optional[int] = None,
+    static: bool = False,
+):
     if not ctx.run_dir:
         raise RuntimeError("No run attached.")
-    return prepare_dirac_projects(ctx.run_dir, mode=mode, jobs=jobs, gluon_orth=gluon_orth)
+    return prepare_dirac_projects(
+        ctx.run_dir, mode=mode, jobs=jobs, gluon_orth=gluon_orth, batch_size=batch_size, static=static
+    )
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+# Text scans of FORM output files (.h) that would otherwise need a FORM pass.
+
+_GLI_TOP_RE = re.compile(rb"GLI\(\s*top(\d+)\s*,")
+_FAD_RE = re.compile(rb"FAD\(([^()]*)\)")
+_GLI_RE = re.compile(rb"(GLI\(top\d+,[-0-9,]+\))")
+_LOOPINT = b"LoopInt("
+_CHUNK = 1 << 20
+_OVERLAP = 64
+
+
+def scan_file(path: Path, pattern: Pattern[bytes], squeeze: bool = False) -> Set[bytes]:
+    """
+    Distinct first groups of `pattern` in a file, read in 1 MB chunks.
+
+    Consecutive chunks overlap by a few bytes so matches spanning a chunk
+    boundary are found; `pattern` must match less than that overlap.
+    squeeze=True drops all whitespace first (FORM wraps long lines anywhere).
+    """
+    found: Set[bytes] = set()
+    tail = b""
+    with Path(path).open("rb") as fh:
+        while True:
+            chunk = fh.read(_CHUNK)
+            if not chunk:
+                break
+            if squeeze:
+                chunk = b"".join(chunk.split())
+            buf = tail + chunk
+            found.update(m.group(1) for m in pattern.finditer(buf))
+            tail = buf[-_OVERLAP:]
+    return found
+
+
+def topologies_in(path: Path) -> List[int]:
+    """Sorted topology numbers k of all GLI(top<k>, ...) in a FORM file."""
+    return sorted(int(k) for k in scan_file(path, _GLI_TOP_RE))
+
+
+def topology_index(
+    folder: Path,
+    pairs: Iterable[Tuple[int, int]],
+    index_path: Optional[Path] = None,
+) -> Dict[Tuple[int, int], List[int]]:
+    """
+    Topologies used by every d<i>x<j>.h of `folder` (e.g. Files/M0M1top).
+
+    Results are cached in `index_path` (default <folder>/topologies.json) keyed
+    by file name, size and mtime, so only files rewritten since the last scan
+    are read again. Missing files map to an empty list.
+    """
+    folder = Path(folder)
+    index_path = Path(index_path) if index_path else folder / "topologies.json"
+    try:
+        cache = json.loads(index_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        cache = {}
+
+    out: Dict[Tuple[int, int], List[int]] = {}
+    fresh: Dict[str, Dict[str, object]] = {}
+    for i, j in pairs:
+        name = f"d{i}x{j}.h"
+        path = folder / name
+        try:
+            st = path.stat()
+        except OSError:
+            out[(i, j)] = []
+            continue
+        entry = cache.get(name)
+        if not (isinstance(entry, dict) and entry.get("size") == st.st_size and entry.get("mtime") == st.st_mtime):
+            entry = {"size": st.st_size, "mtime": st.st_mtime, "tops": topologies_in(path)}
+        fresh[name] = entry
+        out[(i, j)] = [int(k) for k in entry["tops"]]  # type: ignore[union-attr]
+
+    if fresh != cache:
+        index_path.write_text(json.dumps(fresh, indent=1) + "\n", encoding="utf-8")
+    return out
+
+
+def loop_denominators(path: Path) -> List[str]:
+    """Sorted distinct FAD(<momentum>,<mass>) arguments with loop momentum lm1 in a FORM file."""
+    args = (a.decode("ascii") for a in scan_file(path, _FAD_RE, squeeze=True))
+    return sorted(a for a in args if "lm1" in a)
+
+
+def write_amp_denominators(amp_dir: Path, n1l: int, out_path: Path) -> int:
+    """
+    Write the loop denominators of the one-loop amplitudes amp_dir/d<j>.h (j = 1..n1l)
+    to `out_path` as the Mathematica list ampDenominators, one product of FAD per
+    distinct propagator set. Returns the number of distinct sets.
+    """
+    amp_dir = Path(amp_dir)
+    sets: List[Tuple[str, ...]] = []
+    seen: Set[Tuple[str, ...]] = set()
+    for j in range(1, int(n1l) + 1):
+        path = amp_dir / f"d{j}.h"
+        if not path.exists():
+            raise FileNotFoundError(f"Missing one-loop amplitude {path}")
+        dens = tuple(loop_denominators(path))
+        if dens and dens not in seen:
+            seen.add(dens)
+            sets.append(dens)
+
+    products = ["*".join(f"FAD[{a}]" for a in dens) for dens in sets]
+    Path(out_path).write_text("ampDenominators = {\n  " + ",\n  ".join(products) + "\n};\n", encoding="utf-8")
+    return len(sets)
+
+
+def gli_integrals(path: Path) -> Set[Tuple[int, Tuple[int, ...]]]:
+    """Distinct (k, (n1, ..., nN)) of all GLI(top<k>,n1,...,nN) in a FORM file."""
+    out: Set[Tuple[int, Tuple[int, ...]]] = set()
+    for m in scan_file(path, _GLI_RE, squeeze=True):
+        top, *powers = m[len(b"GLI(top") : -1].split(b",")
+        out.add((int(top), tuple(int(a) for a in powers)))
+    return out
+
+
+def ibp_spec(folder: Path, pairs: Iterable[Tuple[int, int]]) -> Dict[str, Dict[str, object]]:
+    """
+    What IBP has to reduce per topology, from the GLI that occur in `folder`/d<i>x<j>.h
+    (Files/M0M1top): the integrals (targets), the sectors they lie in, the smallest
+    top sector containing all of them, and the largest r (sum of propagator powers),
+    s (sum of numerator powers) and number of dots. Keys are topology numbers.
+    """
+    folder = Path(folder)
+    ints: Dict[int, Set[Tuple[int, ...]]] = {}
+    for i, j in pairs:
+        path = folder / f"d{i}x{j}.h"
+        if path.exists():
+            for top, powers in gli_integrals(path):
+                ints.setdefault(top, set()).add(powers)
+
+    spec: Dict[str, Dict[str, object]] = {}
+    for top in sorted(ints):
+        targets = sorted(ints[top])
+        sectors = sorted({tuple(1 if a > 0 else 0 for a in t) for t in targets})
+        top_sector = [max(col) for col in zip(*sectors)]
+        spec[str(top)] = {
+            "integrals": len(targets),
+            "targets": [list(t) for t in targets],
+            "sectors": [list(sec) for sec in sectors],
+            "top_sector": top_sector,
+            "max_r": max(sum(a for a in t if a > 0) for t in targets),
+            "max_s": max(-sum(a for a in t if a < 0) for t in targets),
+            "max_dots": max(sum(a - 1 for a in t if a > 1) for t in targets),
+        }
+    return spec
+
+
+def write_ibp_spec(folder: Path, pairs: Iterable[Tuple[int, int]], out_path: Path, ntop: int) -> Dict[str, Dict[str, object]]:
+    """Write ibp_spec as JSON; topologies 1..ntop without integrals get an empty entry."""
+    spec = ibp_spec(folder, pairs)
+    for top in range(1, int(ntop) + 1):
+        spec.setdefault(str(top), {"integrals": 0, "targets": [], "sectors": []})
+    Path(out_path).write_text(json.dumps(spec, indent=1) + "\n", encoding="utf-8")
+    return spec
+
+
+def loop_integrals(path: Path) -> List[bytes]:
+    """
+    Distinct LoopInt(...) of a FORM file (whitespace dropped), in order of first
+    occurrence. Streams the file; a LoopInt cut by a chunk boundary is completed
+    with the next chunk, so the arguments may be arbitrarily long.
+    """
+    found: Dict[bytes, None] = {}
+    buf = b""
+    with Path(path).open("rb") as fh:
+        while True:
+            chunk = fh.read(_CHUNK)
+            buf += b"".join(chunk.split())
+            pos = 0
+            while True:
+                start = buf.find(_LOOPINT, pos)
+                if start < 0:
+                    # keep a possibly cut "LoopInt(" for the next chunk
+                    pos = max(pos, len(buf) - len(_LOOPINT) + 1)
+                    break
+                depth = 0
+                end = -1
+                for k in range(start + len(_LOOPINT) - 1, len(buf)):
+                    c = buf[k]
+                    if c == 0x28:  # (
+                        depth += 1
+                    elif c == 0x29:  # )
+                        depth -= 1
+                        if depth == 0:
+                            end = k + 1
+                            break
+                if end < 0:
+                    pos = start
+                    break
+                found.setdefault(buf[start:end], None)
+                pos = end
+            buf = buf[pos:]
+            if not chunk:
+                break
+    return list(found)
+
+
+def form_to_mathematica(expr: str) -> str:
+    """FORM function-call syntax f(a,b) -> f[a,b]; grouping parentheses are kept."""
+    out: List[str] = []
+    stack: List[str] = []
+    for k, c in enumerate(expr):
+        if c == "(":
+            call = k > 0 and (expr[k - 1].isalnum() or expr[k - 1] == "_")
+            stack.append("]" if call else ")")
+            out.append("[" if call else "(")
+        elif c == ")":
+            out.append(stack.pop())
+        else:
+            out.append(c)
+    return "".join(out)
+
+
+def distinct_loop_integrals(folder: Path, pairs: Iterable[Tuple[int, int]], jobs: int = 0) -> List[bytes]:
+    """
+    Distinct LoopInt(...) of `folder`/d<i>x<j>.h (Files/M0M1) in pair order, scanned
+    by `jobs` processes (default: all CPUs). Missing files are skipped.
+    """
+    folder = Path(folder)
+    paths = [folder / f"d{i}x{j}.h" for i, j in pairs]
+    paths = [p for p in paths if p.exists()]
+    workers = max(1, min(int(jobs) or (os.cpu_count() or 1), len(paths) or 1))
+    if workers == 1:
+        per_file = [loop_integrals(p) for p in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            per_file = list(ex.map(loop_integrals, paths, chunksize=max(1, len(paths) // (4 * workers))))
+
+    seen: Dict[bytes, None] = {}
+    for ints in per_file:
+        for m in ints:
+            seen.setdefault(m, None)
+    return list(seen)
+
+
+def write_loop_integrals(folder: Path, pairs: Iterable[Tuple[int, int]], out_path: Path, jobs: int = 0) -> List[bytes]:
+    """
+    Write distinct_loop_integrals of `folder` to `out_path` as the Mathematica list
+    loopInts and return them.
+    """
+    ints = distinct_loop_integrals(folder, pairs, jobs)
+    body = ",\n  ".join(form_to_mathematica(m.decode("ascii")) for m in ints)
+    Path(out_path).write_text(
+        f"(* {len(ints)} distinct LoopInt in {Path(folder).name} (glaslib.formscan) *)\n"
+        f"loopInts = {{\n  {body}\n}};\n",
+        encoding="utf-8",
+    )
+    return ints
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# FORM table lookups generated from linear lists of id statements.
+#
+# intrule.h (extract topologies stage 2) holds one `id LoopInt(...)=...;` per
+# integral; FORM tries every statement on every term. intruleTable.h turns it into
+#   Fill intrule(k) = <rhs of integral k>;        k = position in intrule.h
+#   intgli(n) = intkey(k)                          n = extra-symbol number of the LoopInt argument
+# so a pair only needs ArgToExtraSymbol on LoopInt and two table lookups (INTRULE_APPLY).
+
+INTRULE_TABLE = "intruleTable.h"
+_KEY_CHUNK = 500
+
+INTRULE_APPLY = """ArgToExtraSymbol tonumber,LoopInt;
+    .sort
+id LoopInt(x1?) = intgli(x1);
+    .sort
+id intkey(x1?) = intrule(x1);"""
+
+
+def _split_id(line: str) -> Tuple[str, str]:
+    """`id LHS=RHS;` -> (LHS, RHS), split at the first top-level '='."""
+    body = line.strip()
+    if not body.startswith("id ") or not body.endswith(";"):
+        raise ValueError(f"Not an id statement: {line[:80]}")
+    body = body[3:-1]
+    depth = 0
+    for pos, ch in enumerate(body):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "=" and depth == 0:
+            return body[:pos].strip(), body[pos + 1 :].strip()
+    raise ValueError(f"Missing '=' in id statement: {line[:80]}")
+
+
+def read_id_rules(path: Path) -> List[Tuple[str, str]]:
+    """(lhs, rhs) of every `id lhs=rhs;` line of a FORM include file."""
+    rules: List[Tuple[str, str]] = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            rules.append(_split_id(line))
+    return rules
+
+
+def write_intrule_table(files_dir: Path) -> Path:
+    """
+    Write Files/intruleTable.h from Files/intrule.h (skipped while it is up to date).
+
+    Loading it defines the tables intrule/intgli, registers the LoopInt argument of
+    every rule as an extra symbol and fills intgli from those; a LoopInt that is not
+    in intrule.h is left as intgli(n) after INTRULE_APPLY.
+    """
+    files_dir = Path(files_dir)
+    src = files_dir / "intrule.h"
+    dst = files_dir / INTRULE_TABLE
+    if not src.exists():
+        raise FileNotFoundError(f"Missing {src}. Run extract topologies (stage2) first.")
+    if dst.exists() and dst.stat().st_mtime >= src.stat().st_mtime:
+        return dst
+
+    rules = read_id_rules(src)
+    for lhs, _ in rules:
+        if not lhs.startswith("LoopInt("):
+            raise ValueError(f"Unexpected rule in {src}: {lhs[:80]}")
+
+    lines: List[str] = [
+        f"* Generated from intrule.h by glaslib.formtables ({len(rules)} integrals)",
+        "CFunction intkey;",
+        "Table,sparse intrule(1);",
+        "Table,sparse intgli(1);",
+    ]
+    lines += [f"Fill intrule({k}) = {rhs};" for k, (_, rhs) in enumerate(rules, start=1)]
+
+    chunks = [rules[c : c + _KEY_CHUNK] for c in range(0, len(rules), _KEY_CHUNK)]
+    offset = 0
+    for c, chunk in enumerate(chunks, start=1):
+        terms = "\n".join(f"  + intkey({offset + k})*{lhs}" for k, (lhs, _) in enumerate(chunk, start=1))
+        lines.append(f"Local intkeys{c} =\n{terms};")
+        offset += len(chunk)
+    if chunks:
+        lines += ["ArgToExtraSymbol tonumber,LoopInt;", "B LoopInt;", "    .sort"]
+        lines += [f"FillExpression intgli = intkeys{c}(LoopInt);" for c in range(1, len(chunks) + 1)]
+        lines += ["Drop " + ",".join(f"intkeys{c}" for c in range(1, len(chunks) + 1)) + ";", "    .sort"]
+
+    dst.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return dst
+
+
+def intrule_setup(files_dir: Path) -> Dict[str, str]:
+    """FORM text to load the integral table once per driver and to apply it to a pair."""
+    write_intrule_table(files_dir)
+    return {"load": f"#include Files/{INTRULE_TABLE}", "apply": INTRULE_APPLY}
+
+
+# IBP<k>.h (IBP.m) holds `id GLI(top<k>,n1,...,nN) = <masters>;` for every integral of
+# topology k that occurs in the amplitude. Table<k>.h holds the same rules as
+#   Table,sparse ibp<k>(N);  Fill ibp<k>(n1,...,nN) = <masters>;
+# loaded once per driver; IBP_APPLY maps GLI(top<k>,...) through the table and puts
+# integrals without a rule (the masters themselves) back.
+
+_GLI_LHS_RE = re.compile(r"^GLI\(top(\d+),(.*)\)$")
+
+IBP_APPLY = """#do k = `tops`i'x`j''
+id GLI(top`k',?a) = ibp`k'(?a);
+#enddo
+    .sort
+#do k = `tops`i'x`j''
+id ibp`k'(?a) = GLI(top`k',?a);
+#enddo"""
+
+
+def ibp_table_path(files_dir: Path, top: int) -> Path:
+    return Path(files_dir) / "IBP" / f"Table{top}.h"
+
+
+def write_ibp_table(files_dir: Path, top: int) -> Path:
+    """Write Files/IBP/Table<top>.h from Files/IBP/IBP<top>.h (skipped while it is up to date)."""
+    src = Path(files_dir) / "IBP" / f"IBP{top}.h"
+    dst = ibp_table_path(files_dir, top)
+    if not src.exists():
+        raise FileNotFoundError(f"Missing {src} (run ibp)")
+    if dst.exists() and dst.stat().st_mtime >= src.stat().st_mtime:
+        return dst
+
+    fills: List[str] = []
+    nprop = None
+    for lhs, rhs in read_id_rules(src):
+        m = _GLI_LHS_RE.match(lhs.replace(" ", ""))
+        if not m or int(m.group(1)) != top:
+            raise ValueError(f"Unexpected rule in {src}: {lhs[:80]}")
+        powers = m.group(2)
+        n = powers.count(",") + 1
+        if nprop is None:
+            nprop = n
+        elif n != nprop:
+            raise ValueError(f"Inconsistent number of propagators in {src}: {lhs[:80]}")
+        fills.append(f"Fill ibp{top}({powers}) = {rhs};")
+
+    if nprop is None:
+        # no rules: keep the function so IBP_APPLY still round-trips GLI(top<k>,...)
+        lines = [f"CFunction ibp{top};"]
+    else:
+        lines = [f"Table,sparse ibp{top}({nprop});"] + fills
+    dst.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return dst
+
+
+def ibp_setup(files_dir: Path, tops: Iterable[int]) -> Dict[str, str]:
+    """FORM text to load the IBP tables of `tops` once per driver and to apply them to pair d<i>x<j>."""
+    tops = sorted(set(tops))
+    for top in tops:
+        write_ibp_table(files_dir, top)
+    load = "\n".join(f"#include Files/IBP/Table{top}.h" for top in tops)
+    return {"load": load, "apply": IBP_APPLY}
@@ -1,16 +1,19 @@
 from __future__ import annotations
 
 import json
+import mmap
 import os
 import re
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from glaslib.core.models import get_qgraf_model
+from glaslib.diagclasses import classes_from_meta, classes_to_meta, find_classes, write_class_diagrams
 
 # -----------------------------
 # Physics name → QGRAF symbol
@@ -26,7 +29,7 @@ PARTICLE_MAP: Dict[str, str] = {
 }
 
 _ARROW_RE = re.compile(r"\s*(?:->|>)\s*")
-_LOCAL_D_RE = re.compile(r"(?m)^\s*Local\s+d(\d+)\s*=")
+_LOCAL_D_BYTES_RE = re.compile(rb"(?m)^[ \t]*Local[ \t]+d(\d+)[ \t]*=")
 
 
 @dataclass(frozen=True)
@@ -120,9 +123,97 @@ def process_to_tag(lhs: List[str], rhs: List[str]) -> str:
     return "".join(one(t) for t in (lhs + rhs))
 
 
-def _count_diagrams_from_text(text: str) -> int:
-    nums = [int(m.group(1)) for m in _LOCAL_D_RE.finditer(text)]
-    return len(set(nums))
+def index_diagrams(path: Path, use_mmap: bool = True) -> Dict[str, Any]:
+    """
+    Byte-offset index of a QGRAF output in one pass: every 'Local d<n> =' block
+    starts at its line and runs up to the next block (the last one to the end of
+    the file), as in split_diagram_file. The file is memory-mapped (use_mmap) or
+    streamed line by line, never read into memory as a whole.
+
+    Returns {"file", "size", "prologue": [offset, length], "diagrams": [[n, offset, length], ...]}.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    starts: List[Tuple[int, int]] = []
+    with path.open("rb") as fh:
+        if use_mmap and size > 0:
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                starts = [(int(m.group(1)), m.start()) for m in _LOCAL_D_BYTES_RE.finditer(mm)]
+        else:
+            offset = 0
+            for line in fh:
+                m = _LOCAL_D_BYTES_RE.match(line)
+                if m:
+                    starts.append((int(m.group(1)), offset))
+                offset += len(line)
+
+    ends = [off for _, off in starts[1:]] + [size]
+    return {
+        "file": path.name,
+        "size": size,
+        "prologue": [0, starts[0][1] if starts else size],
+        "diagrams": [[n, off, end - off] for (n, off), end in zip(starts, ends)],
+    }
+
+
+def index_matches(path: Path, index: Optional[Dict[str, Any]]) -> bool:
+    """True if `index` (index_diagrams) was built for a file of this name and size."""
+    if not isinstance(index, dict):
+        return False
+    path = Path(path)
+    return path.exists() and index.get("size") == path.stat().st_size and isinstance(index.get("diagrams"), list)
+
+
+def read_diagram(path: Path, index: Dict[str, Any], n: int) -> bytes:
+    """
+    The 'Local d<n> = ...;' block of diagram n, read with a single seek. QGRAF
+    numbers the diagrams 1..N in file order, so diagram n is entry n-1 of the index.
+    """
+    entries = index["diagrams"]
+    if not 1 <= n <= len(entries) or entries[n - 1][0] != n:
+        raise KeyError(f"Diagram d{n} not in index of {index.get('file')}")
+    _, offset, length = entries[n - 1]
+    with Path(path).open("rb") as fh:
+        fh.seek(offset)
+        return fh.read(length)
+
+
+def split_diagram_file(
+    src: Path,
+    dst_dir: Path,
+    index: Optional[Dict[str, Any]] = None,
+    numbers: Optional[List[int]] = None,
+) -> int:
+    """
+    Split a QGRAF output into one FORM file per diagram: dst_dir/d<i>.h holds
+    the 'Local d<i> = ...;' block, so drivers include only the diagram they need.
+    Blocks are copied by offset from `index` (built here when missing or stale);
+    `numbers` restricts the split to those diagrams. Returns the number written.
+    """
+    src = Path(src)
+    dst_dir = Path(dst_dir)
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    for old in dst_dir.glob("d*.h"):
+        old.unlink()
+    if not index_matches(src, index):
+        index = index_diagrams(src)
+    wanted = set(numbers) if numbers is not None else None
+
+    count = 0
+    with src.open("rb") as fh:
+        for n, offset, length in index["diagrams"]:  # type: ignore[index]
+            if wanted is not None and n not in wanted:
+                continue
+            fh.seek(offset)
+            (dst_dir / f"d{n}.h").write_bytes(fh.read(length))
+            count += 1
+    return count
+
+
+def _has_diagrams(path: Path) -> bool:
+    """True once a 'Local d<n> =' line is found (stops reading there)."""
+    with Path(path).open("rb") as fh:
+        return any(_LOCAL_D_BYTES_RE.match(line) for line in fh)
 
 
 def _find_main_qgraf_output(workdir: Path, prefix_name: str) -> Path:
@@ -134,8 +225,7 @@ def _find_main_qgraf_output(workdir: Path, prefix_name: str) -> Path:
         candidates = [exact] + [p for p in candidates if p != exact]
 
     for p in candidates:
-        txt = p.read_text(encoding="utf-8", errors="ignore")
-        if _LOCAL_D_RE.search(txt):
+        if _has_diagrams(p):
             return p
 
     if not candidates:
@@ -180,25 +270,6 @@ def _next_auto_output_dir(project_root: Path, tag: str, model_id: str = "qcd_mas
     return project_root / f"{base_tag}_{n:04d}"
 
 
-def _acquire_lock(lock_path: Path) -> None:
-    lock_path = Path(lock_path)
-    try:
-        fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
-        os.close(fd)
-    except FileExistsError:
-        raise RuntimeError(
-            f"QGRAF lock exists: {lock_path}\n"
-            f"Another run may be in progress (or a stale lock). Remove it if you're sure."
-        )
-
-
-def _release_lock(lock_path: Path) -> None:
-    try:
-        Path(lock_path).unlink(missing_ok=True)
-    except Exception:
-        pass
-
-
 def _run_qgraf(qgraf_exe: Path, cwd: Path) -> subprocess.CompletedProcess:
     qgraf_exe = Path(qgraf_exe)
     if not qgraf_exe.exists():
@@ -229,7 +300,14 @@ def generate_both(
     options: Optional[List[str]] = None,
     keep_temp: bool = False,
     out_name: Optional[str] = None,
+    merge_identical: bool = True,
 ) -> Dict[str, Any]:
+    """
+    Run QGRAF for the tree and one-loop diagrams of process_str into a new run.
+    With merge_identical, one-loop diagrams that are identical up to relabelling
+    are grouped (glaslib.diagclasses); meta["n1l"] then counts the classes and
+    meta["n1l_qgraf"] the QGRAF diagrams.
+    """
     project_root = Path(project_root).resolve()
     tools_dir = Path(tools_dir).resolve()
     qgraf_exe = Path(qgraf_exe).resolve()
@@ -257,10 +335,16 @@ def generate_both(
         output_dir = runs_root / out_name
         if output_dir.exists():
             raise FileExistsError(f"Output folder already exists: {output_dir}")
+        output_dir.mkdir(parents=True, exist_ok=False)
     else:
-        output_dir = _next_auto_output_dir(runs_root, tag, model_id)
-
-    output_dir.mkdir(parents=True, exist_ok=False)
+        # concurrent generates of the same process may pick the same number
+        while True:
+            output_dir = _next_auto_output_dir(runs_root, tag, model_id)
+            try:
+                output_dir.mkdir(parents=True, exist_ok=False)
+                break
+            except FileExistsError:
+                continue
 
     # Get QGRAF model filename from model_id
     qgraf_model = get_qgraf_model(model_id)
@@ -285,114 +369,172 @@ def generate_both(
     diagrams_root = output_dir / "diagrams"
     diagrams_root.mkdir(parents=True, exist_ok=True)
 
-    qgraf_dat = tools_dir / "qgraf.dat"
-    lock_path = tools_dir / ".qgraf.lock"
-    _acquire_lock(lock_path)
+    qgraf_model_file = tools_dir / qgraf_model
+    if not qgraf_model_file.exists():
+        raise FileNotFoundError(f"QGRAF model file not found: {qgraf_model_file}")
+    if not style_file.exists():
+        raise FileNotFoundError(f"QGRAF style file not found: {style_file}")
+
+    common = {
+        "process_str": process_str,
+        "tag": tag,
+        "shape": shape,
+        "n_in": n_in,
+        "n_out": n_out,
+        "model_id": model_id,
+        "options": options,
+        "incoming": incoming,
+        "outgoing": outgoing,
+        "qgraf_exe": qgraf_exe,
+        "qgraf_model_file": qgraf_model_file,
+        "style_file": style_file,
+        "diagrams_root": diagrams_root,
+        "keep_temp": keep_temp,
+    }
+    # tree and one-loop QGRAF runs are independent: each has its own scratch directory
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        futures = [ex.submit(_generate_loop, loops=loops, **common) for loops in (0, 1)]
+        tree_main, n0l = futures[0].result()
+        loop_main, n1l = futures[1].result()
+
+    if merge_identical:
+        n1l_qgraf = n1l
+        n1l = _merge_identical_diagrams(diagrams_root / "1l")
+        meta["n1l_qgraf"] = n1l_qgraf
+
+    meta["n0l"] = n0l
+    meta["n1l"] = n1l
+    meta_path.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+
+    return {
+        "process": process_str,
+        "tag": tag,
+        "shape": shape,
+        "n_in": n_in,
+        "n_out": n_out,
+        "output_dir": output_dir,
+        "meta_path": meta_path,
+        "tree_main": tree_main,
+        "loop_main": loop_main,
+        "n0l": n0l,
+        "n1l": n1l,
+    }
+
+
+def _merge_identical_diagrams(loop_out_dir: Path) -> int:
+    """
+    Group the diagrams of a QGRAF output into classes of identical diagrams and
+    store them in its meta.json as "classes"; prepare_form_project writes one
+    Diagrams/.../d<k>.h per class. Returns the number of classes.
+    """
+    meta_path = Path(loop_out_dir) / "meta.json"
+    loop_meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    classes = find_classes(Path(loop_out_dir) / loop_meta["main_output_file"], loop_meta["diagram_index"])
+    loop_meta["classes"] = classes_to_meta(classes)
+    meta_path.write_text(json.dumps(loop_meta, indent=2) + "\n", encoding="utf-8")
+    return len(classes)
+
 
+def _generate_loop(
+    *,
+    loops: int,
+    process_str: str,
+    tag: str,
+    shape: str,
+    n_in: int,
+    n_out: int,
+    model_id: str,
+    options: List[str],
+    incoming: List[Leg],
+    outgoing: List[Leg],
+    qgraf_exe: Path,
+    qgraf_model_file: Path,
+    style_file: Path,
+    diagrams_root: Path,
+    keep_temp: bool,
+) -> Tuple[Path, int]:
+    """
+    Run QGRAF for one loop order in a private scratch directory
+    (diagrams/.qgraf_<suffix> with its own qgraf.dat, model and style file),
+    move the output to diagrams/<suffix> and write its meta.json.
+    Returns (main output file, number of diagrams).
+    """
+    suffix = f"{loops}l"
+    loop_out_dir = diagrams_root / suffix
+    loop_out_dir.mkdir(parents=True, exist_ok=False)
+    prefix_name = f"{tag}{suffix}"
+
+    scratch = diagrams_root / f".qgraf_{suffix}"
+    if scratch.exists():
+        shutil.rmtree(scratch)
+    scratch.mkdir(parents=True)
     try:
-        tree_main: Optional[Path] = None
-        loop_main: Optional[Path] = None
-        n0l = 0
-        n1l = 0
-
-        for loops in (0, 1):
-            suffix = f"{loops}l"
-            loop_out_dir = diagrams_root / suffix
-            loop_out_dir.mkdir(parents=True, exist_ok=False)
-
-            prefix_name = f"{tag}{suffix}"
-            temp_prefix = f"__tmp__{tag}__{output_dir.name}__{suffix}"
-
-            spec = QGrafSpec(
-                output=temp_prefix,
-                style=style_file.name,
-                model=qgraf_model,
-                incoming=incoming,
-                outgoing=outgoing,
-                loops=loops,
-                loop_momentum="lm",
-                options=options,
+        shutil.copy2(str(qgraf_model_file), str(scratch / qgraf_model_file.name))
+        shutil.copy2(str(style_file), str(scratch / style_file.name))
+
+        spec = QGrafSpec(
+            output=prefix_name,
+            style=style_file.name,
+            model=qgraf_model_file.name,
+            incoming=incoming,
+            outgoing=outgoing,
+            loops=loops,
+            loop_momentum="lm",
+            options=options,
+        )
+        qgraf_dat = scratch / "qgraf.dat"
+        qgraf_dat.write_text(spec.to_text() + "\n", encoding="utf-8")
+        res = _run_qgraf(qgraf_exe=qgraf_exe, cwd=scratch)
+
+        (loop_out_dir / f"qgraf_{suffix}.stdout.log").write_text(res.stdout or "", encoding="utf-8")
+        (loop_out_dir / f"qgraf_{suffix}.stderr.log").write_text(res.stderr or "", encoding="utf-8")
+
+        if res.returncode != 0:
+            raise RuntimeError(f"QGRAF failed for loops={loops}. See logs in {loop_out_dir}")
+
+        combined = ((res.stdout or "") + "\n" + (res.stderr or "")).lower()
+        if "error:" in combined:
+            raise RuntimeError(f"QGRAF reported an error for loops={loops}. See logs in {loop_out_dir}")
+
+        produced = sorted([p for p in scratch.glob(prefix_name + "*") if p.is_file()])
+        if not produced:
+            raise RuntimeError(
+                f"QGRAF returned success but produced no files for prefix '{prefix_name}'. "
+                f"See logs in {loop_out_dir}"
             )
 
-            qgraf_dat.write_text(spec.to_text() + "\n", encoding="utf-8")
-            res = _run_qgraf(qgraf_exe=qgraf_exe, cwd=tools_dir)
-
-            (loop_out_dir / f"qgraf_{suffix}.stdout.log").write_text(res.stdout or "", encoding="utf-8")
-            (loop_out_dir / f"qgraf_{suffix}.stderr.log").write_text(res.stderr or "", encoding="utf-8")
-
-            if res.returncode != 0:
-                raise RuntimeError(f"QGRAF failed for loops={loops}. See logs in {loop_out_dir}")
-
-            combined = ((res.stdout or "") + "\n" + (res.stderr or "")).lower()
-            if "error:" in combined:
-                raise RuntimeError(f"QGRAF reported an error for loops={loops}. See logs in {loop_out_dir}")
-
-            produced = sorted([p for p in tools_dir.glob(temp_prefix + "*") if p.is_file()])
-            if not produced:
-                raise RuntimeError(
-                    f"QGRAF returned success but produced no files for temp prefix '{temp_prefix}'. "
-                    f"See logs in {loop_out_dir}"
-                )
-
-            for p in produced:
-                new_name = p.name.replace(temp_prefix, prefix_name, 1)
-                shutil.move(str(p), str(loop_out_dir / new_name))
-
-            shutil.copy2(str(qgraf_dat), str(loop_out_dir / "qgraf.dat"))
-            shutil.copy2(str(style_file), str(loop_out_dir / style_file.name))
-
-            main_out = _find_main_qgraf_output(loop_out_dir, prefix_name)
-            txt = main_out.read_text(encoding="utf-8", errors="ignore")
-            ndiagrams = _count_diagrams_from_text(txt)
-            if ndiagrams == 0:
-                raise RuntimeError(f"Main output '{main_out.name}' has no Local dN blocks; cannot count diagrams.")
-
-            loop_meta = {
-                "created_at_utc": _utc_now_iso(),
-                "process": process_str,
-                "tag": tag,
-                "shape": shape,
-                "n_in": n_in,
-                "n_out": n_out,
-                "model_id": model_id,
-                "options": options,
-                "loop": loops,
-                "suffix": suffix,
-                "main_output_file": main_out.name,
-                "ndiagrams": ndiagrams,
-            }
-            (loop_out_dir / "meta.json").write_text(json.dumps(loop_meta, indent=2) + "\n", encoding="utf-8")
-
-            if loops == 0:
-                tree_main = main_out
-                n0l = ndiagrams
-            else:
-                loop_main = main_out
-                n1l = ndiagrams
-
-        meta["n0l"] = n0l
-        meta["n1l"] = n1l
-        meta_path.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+        for p in produced:
+            shutil.move(str(p), str(loop_out_dir / p.name))
 
+        shutil.copy2(str(qgraf_dat), str(loop_out_dir / "qgraf.dat"))
+        shutil.copy2(str(style_file), str(loop_out_dir / style_file.name))
+    finally:
         if not keep_temp:
-            qgraf_dat.unlink(missing_ok=True)
-
-        return {
-            "process": process_str,
-            "tag": tag,
-            "shape": shape,
-            "n_in": n_in,
-            "n_out": n_out,
-            "output_dir": output_dir,
-            "meta_path": meta_path,
-            "tree_main": tree_main,
-            "loop_main": loop_main,
-            "n0l": n0l,
-            "n1l": n1l,
-        }
+            shutil.rmtree(scratch, ignore_errors=True)
 
-    finally:
-        _release_lock(lock_path)
+    main_out = _find_main_qgraf_output(loop_out_dir, prefix_name)
+    index = index_diagrams(main_out)
+    ndiagrams = len({n for n, _, _ in index["diagrams"]})
+    if ndiagrams == 0:
+        raise RuntimeError(f"Main output '{main_out.name}' has no Local dN blocks; cannot count diagrams.")
+
+    loop_meta = {
+        "created_at_utc": _utc_now_iso(),
+        "process": process_str,
+        "tag": tag,
+        "shape": shape,
+        "n_in": n_in,
+        "n_out": n_out,
+        "model_id": model_id,
+        "options": options,
+        "loop": loops,
+        "suffix": suffix,
+        "main_output_file": main_out.name,
+        "ndiagrams": ndiagrams,
+        "diagram_index": index,
+    }
+    (loop_out_dir / "meta.json").write_text(json.dumps(loop_meta, indent=2) + "\n", encoding="utf-8")
+    return main_out, ndiagrams
 
 
 # -----------------------------
@@ -420,32 +562,6 @@ def _resolve_form_procedures_dir(project_root: Path) -> Path:
     return procedures_dir()
 
 
-def _chunk_range_1based(total: int, jobs: int, job_index: int) -> Tuple[int, int]:
-    """
-    Returns inclusive [start,end] in 1-based indexing.
-    If total==0 -> (1,0) (empty).
-    jobs is assumed >=1, job_index in [1..jobs].
-    """
-    if total <= 0:
-        return 1, 0
-
-    base = total // jobs
-    rem = total % jobs
-
-    # first 'rem' jobs get +1
-    if job_index <= rem:
-        size = base + 1
-        start = (job_index - 1) * size + 1
-    else:
-        size = base
-        start = rem * (base + 1) + (job_index - rem - 1) * base + 1
-
-    end = start + size - 1
-    if size <= 0:
-        return 1, 0
-    return start, end
-
-
 def _write_evaluate_driver(
     *,
     dst: Path,
@@ -454,25 +570,25 @@ def _write_evaluate_driver(
     n0l: int,
     n1l: int,
     mand_define_line: str,
-    i0: int,
-    i1: int,
-    j0: int,
-    j1: int,
+    tree: List[int],
+    loop: List[int],
 ) -> None:
     """
     RAW evaluation only:
       - tree: writes Files/Amps/amp0l/d<i>.h with d<i> and dC<i>
       - loop: writes Files/Amps/amp1l/d<i>.h with d<i>
     """
+    from glaslib.core.parallel import form_do_range
+
     tree_block = ""
-    if i0 <= i1:
+    if tree:
         tree_block = f"""
-#do i={i0},{i1}
-#include Files/{tag}0l
+#do i={form_do_range(tree)}
+#include Files/Diagrams/0l/d`i'.h
     .sort
 l amp = d`i';
     .sort
-Drop d1,...,d{n0l};
+Drop d`i';
 #call FeynmanRules
 `mand'
 #call SymToRat
@@ -487,17 +603,17 @@ Drop;
 #enddo
 """
     else:
-        tree_block = "\n* (no tree diagrams in this chunk)\n"
+        tree_block = "\n* (no tree diagrams in this batch)\n"
 
     loop_block = ""
-    if j0 <= j1:
+    if loop:
         loop_block = f"""
-#do i={j0},{j1}
-#include Files/{tag}1l
+#do i={form_do_range(loop)}
+#include Files/Diagrams/1l/d`i'.h
     .sort
 l amp = d`i';
     .sort
-Drop d1,...,d{n1l};
+Drop d`i';
 #call FeynmanRules
 `mand'
 #call SymToRat
@@ -511,7 +627,7 @@ Drop;
 #enddo
 """
     else:
-        loop_block = "\n* (no loop diagrams in this chunk)\n"
+        loop_block = "\n* (no loop diagrams in this batch)\n"
 
     text = f"""#-
 #: IncDir {incdir}
@@ -530,12 +646,12 @@ Off Statistics;
 PolyRatFun rat;
 .sort
 
-* ---- TREE (this chunk) ----
+* ---- TREE (this batch) ----
 {tree_block}
 
-#message done with tree-level chunk
+#message done with tree-level batch
 
-* ---- ONE-LOOP (this chunk) ----
+* ---- ONE-LOOP (this batch) ----
 {loop_block}
 
 .end
@@ -551,21 +667,21 @@ def _write_dirac_driver(
     n0l: int,
     n1l: int,
     mand_define_line: str,
-    i0: int,
-    i1: int,
-    j0: int,
-    j1: int,
+    tree: List[int],
+    loop: List[int],
 ) -> None:
     """
     Default DiracSimplify driver (no orthogonality constraints).
     Used only for the formprep return payload; the interactive DiracSimplify
     command uses dirac.py for customized drivers.
     """
+    from glaslib.core.parallel import form_do_range
+
     tree_block = ""
-    if i0 <= i1:
+    if tree:
         tree_block = f"""
 * ---- TREE ----
-#do i = {i0},{i1}
+#do i = {form_do_range(tree)}
 #include Files/Amps/amp0l/d`i'.h
     .sort
 l amp = d`i';
@@ -585,13 +701,13 @@ Drop;
 #enddo
 """
     else:
-        tree_block = "\n* (no tree diagrams in this chunk)\n"
+        tree_block = "\n* (no tree diagrams in this batch)\n"
 
     loop_block = ""
-    if j0 <= j1:
+    if loop:
         loop_block = f"""
 * ---- ONE-LOOP ----
-#do i = {j0},{j1}
+#do i = {form_do_range(loop)}
 #include Files/Amps/amp1l/d`i'.h
     .sort
 l amp = d`i';
@@ -611,7 +727,7 @@ Drop;
 #enddo
 """
     else:
-        loop_block = "\n* (no one-loop diagrams in this chunk)\n"
+        loop_block = "\n* (no one-loop diagrams in this batch)\n"
 
     text = f"""#-
 #: IncDir {incdir}
@@ -642,14 +758,19 @@ def prepare_form_project(output_dir: Path, *, jobs: int = 1) -> Dict[str, Any]:
     """
     Prepares:
       <output_dir>/form/Files/{tag}0l, {tag}1l
+      <output_dir>/form/Files/Diagrams/0l/d<i>.h, Diagrams/1l/d<i>.h (one file per diagram)
       <output_dir>/form/Files/Amps/amp0l
       <output_dir>/form/Files/Amps/amp1l
 
-    Writes chunked evaluate drivers:
-      simplify_amplitude_eval_JkofN.frm
+    Writes batched evaluate and DiracSimplify drivers, ready for core.parallel.run_jobs
+    (the "tasks" lists of the result):
+      simplify_amplitude_eval_BkofN.frm, dirac_simplify_both_BkofN.frm
 
     IMPORTANT: DiracSimplify is NOT part of evaluation anymore.
     """
+    from glaslib.core.costs import stage_weights
+    from glaslib.core.parallel import batch_tag, effective_jobs, partition_items
+
     output_dir = Path(output_dir).resolve()
     meta_path = output_dir / "meta.json"
     if not meta_path.exists():
@@ -692,26 +813,37 @@ def prepare_form_project(output_dir: Path, *, jobs: int = 1) -> Dict[str, Any]:
     # Copy diagram files into form Files/
     shutil.copy2(str(tree_main), str(files_dir / f"{tag}0l"))
     shutil.copy2(str(loop_main), str(files_dir / f"{tag}1l"))
+    split_diagram_file(tree_main, files_dir / "Diagrams" / "0l", index=m0.get("diagram_index"))
+    if m1.get("classes"):
+        # one file per class of identical diagrams, with the summed prefactor
+        if not index_matches(loop_main, m1.get("diagram_index")):
+            raise RuntimeError(f"{loop_main} changed since generate; its diagram classes are stale. Regenerate the run.")
+        write_class_diagrams(loop_main, m1["diagram_index"], classes_from_meta(m1["classes"]), files_dir / "Diagrams" / "1l")
+    else:
+        split_diagram_file(loop_main, files_dir / "Diagrams" / "1l", index=m1.get("diagram_index"))
 
-    # clamp jobs to n0l (avoid empty tree chunks)
     jobs_requested = max(1, int(jobs))
-    jobs_effective = max(1, min(jobs_requested, n0l or 1))
-
-    eval_drivers: Dict[int, Path] = {}
-    dirac_drivers: Dict[int, Path] = {}
+    jobs_effective = effective_jobs(max(n0l, n1l), jobs_requested)
 
     meta["tree_main"] = f"{tag}0l"
     meta["loop_main"] = f"{tag}1l"
     meta["mand_define"] = mand_define_line
     meta_path.write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
 
-    for j in range(1, jobs_effective + 1):
-        # tree chunk based on n0l
-        i0, i1 = _chunk_range_1based(n0l, jobs_effective, j)
-        # loop chunk distributed over same number of jobs (can be empty if n1l is small)
-        j0, j1 = _chunk_range_1based(n1l, jobs_effective, j)
+    # Tree and loop diagrams go into separate batches for the run_jobs queue,
+    # weighted like the evaluate command (previous timings, else diagram sizes).
+    batches: List[Tuple[List[int], List[int]]] = []
+    for mode, total, sub in (("lo", n0l, "0l"), ("nlo", n1l, "1l")):
+        items = list(range(1, total + 1))
+        diagrams = files_dir / "Diagrams" / sub
+        weights = stage_weights(form_dir, f"evaluate_{mode}", items, lambda i: [diagrams / f"d{i}.h"])
+        for indices in partition_items(items, jobs_effective, weights=weights):
+            batches.append((indices, []) if mode == "lo" else ([], indices))
 
-        drv = form_dir / f"simplify_amplitude_eval_J{j}of{jobs_effective}.frm"
+    eval_drivers: Dict[int, Path] = {}
+    dirac_drivers: Dict[int, Path] = {}
+    for k, (tree, loop) in enumerate(batches, start=1):
+        drv = form_dir / f"{batch_tag('simplify_amplitude_eval', k, len(batches))}.frm"
         _write_evaluate_driver(
             dst=drv,
             incdir=incdir,
@@ -719,14 +851,12 @@ def prepare_form_project(output_dir: Path, *, jobs: int = 1) -> Dict[str, Any]:
             n0l=n0l,
             n1l=n1l,
             mand_define_line=mand_define_line,
-            i0=i0,
-            i1=i1,
-            j0=j0,
-            j1=j1,
+            tree=tree,
+            loop=loop,
         )
-        eval_drivers[j] = drv
+        eval_drivers[k] = drv
 
-        dirac_drv = form_dir / f"dirac_simplify_both_J{j}of{jobs_effective}.frm"
+        dirac_drv = form_dir / f"{batch_tag('dirac_simplify_both', k, len(batches))}.frm"
         _write_dirac_driver(
             dst=dirac_drv,
             incdir=incdir,
@@ -734,12 +864,10 @@ def prepare_form_project(output_dir: Path, *, jobs: int = 1) -> Dict[str, Any]:
             n0l=n0l,
             n1l=n1l,
             mand_define_line=mand_define_line,
-            i0=i0,
-            i1=i1,
-            j0=j0,
-            j1=j1,
+            tree=tree,
+            loop=loop,
         )
-        dirac_drivers[j] = dirac_drv
+        dirac_drivers[k] = dirac_drv
 
     return {
         "jobs_requested": jobs_requested,
@@ -749,10 +877,12 @@ def prepare_form_project(output_dir: Path, *, jobs: int = 1) -> Dict[str, Any]:
             "form_dir": form_dir,
             "drivers": eval_drivers,
             "jobs_effective": jobs_effective,
+            "tasks": [(batch_tag("evaluate", k, len(batches)), form_dir, drv) for k, drv in eval_drivers.items()],
         },
         "dirac": {
             "form_dir": form_dir,
             "drivers": dirac_drivers,
             "jobs_effective": jobs_effective,
+            "tasks": [(batch_tag("DiracSimplify", k, len(batches)), form_dir, drv) for k, drv in dirac_drivers.items()],
         },
     }
@@ -7,6 +7,8 @@ import subprocess
 from pathlib import Path
 from typing import Any, Tuple, Dict, List, Optional
 
+from glaslib.core.parallel import form_pair_loops
+
 
 def _split_process(process_str: str) -> Tuple[List[str], List[str]]:
     s = process_str.strip()
@@ -67,27 +69,24 @@ def _ensure_symlink_or_copy(src: Path, dst: Path) -> None:
         shutil.copytree(src, dst)
 
 
-def _count_m0m0_pairs(m0m0_dir: Path) -> Tuple[int, int]:
+def _list_m0m0_pairs(m0m0_dir: Path) -> List[Tuple[int, int]]:
     """
-    Infers max i and max j from Files/M0M0/dixj.h files.
-    Assumes square (same range), returns (imax, jmax).
+    Lists the (i, j) of the Files/M0M0/dixj.h files.
+    Works for the full square and for the upper triangle written by contractLO
+    (off-diagonal files already hold 2*Re), since the files sum to |M0|^2 either way.
     """
     pat = re.compile(r"^d(\d+)x(\d+)\.h$")
-    imax = 0
-    jmax = 0
+    pairs: List[Tuple[int, int]] = []
     for f in m0m0_dir.iterdir():
         if not f.is_file():
             continue
         m = pat.match(f.name)
         if not m:
             continue
-        i = int(m.group(1))
-        j = int(m.group(2))
-        imax = max(imax, i)
-        jmax = max(jmax, j)
-    if imax == 0 or jmax == 0:
+        pairs.append((int(m.group(1)), int(m.group(2))))
+    if not pairs:
         raise FileNotFoundError(f"No M0M0 pair files found in {m0m0_dir} (expected d1x1.h etc.)")
-    return imax, jmax
+    return sorted(pairs)
 
 
 def _mand_define_from_process(process_str: str) -> str:
@@ -244,8 +243,7 @@ def _write_driver(
     b_val: int,
     nhext_val: int,
     ng_val: int,
-    imax: int,
-    jmax: int,
+    pairs: List[Tuple[int, int]],
     mul_line: str,
     out_subdir: str,
     nyuk_val: int = 0,
@@ -256,6 +254,9 @@ def _write_driver(
 #define ng "{ng_val}\""""
     if nyuk_val > 0:
         defines += f'\n#define nyuk "{nyuk_val}"'
+    j_defines, i_range, j_range = form_pair_loops(pairs)
+    if j_defines:
+        defines += "\n" + j_defines
     
     frm_path = form_dir / name
     frm_path.write_text(
@@ -273,8 +274,8 @@ Off Statistics;
     .sort 
 PolyRatFun rat;
 
-#do i =1, {imax}
-#do j =1, {jmax}
+#do i = {i_range}
+#do j = {j_range}
 
 #include Files/M0M0/d`i'x`j'.h
     .sort
@@ -326,7 +327,7 @@ def prepare_getct_projects(output_dir: Path, *, form_exe: str = "form") -> Dict[
     procs = _resolve_procedures_dir(project_root)
     _ensure_symlink_or_copy(procs, form_dir / "procedures")
 
-    imax, jmax = _count_m0m0_pairs(m0m0_dir)
+    pairs = _list_m0m0_pairs(m0m0_dir)
 
     # b = (gs power of one-loop amplitude) - 1  (independent now)
     gs_power_1l = _read_gs_power_1l(output_dir, process_str, form_exe=form_exe)
@@ -364,8 +365,7 @@ def prepare_getct_projects(output_dir: Path, *, form_exe: str = "form") -> Dict[
         b_val=b_val,
         nhext_val=nhext_val,
         ng_val=ng_val,
-        imax=imax,
-        jmax=jmax,
+        pairs=pairs,
         mul_line=mul_vas,
         out_subdir="Vas",
     )
@@ -376,8 +376,7 @@ def prepare_getct_projects(output_dir: Path, *, form_exe: str = "form") -> Dict[
         b_val=b_val,
         nhext_val=nhext_val,
         ng_val=ng_val,
-        imax=imax,
-        jmax=jmax,
+        pairs=pairs,
         mul_line=mul_vzt,
         out_subdir="Vzt",
     )
@@ -388,8 +387,7 @@ def prepare_getct_projects(output_dir: Path, *, form_exe: str = "form") -> Dict[
         b_val=b_val,
         nhext_val=nhext_val,
         ng_val=ng_val,
-        imax=imax,
-        jmax=jmax,
+        pairs=pairs,
         mul_line=mul_vg,
         out_subdir="Vg",
     )
@@ -408,8 +406,7 @@ def prepare_getct_projects(output_dir: Path, *, form_exe: str = "form") -> Dict[
             b_val=b_val,
             nhext_val=nhext_val,
             ng_val=ng_val,
-            imax=imax,
-            jmax=jmax,
+            pairs=pairs,
             mul_line=mul_vyuk,
             out_subdir="Vyuk",
             nyuk_val=nyuk_val,
@@ -427,8 +424,7 @@ def prepare_getct_projects(output_dir: Path, *, form_exe: str = "form") -> Dict[
         f"nhext={nhext_val}\n"
         f"ng={ng_val}\n"
         f"nyuk={nyuk_val}\n"
-        f"imax={imax}\n"
-        f"jmax={jmax}\n",
+        f"m0m0_pairs={len(pairs)}\n",
         encoding="utf-8",
     )
 
@@ -5,10 +5,12 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from glaslib.generate_diagrams import parse_process
+from glaslib.colorbasis import color_setup
 from glaslib.contractLO import _collect_gluon_momenta, _write_gluon_polarization_section
 from glaslib.core.paths import ensure_symlink_or_copy, procedures_dir
 from glaslib.core.run_manager import RunContext
-from glaslib.core.parallel import run_jobs
+from glaslib.core.pairs import m0m0_pairs
+from glaslib.core.parallel import form_pair_loops, run_jobs
 from glaslib.core.models import get_mass_for_particle
 
 
@@ -31,6 +33,10 @@ def _particles_from_meta(meta: Dict[str, Any]) -> List[Dict[str, str]]:
     return []
 
 
+# Leg relabelling applied to amp and ampC before the color insertions.
+LEG_RELABEL = "Mul replace_(a6,a5,b6,b5,b3,b2,a3,a2,a2,a3,b2,b3);"
+
+
 def _t_definition(idx: int, token: str, side: str) -> str:
     tok = token.lower()
     side = side.lower()
@@ -66,36 +72,24 @@ def _build_driver_text(
     gluon_count: int,
     output_rel: str,
     form_output_rel: str,
+    color: Dict[str, str],
 ) -> str:
     pol_section = pol_block.rstrip() + "\n" if pol_block.strip() else ""
     pol_call = f"#call PolarizationSums({gluon_count})\n" if gluon_count > 0 else ""
-    return f"""#-
-#: IncDir {incdir}
-#: SmallExtension 100M
-#: MaxTermSize    10M
-#: WorkSpace      1G
-Off Statistics;
-#define n0l "{n0l}"
-#define in1 "{leg_i}"
-#define in2 "{leg_j}"
+    if color["corr"]:
+        # color-stripped trees: <cb(k)|T_in1.T_in2|cbC(l)> comes from the ccor table
+        color_block = f"""#call RationalFunction
 
-{mand_define}
-#include declarations.h
     .sort 
-
-#do i =1, `n0l'
-
-#include Files/Amps/amp0l/d`i'.h
-    .sort
-#enddo
+Mul ampC;
     .sort 
 
-L amp = d1+...+d`n0l';
-L ampC = dC1+...+dC`n0l';
-    .sort 
-Drop d1,...,d`n0l',dC1,...,dC`n0l';
+Drop ampC;
 
-Mul replace_(a6,a5,b6,b5,b3,b2,a3,a2,a2,a3,b2,b3);
+{color["corr"]}
+"""
+    else:
+        color_block = f"""{LEG_RELABEL}
 id rat(x1?,x2?) = x1*den(x2);
 #call RationalFunction
 
@@ -120,7 +114,35 @@ Mul ampC;
 Drop ampC;
 
 #call color
+"""
+    return f"""#-
+#: IncDir {incdir}
+#: SmallExtension 100M
+#: MaxTermSize    10M
+#: WorkSpace      1G
+Off Statistics;
+#define n0l "{n0l}"
+#define in1 "{leg_i}"
+#define in2 "{leg_j}"
+
+{mand_define}
+#include declarations.h
+{color["tables"]}
+    .sort 
+
+#do i =1, `n0l'
+
+#include {color["amps"]}/amp0l/d`i'.h
+    .sort
+#enddo
+    .sort 
+
+L amp = d1+...+d`n0l';
+L ampC = dC1+...+dC`n0l';
+    .sort 
+Drop d1,...,d`n0l',dC1,...,dC`n0l';
 
+{color_block}
 {pol_section}{pol_call}
 `mand'
 #call PolarizationSums(5)
@@ -210,6 +232,7 @@ def prepare_ir_file(ctx: RunContext, *, leg_i: int, leg_j: int, gluon_refs: Opti
             gluon_count=len(gluon_moms),
             output_rel=output_rel,
             form_output_rel=form_output_rel,
+            color=color_setup(form_dir, ("amp0l",)),
         ),
         encoding="utf-8",
     )
@@ -631,6 +654,7 @@ def prepare_total_lo(ctx: RunContext) -> Dict[str, Any]:
     form_files_dir = form_dir / "Files" / "TotalLO"
     form_files_dir.mkdir(parents=True, exist_ok=True)
     driver = form_dir / "TotalLO.frm"
+    j_defines, i_range, j_range = form_pair_loops(m0m0_pairs(meta))
 
     text = f"""#-
 #: IncDir {incdir}
@@ -639,20 +663,21 @@ def prepare_total_lo(ctx: RunContext) -> Dict[str, Any]:
 #: WorkSpace      1G
 Off Statistics;
 #define n0l "{n0l}"
+{j_defines}
 
 #include declarations.h
     .sort
-* load all M0M0 pieces
-#do i=1,`n0l'
-#do j=1,`n0l'
+* load all M0M0 pieces (upper triangle with 2*Re off-diagonal, or the full square)
+#do i = {i_range}
+#do j = {j_range}
   #include Files/M0M0/d`i'x`j'.h
     .sort
 #enddo
 #enddo
 
 L TotalLO =
-#do i=1,`n0l'
-#do j=1,`n0l'
+#do i = {i_range}
+#do j = {j_range}
  + d`i'x`j'
 #enddo
 #enddo
@@ -2,9 +2,20 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any, Dict, Tuple
-
-from glaslib.core.parallel import chunk_range_1based, effective_jobs
+from typing import Any, Dict, List, Optional, Tuple
+
+from glaslib.core.costs import reset_timings, stage_weights, timing_write_line
+from glaslib.formscan import topology_index
+from glaslib.formtables import IBP_APPLY, ibp_setup
+from glaslib.core.pairs import m0m1_pairs
+from glaslib.core.parallel import (
+    batch_tag,
+    effective_jobs,
+    form_do_range,
+    form_pair_loops,
+    partition_items,
+    plan_batches,
+)
 
 
 class ReduceConfigError(Exception):
@@ -61,10 +72,36 @@ def _validate_micoef_inputs(form_dir: Path, n0l: int, n1l: int, nmis: int) -> No
         raise ReduceConfigError(f"Missing {m0m1red} (run 'reduce' first)")
 
 
-def prepare_reduce_project(run_dir: Path, *, jobs: int = 1) -> Dict[str, Any]:
+# Reduction of pair (i,j): M0M1top -> IBP tables of its topologies -> symmetry relations.
+_IBP_BODY = """#include Files/M0M1top/d`i'x`j'.h
+    .sort 
+""" + IBP_APPLY + """
+    .sort 
+
+#include Files/SymmetryRelations.h
+    .sort 
+id rat(x1?,x2?) = x1*den(x2);
+    .sort
+#call RationalFunction
+repeat id s12?{s12,s23,s34,s45,s15,s13,s14,mt}^-1 = den(s12);
+    .sort"""
+
+
+def prepare_reduce_project(
+    run_dir: Path,
+    *,
+    jobs: int = 1,
+    batch_size: Optional[int] = None,
+    static: bool = False,
+) -> Dict[str, Any]:
     """
-    Generate chunked FORM drivers for final reduction (M0M1top -> M0M1Reduced).
-    Splits outer i=1..n0l across jobs; inner loops cover all j=1..n1l and k=1..ntop.
+    Generate batched FORM drivers for final reduction (M0M1top -> M0M1Reduced).
+    Cuts the (i,j) pairs of M0M1top (see glaslib.core.pairs) into small batches for a pool of `jobs`
+    workers, weighted by previous timings or the size of M0M1top/d<i>x<j>.h
+    (static=True: LPT-packed into `jobs` drivers). Each driver loads the IBP
+    tables (Files/IBP/Table<k>.h, see glaslib.formtables) of the topologies its
+    pairs contain (Files/M0M1top/topologies.json, see glaslib.formscan.topology_index)
+    and every GLI is replaced by a table lookup.
     """
     run_dir = Path(run_dir).resolve()
     meta = _load_meta(run_dir)
@@ -86,15 +123,21 @@ def prepare_reduce_project(run_dir: Path, *, jobs: int = 1) -> Dict[str, Any]:
     m0m1red_math.mkdir(parents=True, exist_ok=True)
 
     jobs_requested = max(1, int(jobs))
-    jobs_effective = effective_jobs(n0l, jobs_requested)
+    pairs = m0m1_pairs(meta)
+    jobs_effective = effective_jobs(len(pairs), jobs_requested)
 
     drivers: Dict[int, Path] = {}
-    for k in range(1, jobs_effective + 1):
-        i0, i1 = chunk_range_1based(n0l, jobs_effective, k)
-        if i0 > i1:
-            continue
-
-        frm = form_dir / f"reduce_J{k}of{jobs_effective}.frm"
+    stage = "reduce"
+    weights = stage_weights(form_dir, stage, pairs, lambda p: [files_dir / "M0M1top" / f"d{p[0]}x{p[1]}.h"])
+    reset_timings(form_dir, stage)
+    tops = topology_index(files_dir / "M0M1top", pairs)
+    batches = partition_items(pairs, jobs_effective, weights=weights, batch_size=batch_size, static=static)
+    for k, batch in enumerate(batches, start=1):
+        tag = batch_tag("reduce", k, len(batches), static)
+        frm = form_dir / f"{tag}.frm"
+        j_defines, i_range, j_range = form_pair_loops(batch)
+        top_defines = "\n".join(f'#define tops{i}x{j} "{form_do_range(tops[(i, j)])}"' for i, j in batch)
+        ibp = ibp_setup(files_dir, (top for p in batch for top in tops[p]))
         frm.write_text(
             f"""#-
 #: IncDir procedures
@@ -106,26 +149,14 @@ Off Statistics;
 #define n0l \"{n0l}\"
 #define n1l \"{n1l}\"
 #define ntop \"{ntop}\"
+{j_defines}
+{top_defines}
+{ibp["load"]}
 .sort
-#do i ={i0},{i1}
-#do j =1,`n1l'
+#do i ={i_range}
+#do j ={j_range}
 
-#include Files/M0M1top/d`i'x`j'.h
-
-#do k = 1, `ntop'
-if (match(GLI(top`k',?a)));
-#include Files/IBP/IBP`k'.h
-endif;
-    .sort 
-#enddo 
-
-#include Files/SymmetryRelations.h
-    .sort 
-id rat(x1?,x2?) = x1*den(x2);
-    .sort
-#call RationalFunction
-repeat id s12?{{s12,s23,s34,s45,s15,s13,s14,mt}}^-1 = den(s12);
-    .sort
+{_IBP_BODY}
 Format;
 b GLI, ep,gs,PaVeFun, den;
     .sort 
@@ -141,6 +172,7 @@ b GLI, ep,gs,PaVeFun, den;
 Drop; 
     .sort 
 #message Reduced d`i'x`j' saved.
+{timing_write_line(stage, tag)}
 #enddo 
 #enddo 
 .end
@@ -153,80 +185,18 @@ Drop;
         "form_dir": form_dir,
         "jobs_requested": jobs_requested,
         "jobs_effective": jobs_effective,
+        "static": static,
         "drivers": drivers,
     }
 
 
-def prepare_micoef_project(run_dir: Path, *, jobs: int = 1) -> Dict[str, Any]:
-    """
-    Generate chunked FORM drivers for master integral coefficient extraction.
-    
-    This function generates:
-    1. MasterCoefficients_J{k}of{N}.frm - Parallel drivers chunked by n0l (tree diagrams)
-    2. SumMasterCoefs_J{k}of{N}.frm - Parallel drivers to sum coefficients, chunked by nmis (master integrals)
-    """
-    run_dir = Path(run_dir).resolve()
-    meta = _load_meta(run_dir)
-
-    n0l = int(meta.get("n0l", 0) or 0)
-    n1l = int(meta.get("n1l", 0) or 0)
-    nmis = int(meta.get("nmis", 0) or 0)
-
-    form_dir = run_dir / "form"
-    files_dir = form_dir / "Files"
-
-    _validate_micoef_inputs(form_dir, n0l, n1l, nmis)
-
-    # Create output directories for master coefficients
-    master_form = files_dir / "MasterCoefficients"
-    master_form.mkdir(parents=True, exist_ok=True)
-
-    master_math = run_dir / "Mathematica" / "Files" / "MasterCoefficients"
-    master_math.mkdir(parents=True, exist_ok=True)
-
-    for k in range(1, nmis + 1):
-        (master_form / f"mi{k}").mkdir(parents=True, exist_ok=True)
-        (master_math / f"mi{k}").mkdir(parents=True, exist_ok=True)
-
-    jobs_requested = max(1, int(jobs))
-    
-    # MasterCoefficients: parallelized by n0l (tree diagrams)
-    jobs_eff_master = effective_jobs(n0l, jobs_requested)
-    
-    # SumMasterCoefs: parallelized by nmis (master integrals)
-    jobs_eff_sum = effective_jobs(nmis, jobs_requested)
-
-    # Generate parallel MasterCoefficients drivers (chunked by i = 1..n0l)
-    master_drivers: Dict[int, Path] = {}
-    for jidx in range(1, jobs_eff_master + 1):
-        i0, i1 = chunk_range_1based(n0l, jobs_eff_master, jidx)
-        if i0 > i1:
-            continue
-
-        frm = form_dir / f"MasterCoefficients_J{jidx}of{jobs_eff_master}.frm"
-        frm.write_text(
-            f"""#-
-#: IncDir procedures
-#: SmallExtension 100M
-#: MaxTermSize    10M
-#: WorkSpace      1G
-Off Statistics;
-
-#define n1l \"{n1l}\"
-#define n0l \"{n0l}\"
-#define nmis \"{nmis}\"
-
-#include declarations.h
-.sort
-
-#do i  = {i0},{i1}
-#do j  = 1,`n1l'
-#do k  = 1,`nmis'
+# MasterCoefficients body for pair (i,j), one pass per master integral k.
+_PER_MASTER_BODY = """#do k  = 1,`nmis'
 #include Files/M0M1Reduced/d`i'x`j'.h
 #include Files/MastersToSym.h 
 id mis`k' = 1;
 .sort 
-id mis?{{mis1,...,mis`nmis'}} = 0;
+id mis?{mis1,...,mis`nmis'} = 0;
     .sort 
 Mul mis`k'; 
     .sort
@@ -236,38 +206,80 @@ Mul mis`k';
 Format;
 b GLI, ep,gs,PaVeFun,den,rat;
     .sort 
-#write <Files/MasterCoefficients/mi`k'/d`i'x`j'.h> \"l d`i'x`j' = (%E ); \\n\" d`i'x`j'
+#write <Files/MasterCoefficients/mi`k'/d`i'x`j'.h> "l d`i'x`j' = (%E ); \\n" d`i'x`j'
     .sort 
 id i_ = I;
 Format mathematica; 
 b GLI, ep,gs,PaVeFun,den,rat;
     .sort
-#write <../Mathematica/Files/MasterCoefficients/mi`k'/d`i'x`j'.m> \"d[`i',`j'] = (%E ); \\n\" d`i'x`j'
+#write <../Mathematica/Files/MasterCoefficients/mi`k'/d`i'x`j'.m> "d[`i',`j'] = (%E ); \\n" d`i'x`j'
 
     .sort 
 Drop; 
     .sort 
 #message Master coefficient of d`i'x`j' for mi`k' saved.
+#enddo"""
+
+# MasterCoefficients body for the reduced pair d<i>x<j> in memory: all nmis coefficients
+# from one bracketed pass. B+ indexes the brackets, so each d`i'x`j'[mis`k'] is a direct lookup
+# instead of a scan of the expression. Terms without a master symbol go to every coefficient,
+# as in the per-master body.
+_MASTER_SPLIT_BODY = """#include Files/MastersToSym.h 
+B+ mis1,...,mis`nmis';
+    .sort 
+#do k  = 1,`nmis'
+Local mi`k'x = (d`i'x`j'[mis`k'] + d`i'x`j'[1])*mis`k';
 #enddo
+    .sort 
+Drop d`i'x`j';
+#include Files/SymToMasters.h
+    .sort
+#call rationals
+Format;
+b GLI, ep,gs,PaVeFun,den,rat;
+    .sort 
+#do k  = 1,`nmis'
+#write <Files/MasterCoefficients/mi`k'/d`i'x`j'.h> "l d`i'x`j' = (%E ); \\n" mi`k'x
 #enddo
+    .sort 
+id i_ = I;
+Format mathematica; 
+b GLI, ep,gs,PaVeFun,den,rat;
+    .sort
+#do k  = 1,`nmis'
+#write <../Mathematica/Files/MasterCoefficients/mi`k'/d`i'x`j'.m> "d[`i',`j'] = (%E ); \\n" mi`k'x
 #enddo
 
-b PaVeFun,ep,gs; 
-Print; 
-    .end
-""",
-            encoding="utf-8",
-        )
-        master_drivers[jidx] = frm
+    .sort 
+Drop; 
+    .sort 
+#message Master coefficients of d`i'x`j' saved."""
+_SINGLE_PASS_BODY = "#include Files/M0M1Reduced/d`i'x`j'.h\n" + _MASTER_SPLIT_BODY
 
-    # Generate parallel SumMasterCoefs drivers (chunked by k = 1..nmis)
-    sum_drivers: Dict[int, Path] = {}
-    for jidx in range(1, jobs_eff_sum + 1):
-        k0, k1 = chunk_range_1based(nmis, jobs_eff_sum, jidx)
-        if k0 > k1:
-            continue
 
-        frm = form_dir / f"SumMasterCoefs_J{jidx}of{jobs_eff_sum}.frm"
+def _write_sum_drivers(
+    form_dir: Path, meta: Dict[str, Any], n0l: int, n1l: int, nmis: int, jobs_eff_sum: int
+) -> Dict[int, Path]:
+    """SumMasterCoefs batch drivers (batched by k = 1..nmis) over MasterCoefficients/mi<k>."""
+    sum_drivers: Dict[int, Path] = {}
+    sum_batches = plan_batches(nmis, jobs_eff_sum)
+    # only the pairs of m0m1_pairs have coefficient files (zero pairs are skipped)
+    pairs = m0m1_pairs(meta)
+    rows: Dict[int, List[int]] = {}
+    for i, j in pairs:
+        rows.setdefault(i, []).append(j)
+    j_defines, born_range, j_range = form_pair_loops(pairs)
+    d_defines = "\n".join(
+        f'#define dsum{i} "{"+".join(f"d{i}x{j}" for j in js)}"' for i, js in rows.items()
+    )
+    d_defines += "\n" + "\n".join(
+        f'#define dlist{i} "{",".join(f"d{i}x{j}" for j in js)}"' for i, js in rows.items()
+    )
+    coef_sum = "+".join(f"coef`k'x{i}" for i in rows) or "0"
+    coef_list = ",".join(f"coef`k'x{i}" for i in rows)
+    coef_drop = f"Drop {coef_list};\n    .sort\n" if rows else ""
+    for jidx, (k0, k1) in enumerate(sum_batches, start=1):
+        frm = form_dir / f"{batch_tag('SumMasterCoefs', jidx, len(sum_batches))}.frm"
         frm.write_text(
             f"""#-
 #: IncDir procedures
@@ -279,29 +291,29 @@ Off Statistics;
 #define n1l \"{n1l}\"
 #define n0l \"{n0l}\"
 #define nmis \"{nmis}\"
+{j_defines}
+{d_defines}
 
 #include declarations.h
 .sort
 
 #do k = {k0},{k1}
-#do i = 1, `n0l'
-#do j = 1, `n1l'
+#do i = {born_range}
+#do j = {j_range}
 
 #include Files/MasterCoefficients/mi`k'/d`i'x`j'.h
     .sort
 id rat(?a) = Rat(?a);
     .sort
 #enddo
-l coef`k'x`i' = d`i'x1+...+d`i'x`n1l';
+l coef`k'x`i' = `dsum`i'';
     .sort
-Drop d`i'x1,...,d`i'x`n1l';
+Drop `dlist`i'';
     .sort
 #enddo
-l coef`k' = coef`k'x1+...+coef`k'x`n0l';
+l coef`k' = {coef_sum};
     .sort
-Drop coef`k'x1,...,coef`k'x`n0l';
-    .sort
-PolyratFun rat; 
+{coef_drop}PolyratFun rat; 
 #do i = 1,1
     .sort 
 ab A0, B0, C0, D0,den,ep;
@@ -332,13 +344,223 @@ Print;
         )
         sum_drivers[jidx] = frm
 
+    return sum_drivers
+
+
+def prepare_micoef_project(
+    run_dir: Path,
+    *,
+    jobs: int = 1,
+    batch_size: Optional[int] = None,
+    static: bool = False,
+    per_master: bool = False,
+) -> Dict[str, Any]:
+    """
+    Generate batched FORM drivers for master integral coefficient extraction.
+    
+    This function generates:
+    1. MasterCoefficients_B{k}of{N}.frm - Batch drivers over (i,j) pairs (tree x loop diagrams)
+    2. SumMasterCoefs_B{k}of{N}.frm - Batch drivers to sum coefficients, batched by nmis (master integrals)
+
+    Batches are queued on a pool of `jobs` FORM workers. MasterCoefficients
+    pairs are weighted by previous timings or the size of M0M1Reduced/d<i>x<j>.h
+    (static=True: LPT-packed into `jobs` drivers, named _J{k}of{N}).
+
+    Each reduced pair is read once, bracketed in mis1..mis<nmis> and all nmis
+    coefficients are written from that pass. per_master=True keeps the old
+    driver body that re-reads the pair once per master integral.
+    """
+    run_dir = Path(run_dir).resolve()
+    meta = _load_meta(run_dir)
+
+    n0l = int(meta.get("n0l", 0) or 0)
+    n1l = int(meta.get("n1l", 0) or 0)
+    nmis = int(meta.get("nmis", 0) or 0)
+
+    form_dir = run_dir / "form"
+    files_dir = form_dir / "Files"
+
+    _validate_micoef_inputs(form_dir, n0l, n1l, nmis)
+
+    # Create output directories for master coefficients
+    master_form = files_dir / "MasterCoefficients"
+    master_form.mkdir(parents=True, exist_ok=True)
+
+    master_math = run_dir / "Mathematica" / "Files" / "MasterCoefficients"
+    master_math.mkdir(parents=True, exist_ok=True)
+
+    for k in range(1, nmis + 1):
+        (master_form / f"mi{k}").mkdir(parents=True, exist_ok=True)
+        (master_math / f"mi{k}").mkdir(parents=True, exist_ok=True)
+
+    jobs_requested = max(1, int(jobs))
+    
+    # MasterCoefficients: batched over the (i,j) pairs of M0M1Reduced
+    pairs = m0m1_pairs(meta)
+    jobs_eff_master = effective_jobs(len(pairs), jobs_requested)
+    
+    # SumMasterCoefs: parallelized by nmis (master integrals)
+    jobs_eff_sum = effective_jobs(nmis, jobs_requested)
+
+    # Generate MasterCoefficients batch drivers (rectangles of the (i,j) grid)
+    master_drivers: Dict[int, Path] = {}
+    stage = "micoef"
+    weights = stage_weights(form_dir, stage, pairs, lambda p: [files_dir / "M0M1Reduced" / f"d{p[0]}x{p[1]}.h"])
+    reset_timings(form_dir, stage)
+    master_batches = partition_items(pairs, jobs_eff_master, weights=weights, batch_size=batch_size, static=static)
+    master_body = _PER_MASTER_BODY if per_master else _SINGLE_PASS_BODY
+    for jidx, batch in enumerate(master_batches, start=1):
+        tag = batch_tag("MasterCoefficients", jidx, len(master_batches), static)
+        frm = form_dir / f"{tag}.frm"
+        j_defines, i_range, j_range = form_pair_loops(batch)
+        frm.write_text(
+            f"""#-
+#: IncDir procedures
+#: SmallExtension 100M
+#: MaxTermSize    10M
+#: WorkSpace      1G
+Off Statistics;
+
+#define n1l \"{n1l}\"
+#define n0l \"{n0l}\"
+#define nmis \"{nmis}\"
+{j_defines}
+
+#include declarations.h
+.sort
+
+#do i  = {i_range}
+#do j  = {j_range}
+{master_body}
+{timing_write_line(stage, tag)}
+#enddo
+#enddo
+
+b PaVeFun,ep,gs; 
+Print; 
+    .end
+""",
+            encoding="utf-8",
+        )
+        master_drivers[jidx] = frm
+
+    sum_drivers = _write_sum_drivers(form_dir, meta, n0l, n1l, nmis, jobs_eff_sum)
+
     return {
         "form_dir": form_dir,
         "jobs_requested": jobs_requested,
         "jobs_eff_master": jobs_eff_master,
         "jobs_eff_sum": jobs_eff_sum,
+        "static": static,
         "n0l": n0l,
         "nmis": nmis,
         "master_drivers": master_drivers,
         "sum_drivers": sum_drivers,
     }
+
+
+def prepare_fused_project(
+    run_dir: Path,
+    *,
+    jobs: int = 1,
+    batch_size: Optional[int] = None,
+    static: bool = False,
+    keep_reduced: bool = False,
+) -> Dict[str, Any]:
+    """
+    Generate batched FORM drivers that reduce and split into master coefficients in one pass
+    (M0M1top -> MasterCoefficients/mi<k>), plus the usual SumMasterCoefs drivers.
+
+    Each pair runs the reduce body (IBP tables of its topologies, symmetry relations)
+    and then the single-pass master bracketing on the expression still in memory, so
+    M0M1Reduced is neither written nor read back. keep_reduced=True also writes
+    M0M1Reduced/d<i>x<j>.h (FORM format only) for a later 'micoef'.
+    """
+    run_dir = Path(run_dir).resolve()
+    meta = _load_meta(run_dir)
+
+    n0l = int(meta.get("n0l", 0) or 0)
+    n1l = int(meta.get("n1l", 0) or 0)
+    ntop = int(meta.get("ntop", 0) or 0)
+    nmis = int(meta.get("nmis", 0) or 0)
+
+    form_dir = run_dir / "form"
+    files_dir = form_dir / "Files"
+
+    _validate_reduce_inputs(form_dir, n0l, n1l, ntop, nmis)
+
+    if keep_reduced:
+        (files_dir / "M0M1Reduced").mkdir(parents=True, exist_ok=True)
+    master_form = files_dir / "MasterCoefficients"
+    master_math = run_dir / "Mathematica" / "Files" / "MasterCoefficients"
+    for k in range(1, nmis + 1):
+        (master_form / f"mi{k}").mkdir(parents=True, exist_ok=True)
+        (master_math / f"mi{k}").mkdir(parents=True, exist_ok=True)
+
+    jobs_requested = max(1, int(jobs))
+    pairs = m0m1_pairs(meta)
+    jobs_effective = effective_jobs(len(pairs), jobs_requested)
+    jobs_eff_sum = effective_jobs(nmis, jobs_requested)
+
+    keep_block = ""
+    if keep_reduced:
+        keep_block = """Format;
+b GLI, ep,gs,PaVeFun, den;
+    .sort 
+#write <Files/M0M1Reduced/d`i'x`j'.h> "l d`i'x`j' = (%E ); \\n" d`i'x`j'
+"""
+
+    drivers: Dict[int, Path] = {}
+    stage = "reduce_micoef"
+    weights = stage_weights(form_dir, stage, pairs, lambda p: [files_dir / "M0M1top" / f"d{p[0]}x{p[1]}.h"])
+    reset_timings(form_dir, stage)
+    tops = topology_index(files_dir / "M0M1top", pairs)
+    batches = partition_items(pairs, jobs_effective, weights=weights, batch_size=batch_size, static=static)
+    for k, batch in enumerate(batches, start=1):
+        tag = batch_tag("ReduceMicoef", k, len(batches), static)
+        frm = form_dir / f"{tag}.frm"
+        j_defines, i_range, j_range = form_pair_loops(batch)
+        top_defines = "\n".join(f'#define tops{i}x{j} "{form_do_range(tops[(i, j)])}"' for i, j in batch)
+        ibp = ibp_setup(files_dir, (top for p in batch for top in tops[p]))
+        frm.write_text(
+            f"""#-
+#: IncDir procedures
+#: SmallExtension 100M
+#: MaxTermSize    10M
+#: WorkSpace      1G
+Off Statistics;
+#include declarations.h
+#define n0l \"{n0l}\"
+#define n1l \"{n1l}\"
+#define ntop \"{ntop}\"
+#define nmis \"{nmis}\"
+{j_defines}
+{top_defines}
+{ibp["load"]}
+.sort
+#do i ={i_range}
+#do j ={j_range}
+
+{_IBP_BODY}
+{keep_block}{_MASTER_SPLIT_BODY}
+{timing_write_line(stage, tag)}
+#enddo 
+#enddo 
+.end
+""",
+            encoding="utf-8",
+        )
+        drivers[k] = frm
+
+    sum_drivers = _write_sum_drivers(form_dir, meta, n0l, n1l, nmis, jobs_eff_sum)
+
+    return {
+        "form_dir": form_dir,
+        "jobs_requested": jobs_requested,
+        "jobs_effective": jobs_effective,
+        "jobs_eff_sum": jobs_eff_sum,
+        "static": static,
+        "nmis": nmis,
+        "drivers": drivers,
+        "sum_drivers": sum_drivers,
+    }
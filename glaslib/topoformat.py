@@ -2,44 +2,38 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
-
-
-def _chunk_range_1based(total: int, jobs: int, job_index: int) -> Tuple[int, int]:
-    """Compute inclusive 1-based range [start, end] for job_index of jobs."""
-    if total <= 0:
-        return 1, 0
-    base = total // jobs
-    rem = total % jobs
-    if job_index <= rem:
-        size = base + 1
-        start = (job_index - 1) * size + 1
-    else:
-        size = base
-        start = rem * (base + 1) + (job_index - rem - 1) * base + 1
-    end = start + size - 1
-    if size <= 0:
-        return 1, 0
-    return start, end
+from typing import Dict, Optional, Any
+
+from glaslib.core.costs import reset_timings, stage_weights, timing_write_line
+from glaslib.core.pairs import m0m1_pairs
+from glaslib.core.parallel import batch_tag, form_pair_loops, partition_items
+from glaslib.formtables import intrule_setup
 
 
 def prepare_topoformat_project(
     output_dir: Path,
     *,
     jobs: int = 1,
+    batch_size: Optional[int] = None,
+    static: bool = False,
 ) -> Dict[str, Any]:
     """
     Generate parallel ToTopos.frm drivers for topology extraction.
     
     Assumes:
       - Files/M0M1/ contains d<i>x<j>.h files from IBP reduction (M0×M1 contractions)
-      - Files/intrule.h exists (integral substitution rules)
+      - Files/intrule.h exists (integral substitution rules); it is loaded as the
+        FORM tables of Files/intruleTable.h (see glaslib.formtables), so the
+        substitution cost does not grow with the number of integrals
       - ../Mathematica/Files/M0M1top/ will receive .m output
       - ../Mathematica/Files/M0M1top/ will receive .h output
     
-    Chunking:
-      Outer loop i=1..n0l split across jobs; inner loop j always runs 1..n1l
-      Each job writes:
+    Batching:
+      The (i,j) pairs of M0M1 (i=0 only for the summed-Born contraction mode,
+      see glaslib.core.pairs) are cut into small batches queued on a
+      pool of `jobs` FORM workers, weighted by previous timings or by the size
+      of Files/M0M1/d<i>x<j>.h (static=True: LPT-packed into `jobs` drivers).
+      Each batch writes:
         - form/Files/M0M1top/d<i>x<j>.h (FORM format)
         - Mathematica/Files/M0M1top/d<i>x<j>.m (Mathematica format)
     """
@@ -73,6 +67,8 @@ def prepare_topoformat_project(
             f"Missing {intrule_file}. Run extract topologies (stage2) first."
         )
 
+    intrule = intrule_setup(files_dir)
+
     m0m1top_form = files_dir / "M0M1top"
     m0m1top_form.mkdir(parents=True, exist_ok=True)
 
@@ -80,16 +76,19 @@ def prepare_topoformat_project(
     m0m1top_math.mkdir(parents=True, exist_ok=True)
 
     jobs_requested = max(1, int(jobs))
-    jobs_effective = max(1, min(jobs_requested, n0l))
+    pairs = m0m1_pairs(meta)
+    jobs_effective = max(1, min(jobs_requested, len(pairs)))
 
     drivers: Dict[int, Path] = {}
 
-    for k in range(1, jobs_effective + 1):
-        i0, i1 = _chunk_range_1based(n0l, jobs_effective, k)
-        if i0 > i1:
-            continue
-
-        frm = form_dir / f"ToTopos_J{k}of{jobs_effective}.frm"
+    stage = "totopos"
+    weights = stage_weights(form_dir, stage, pairs, lambda p: [m0m1_dir / f"d{p[0]}x{p[1]}.h"])
+    reset_timings(form_dir, stage)
+    batches = partition_items(pairs, jobs_effective, weights=weights, batch_size=batch_size, static=static)
+    for k, batch in enumerate(batches, start=1):
+        tag = batch_tag("ToTopos", k, len(batches), static)
+        frm = form_dir / f"{tag}.frm"
+        j_defines, i_range, j_range = form_pair_loops(batch)
 
         frm.write_text(
             f"""#-
@@ -106,17 +105,18 @@ Cfun SPD(symmetric);
 .sort
 #define n1l "{n1l}"
 #define n0l "{n0l}"
+{j_defines}
+{intrule["load"]}
 
-
-#do i={i0},{i1}
-#do j=1,`n1l'
+#do i={i_range}
+#do j={j_range}
 
 #include Files/M0M1/d`i'x`j'.h
     .sort
-#include Files/intrule.h
+{intrule["apply"]}
     .sort
 
-if((occurs(LoopInt) == 1)||(occurs(SPD) == 1)||(occurs(lm1) == 1));
+if((occurs(LoopInt) == 1)||(occurs(intgli) == 1)||(occurs(SPD) == 1)||(occurs(lm1) == 1));
 exit "Loop integrals still present in raw form in d`i'xd`j'";
 
 else;
@@ -137,6 +137,7 @@ b GLI, ep,gs;
 #write <../Mathematica/Files/M0M1top/d`i'x`j'.m> "d[`i',`j'] = (%E ); \\n" d`i'x`j'
 
     .sort 
+{timing_write_line(stage, tag)}
 #enddo
 #enddo
 .end
@@ -149,5 +150,6 @@ b GLI, ep,gs;
         "form_dir": form_dir,
         "jobs_requested": jobs_requested,
         "jobs_effective": jobs_effective,
+        "static": static,
         "drivers": drivers,
     }
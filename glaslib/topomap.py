@@ -0,0 +1,559 @@
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from glaslib.core.models import get_mass_for_particle
+from glaslib.core.pairs import m0m1_pairs
+from glaslib.extend import canonicalize, extend_topology, format_linear, node_momentum, parse_linear, shift_of
+from glaslib.formscan import distinct_loop_integrals, form_to_mathematica, loop_denominators
+
+# One-loop topology mapping without FeynCalc (the work of extract_topologies_stage1.m,
+# extend.py and extract_topologies_stage2.m).
+#
+# The independent external momenta are p1..p<n-1> (p<n> is eliminated by momentum
+# conservation, as in the Mathematica stages), so a propagator is a shift vector q over
+# them plus a mass: D = (l+q)^2 - m^2. A topology (family) has n propagators, enough to
+# express l^2 and l.p1..l.p<n-1> linearly through the D_j. Denominator sets are
+# compared up to l -> +-l + s; integrals are mapped onto the largest family containing
+# their denominators and their numerators rewritten through the D_j, which gives
+# GLI(top<k>,nu1,...,nun) with negative indices for numerators.
+
+Poly = Dict[Tuple[int, ...], Fraction]
+Vec = Tuple[int, ...]
+Prop = Tuple[Vec, str]
+
+# independent invariants s_ij = (k_i+k_j)^2 (all momenta k incoming), as in mandIBP.m
+_INVARIANTS = {
+    4: [(1, 2), (1, 3)],
+    5: [(1, 2), (2, 3), (3, 4), (4, 5), (1, 5)],
+}
+
+
+# ---------------------------------------------------------------- polynomials
+
+
+def _padd(a: Poly, b: Poly, scale: Fraction = Fraction(1)) -> Poly:
+    out = dict(a)
+    for mono, c in b.items():
+        v = out.get(mono, Fraction(0)) + scale * c
+        if v:
+            out[mono] = v
+        else:
+            out.pop(mono, None)
+    return out
+
+
+def _pmul(a: Poly, b: Poly) -> Poly:
+    out: Poly = {}
+    for m1, c1 in a.items():
+        for m2, c2 in b.items():
+            mono = tuple(x + y for x, y in zip(m1, m2))
+            v = out.get(mono, Fraction(0)) + c1 * c2
+            if v:
+                out[mono] = v
+            else:
+                out.pop(mono, None)
+    return out
+
+
+def _pstr(p: Poly, names: Sequence[str]) -> str:
+    """Polynomial as FORM/Mathematica input, e.g. 1/2*s12-mt^2."""
+    if not p:
+        return "0"
+    out = ""
+    for mono in sorted(p, reverse=True):
+        c = p[mono]
+        factors = [n if e == 1 else f"{n}^{e}" for n, e in zip(names, mono) if e]
+        mag = abs(c)
+        if not factors:
+            term = str(mag)
+        elif mag == 1:
+            term = "*".join(factors)
+        else:
+            term = f"{mag}*" + "*".join(factors)
+        out += ("-" if c < 0 else ("+" if out else "")) + term
+    return out
+
+
+# ---------------------------------------------------------------- kinematics
+
+
+class Kinematics:
+    """
+    Scalar products of p1..p<n-1> as polynomials in the invariants of mandIBP.m
+    (s12, s13 for n=4; s12, s23, s34, s45, s15 for n=5) and mt.
+    """
+
+    def __init__(self, meta: dict) -> None:
+        parts = meta["particles"]
+        self.n = int(meta["n_in"]) + int(meta["n_out"])
+        if self.n not in _INVARIANTS:
+            raise ValueError(f"Python topology mapping supports 2->2 and 2->3 kinematics, not n={self.n}")
+        model_id = meta.get("model_id", "qcd_massive")
+        sign = [0] * (self.n + 1)
+        mass = [""] * (self.n + 1)
+        for part in parts:
+            k = int(str(part["momentum"]).lstrip("p"))
+            sign[k] = 1 if part.get("side") == "in" else -1
+            m = get_mass_for_particle(str(part.get("token", "")), model_id)
+            if m not in ("0", "mt"):
+                raise ValueError(f"external mass {m} of {part.get('token')} is not supported")
+            mass[k] = "" if m == "0" else m
+
+        given = _INVARIANTS[self.n]
+        self.names = [f"s{i}{j}" for i, j in given] + ["mt"]
+        nv = len(self.names)
+        zero = (0,) * nv
+        mt2: Poly = {tuple(2 if v == nv - 1 else 0 for v in range(nv)): Fraction(1)}
+
+        def msq(i: int) -> Poly:
+            return dict(mt2) if mass[i] else {}
+
+        def var(v: int) -> Poly:
+            return {tuple(1 if w == v else 0 for w in range(nv)): Fraction(1)}
+
+        # K_ij = k_i.k_j: (s_ij - m_i^2 - m_j^2)/2 for the given invariants,
+        # the others from k_i.(k_1+...+k_n) = 0
+        K: Dict[Tuple[int, int], Poly] = {}
+        for v, (i, j) in enumerate(given):
+            K[(i, j)] = _padd(_padd(var(v), msq(i), Fraction(-1)), msq(j), Fraction(-1))
+            K[(i, j)] = {m: c / 2 for m, c in K[(i, j)].items()}
+        unknown = [(i, j) for i in range(1, self.n + 1) for j in range(i + 1, self.n + 1) if (i, j) not in K]
+        rows: List[Tuple[List[Fraction], Poly]] = []
+        for r in range(1, self.n + 1):
+            coeffs = [Fraction(1 if r in pair else 0) for pair in unknown]
+            rhs = {m: -c for m, c in msq(r).items()}
+            for pair, val in K.items():
+                if r in pair:
+                    rhs = _padd(rhs, val, Fraction(-1))
+            rows.append((coeffs, rhs))
+        for pair, val in zip(unknown, _solve(rows, len(unknown))):
+            K[pair] = val
+
+        def kk(i: int, j: int) -> Poly:
+            if i == j:
+                return msq(i)
+            return K[(min(i, j), max(i, j))]
+
+        # p_a.p_b = sign_a sign_b k_a.k_b;  p_n = -sign_n sum_{i<n} sign_i p_i
+        self.dim = self.n - 1
+        self.P = [[{m: c * sign[a] * sign[b] for m, c in kk(a, b).items()} for b in range(1, self.n)] for a in range(1, self.n)]
+        self.elim = tuple(-sign[self.n] * sign[i] for i in range(1, self.n))
+        self.zero = zero
+        self.mass_sq = {"0": {}, "mt": dict(mt2)}
+        self.mom_names = ["lm1"] + [f"p{i}" for i in range(1, self.n + 1)]
+
+    def dot(self, a: Sequence[int], b: Sequence[int]) -> Poly:
+        out: Poly = {}
+        for i, ai in enumerate(a):
+            if not ai:
+                continue
+            for j, bj in enumerate(b):
+                if bj:
+                    out = _padd(out, self.P[i][j], Fraction(ai * bj))
+        return out
+
+    def momentum(self, text: str) -> Tuple[int, Vec]:
+        """FORM momentum -> (coefficient of lm1, shift over p1..p<n-1>)."""
+        c = parse_linear(text, self.mom_names)
+        last = c[self.n]
+        return c[0], tuple(c[1 + b] + last * self.elim[b] for b in range(self.dim))
+
+
+def _solve(rows: List[Tuple[List[Fraction], Poly]], nunk: int) -> List[Poly]:
+    """Gaussian elimination with numeric coefficients and polynomial right-hand sides."""
+    rows = [(list(c), dict(r)) for c, r in rows]
+    pivots: List[int] = []
+    for col in range(nunk):
+        piv = next((k for k in range(len(pivots), len(rows)) if rows[k][0][col] != 0), None)
+        if piv is None:
+            raise ValueError("Underdetermined kinematics")
+        rows[len(pivots)], rows[piv] = rows[piv], rows[len(pivots)]
+        pc, pr = rows[len(pivots)]
+        inv = 1 / pc[col]
+        pc[:] = [x * inv for x in pc]
+        pr = {m: c * inv for m, c in pr.items()}
+        rows[len(pivots)] = (pc, pr)
+        for k in range(len(rows)):
+            if k != len(pivots) and rows[k][0][col] != 0:
+                f = rows[k][0][col]
+                rows[k] = ([x - f * y for x, y in zip(rows[k][0], pc)], _padd(rows[k][1], pr, -f))
+        pivots.append(col)
+    return [rows[k][1] for k in range(nunk)]
+
+
+# ---------------------------------------------------------------- integrals
+
+# (coefficient of l, shift) of both SPD arguments and the power
+Numerator = Tuple[int, Vec, int, Vec, int]
+
+
+def _factors(body: str) -> List[Tuple[str, List[str], int]]:
+    """f1(a,b)^k*f2(c)*... -> [(name, args, power), ...] (top-level product only)."""
+    out = []
+    depth = 0
+    start = 0
+    parts = []
+    for k, ch in enumerate(body):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "*" and depth == 0:
+            parts.append(body[start:k])
+            start = k + 1
+    parts.append(body[start:])
+    for part in parts:
+        power = 1
+        if not part.endswith(")") and "^" in part:
+            part, exp = part.rsplit("^", 1)
+            power = int(exp)
+        if part in ("", "1"):
+            continue
+        name, _, rest = part.partition("(")
+        if not rest.endswith(")"):
+            raise ValueError(f"Unexpected factor in LoopInt: {part}")
+        args, depth, start = [], 0, 0
+        inner = rest[:-1]
+        for k, ch in enumerate(inner):
+            if ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+            elif ch == "," and depth == 0:
+                args.append(inner[start:k])
+                start = k + 1
+        args.append(inner[start:])
+        out.append((name, args, power))
+    return out
+
+
+def parse_loop_integral(text: str, kin: Kinematics) -> Tuple[Tuple[Tuple[Vec, str, int], ...], Tuple[Numerator, ...]]:
+    """LoopInt(FAD(lm1+p1,mt)^2*SPD(lm1,p2)*...) -> (denominators (q, mass, power), numerators)."""
+    text = "".join(text.split())
+    if not (text.startswith("LoopInt(") and text.endswith(")")):
+        raise ValueError(f"Not a LoopInt: {text[:80]}")
+    dens: Dict[Tuple[Vec, str], int] = {}
+    nums: List[Numerator] = []
+    for name, args, power in _factors(text[len("LoopInt(") : -1]):
+        if name == "FAD":
+            alpha, q = kin.momentum(args[0])
+            mass = args[1] if len(args) > 1 else "0"
+            if alpha not in (1, -1) or mass not in kin.mass_sq:
+                raise ValueError(f"Unsupported propagator FAD({','.join(args)})")
+            key = (tuple(alpha * x for x in q), mass)
+            dens[key] = dens.get(key, 0) + power
+        elif name == "SPD" and len(args) == 2:
+            (a, A), (b, B) = kin.momentum(args[0]), kin.momentum(args[1])
+            nums.append((a, A, b, B, power))
+        else:
+            raise ValueError(f"Unexpected factor {name} in LoopInt")
+    return tuple(sorted((q, m, p) for (q, m), p in dens.items())), tuple(nums)
+
+
+# ---------------------------------------------------------------- families
+
+
+def _map_into(dset: Sequence[Prop], family: Dict[Prop, int]) -> Optional[Tuple[int, Vec]]:
+    """(sigma, s) with (sigma*(q+s), m) in `family` for every (q, m) of `dset` (l -> sigma*l + s)."""
+    if not dset:
+        return None
+    q0, m0 = dset[0]
+    for sigma in (1, -1):
+        for f, mf in family:
+            if mf != m0:
+                continue
+            s = tuple(sigma * fb - qb for fb, qb in zip(f, q0))
+            if all((tuple(sigma * (qb + sb) for qb, sb in zip(q, s)), m) in family for q, m in dset):
+                return sigma, s
+    return None
+
+
+def _rank_add(basis: List[List[Fraction]], row: Sequence[int]) -> bool:
+    """Add `row` to the echelon `basis` if it is independent of it."""
+    r = [Fraction(x) for x in row]
+    for b in basis:
+        piv = next(k for k, x in enumerate(b) if x != 0)
+        if r[piv] != 0:
+            f = r[piv] / b[piv]
+            r = [x - f * y for x, y in zip(r, b)]
+    if any(r):
+        basis.append(r)
+        return True
+    return False
+
+
+def complete_family(props: Sequence[Prop], dim: int) -> List[Prop]:
+    """Complete a propagator set to dim+1 independent propagators (extend.py, then unit steps)."""
+    if len(props) > dim + 1:
+        raise ValueError(f"{len(props)} propagators exceed a one-loop basis of {dim + 1}")
+    basis: List[List[Fraction]] = []
+    kept: List[Prop] = []
+    for q, m in props:
+        if not _rank_add(basis, (1,) + tuple(q)):
+            raise ValueError(f"Linearly dependent propagators: {props}")
+        kept.append((q, m))
+    ext = extend_topology([(node_momentum(q), m) for q, m in props], dim, target_nprops=dim + 1)
+    for mom, m in ext[len(props) :]:
+        q = shift_of(mom)
+        if len(kept) < dim + 1 and _rank_add(basis, (1,) + q):
+            kept.append((q, m))
+    taken = {q for q, _ in kept}
+    while len(kept) < dim + 1:
+        for q, _ in list(kept):
+            step = next(
+                (
+                    c
+                    for k in range(dim)
+                    for d in (1, -1)
+                    for c in [tuple(x + (d if i == k else 0) for i, x in enumerate(q))]
+                    if c not in taken and _rank_add(basis, (1,) + c)
+                ),
+                None,
+            )
+            if step is not None:
+                kept.append((step, "0"))
+                taken.add(step)
+                break
+    return kept
+
+
+def _inverse(rows: List[List[Fraction]]) -> List[List[Fraction]]:
+    n = len(rows)
+    aug = [list(r) + [Fraction(int(i == k)) for k in range(n)] for i, r in enumerate(rows)]
+    for col in range(n):
+        piv = next(k for k in range(col, n) if aug[k][col] != 0)
+        aug[col], aug[piv] = aug[piv], aug[col]
+        inv = 1 / aug[col][col]
+        aug[col] = [x * inv for x in aug[col]]
+        for k in range(n):
+            if k != col and aug[k][col] != 0:
+                f = aug[k][col]
+                aug[k] = [x - f * y for x, y in zip(aug[k], aug[col])]
+    return [r[n:] for r in aug]
+
+
+class Family:
+    """A complete one-loop topology: D_j = l^2 + 2 l.f_j + f_j.f_j - m_j^2."""
+
+    def __init__(self, name: str, props: List[Prop], kin: Kinematics) -> None:
+        self.name = name
+        self.props = props
+        self.index = {p: j for j, p in enumerate(props)}
+        # D = A x + c with x = (l^2, l.p1, ..., l.p<n-1>)
+        self.Ainv = _inverse([[Fraction(1)] + [Fraction(2 * x) for x in f] for f, _ in props])
+        self.c = [_padd(kin.dot(f, f), kin.mass_sq[m], Fraction(-1)) for f, m in props]
+
+
+# ---------------------------------------------------------------- mapping
+
+_CTX: Dict[str, object] = {}
+
+
+def _init_worker(kin: Kinematics, families: List[Family]) -> None:
+    _CTX["kin"] = kin
+    _CTX["families"] = families
+
+
+def _parse_worker(text: str):
+    return parse_loop_integral(text, _CTX["kin"])  # type: ignore[arg-type]
+
+
+def _map_worker(parsed) -> List[Tuple[str, Tuple[int, ...], Poly]]:
+    return express_integral(parsed, _CTX["kin"], _CTX["families"])  # type: ignore[arg-type]
+
+
+def express_integral(parsed, kin: Kinematics, families: List[Family]) -> List[Tuple[str, Tuple[int, ...], Poly]]:
+    """Integral -> [(family, GLI indices, coefficient), ...]; [] for integrals without denominators."""
+    dens, nums = parsed
+    if not dens:
+        return []
+    dset = [(q, m) for q, m, _ in dens]
+    for fam in families:
+        hit = _map_into(dset, fam.index)
+        if hit is not None:
+            break
+    else:
+        raise ValueError(f"No family for denominators {dset}")
+    sigma, s = hit
+    n = len(fam.props)
+    nu = [0] * n
+    for q, m, power in dens:
+        nu[fam.index[(tuple(sigma * (qb + sb) for qb, sb in zip(q, s)), m)]] += power
+
+    # numerator as a polynomial in the D_j: {exponents: coefficient}
+    num: Dict[Tuple[int, ...], Poly] = {(0,) * n: {kin.zero: Fraction(1)}}
+    for a, A, b, B, power in nums:
+        # l = sigma*l' + s:  a*l + A -> a*sigma*l' + (A + a*s)
+        a2, b2 = a * sigma, b * sigma
+        A2 = tuple(x + a * y for x, y in zip(A, s))
+        B2 = tuple(x + b * y for x, y in zip(B, s))
+        x = [Fraction(a2 * b2)] + [Fraction(a2 * y + b2 * z) for y, z in zip(B2, A2)]
+        w = [sum((x[i] * fam.Ainv[i][j] for i in range(n)), Fraction(0)) for j in range(n)]
+        const = kin.dot(A2, B2)
+        for j in range(n):
+            if w[j]:
+                const = _padd(const, fam.c[j], -w[j])
+        for _ in range(power):
+            nxt: Dict[Tuple[int, ...], Poly] = {}
+            for e, coef in num.items():
+                terms = [(e, const)] + [
+                    (tuple(ek + (1 if k == j else 0) for k, ek in enumerate(e)), {kin.zero: w[j]}) for j in range(n) if w[j]
+                ]
+                for e2, c2 in terms:
+                    prod = _pmul(coef, c2)
+                    if prod:
+                        nxt[e2] = _padd(nxt.get(e2, {}), prod)
+            num = {e: c for e, c in nxt.items() if c}
+
+    out = []
+    for e in sorted(num):
+        out.append((fam.name, tuple(v - ek for v, ek in zip(nu, e)), num[e]))
+    return out
+
+
+def find_families(
+    dsets: Iterable[Sequence[Prop]], kin: Kinematics, seeds: Iterable[Sequence[Prop]] = ()
+) -> List[Family]:
+    """
+    Families for the denominator sets: the largest sets (and first the `seeds`, e.g. the
+    propagator sets of the one-loop diagrams) that no earlier set contains up to a
+    shift, each completed to a basis; families equal up to a shift are merged.
+    """
+    def order(ds: Sequence[Prop]):
+        return (-len(ds), canonicalize([(node_momentum(q), m) for q, m in ds])[0])
+
+    raw: List[Dict[Prop, int]] = []
+    for ds in list(sorted({tuple(sorted(d)) for d in seeds if d}, key=order)) + sorted(
+        {tuple(sorted(d)) for d in dsets if d}, key=order
+    ):
+        if not any(_map_into(ds, fam) is not None for fam in raw):
+            raw.append({p: j for j, p in enumerate(ds)})
+
+    families: List[Family] = []
+    keys = set()
+    for fam in raw:
+        props = complete_family(list(fam), kin.dim)
+        key = canonicalize([(node_momentum(q), m) for q, m in props])[0]
+        if key in keys:
+            continue
+        keys.add(key)
+        families.append(Family(f"top{len(families) + 1}", props, kin))
+    return families
+
+
+# ---------------------------------------------------------------- output
+
+
+def _gli_form(name: str, nu: Sequence[int]) -> str:
+    return f"GLI({name},{','.join(str(v) for v in nu)})"
+
+
+def _gli_mma(name: str, nu: Sequence[int]) -> str:
+    return f"GLI[\"{name}\", {{{', '.join(str(v) for v in nu)}}}]"
+
+
+def _sum(terms, gli, names) -> str:
+    out = []
+    for name, nu, coef in terms:
+        c = _pstr(coef, names)
+        if c == "1":
+            out.append(gli(name, nu))
+        elif c == "-1":
+            out.append("-" + gli(name, nu))
+        else:
+            out.append(f"({c})*{gli(name, nu)}")
+    return "+".join(out).replace("+-", "-") if out else "0"
+
+
+def _topology_mma(fam: Family, kin: Kinematics) -> str:
+    names = ["l"] + [f"p{i}" for i in range(1, kin.n)]
+    props = []
+    for f, m in fam.props:
+        msq = "-mt^2" if m == "mt" else "0"
+        props.append(f"FeynAmpDenominator[StandardPropagatorDenominator[Momentum[{format_linear((1,) + f, names)}, D], 0, {msq}, {{1, 1}}]]")
+    ext = [f"p{b + 1}" for b in range(kin.dim) if any(f[b] for f, _ in fam.props)]
+    return f"FCTopology[\"{fam.name}\", {{{', '.join(props)}}}, {{l}}, {{{', '.join(ext)}}}, {{}}, {{}}]"
+
+
+def map_topologies(run_dir: Path, jobs: int = 0, integrals: Optional[List[bytes]] = None) -> Dict[str, object]:
+    """
+    Find and complete the topologies of the M0M1 loop integrals and write what
+    extract_topologies_stage2.m writes: Mathematica/Files/integrals.m
+    (integrals, glis, Topologies, intrule), form/Files/intrule.h and
+    Mathematica/Files/lenTopos.txt. `integrals` are the distinct LoopInt(...) of
+    form/Files/M0M1 (scanned when not given). Parsing and mapping run in `jobs`
+    processes (default: all CPUs). Raises ValueError for kinematics or integrals
+    it does not handle.
+    """
+    run_dir = Path(run_dir)
+    meta = json.loads((run_dir / "meta.json").read_text(encoding="utf-8"))
+    kin = Kinematics(meta)
+    form_files = run_dir / "form" / "Files"
+    mat_files = run_dir / "Mathematica" / "Files"
+    if integrals is None:
+        integrals = distinct_loop_integrals(form_files / "M0M1", m0m1_pairs(meta), jobs)
+    texts = [m.decode("ascii") if isinstance(m, bytes) else m for m in integrals]
+    workers = max(1, min(int(jobs) or (os.cpu_count() or 1), len(texts) or 1))
+    chunk = max(1, len(texts) // (4 * workers))
+
+    def run(fn, items, families):
+        if workers == 1:
+            _init_worker(kin, families)
+            return [fn(x) for x in items]
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(kin, families)) as ex:
+            return list(ex.map(fn, items, chunksize=chunk))
+
+    parsed = run(_parse_worker, texts, [])
+
+    seeds = []
+    if meta.get("topology_source") == "amplitudes":
+        amp_dir = form_files / "Amps" / "amp1l"
+        for j in range(1, int(meta.get("n1l") or 0) + 1):
+            path = amp_dir / f"d{j}.h"
+            if not path.exists():
+                raise FileNotFoundError(f"Missing one-loop amplitude {path}")
+            ds = []
+            for arg in loop_denominators(path):
+                dens, _ = parse_loop_integral(f"LoopInt(FAD({arg}))", kin)
+                ds.append(dens[0][:2])
+            seeds.append(ds)
+    families = find_families(([(q, m) for q, m, _ in dens] for dens, _ in parsed), kin, seeds)
+    mapped = run(_map_worker, parsed, families)
+
+    # only families that occur, renumbered top1..topN
+    used = sorted({name for terms in mapped for name, _, _ in terms}, key=lambda x: int(x[3:]))
+    rename = {old: f"top{k}" for k, old in enumerate(used, start=1)}
+    families = [f for f in families if f.name in rename]
+    for f in families:
+        f.name = rename[f.name]
+    mapped = [[(rename[name], nu, c) for name, nu, c in terms] for terms in mapped]
+
+    mat_files.mkdir(parents=True, exist_ok=True)
+    glis: Dict[Tuple[str, Tuple[int, ...]], None] = {}
+    for terms in mapped:
+        for name, nu, _ in terms:
+            glis.setdefault((name, nu), None)
+    mma_ints = [form_to_mathematica(t) for t in texts]
+    with (mat_files / "integrals.m").open("w", encoding="utf-8") as out:
+        out.write(f"(* glaslib.topomap: {len(texts)} integrals, {len(families)} topologies *)\n")
+        out.write("integrals = {" + ", ".join(mma_ints) + "};\n")
+        out.write("glis = {" + ", ".join(_gli_mma(name, nu) for name, nu in glis) + "};\n")
+        out.write("Topologies = {" + ", ".join(_topology_mma(f, kin) for f in families) + "};\n")
+        out.write(
+            "intrule = {"
+            + ", ".join(f"{lhs} -> {_sum(terms, _gli_mma, kin.names)}" for lhs, terms in zip(mma_ints, mapped))
+            + "};\n"
+        )
+    with (form_files / "intrule.h").open("w", encoding="utf-8") as out:
+        for text, terms in zip(texts, mapped):
+            out.write(f"id {''.join(text.split())}={_sum(terms, _gli_form, kin.names)};\n")
+    (mat_files / "lenTopos.txt").write_text(str(len(families)), encoding="utf-8")
+    (form_files / "M0M1top").mkdir(parents=True, exist_ok=True)
+    (mat_files / "M0M1top").mkdir(parents=True, exist_ok=True)
+    return {"integrals": len(texts), "topologies": len(families), "glis": len(glis)}
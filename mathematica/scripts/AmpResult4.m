@@ -12,8 +12,10 @@ name = meta["loop_main"];
 amp = ToExpression[name];
 
 Get/@FileNames["Files/M0M0/d*"];
-ampTree = Sum[d[i,j]/. rat[a_,b_]:> a/b,{i, n0l},{j, n0l}];
+(* M0M0 is the full square or the upper triangle with 2 Re off-diagonal: sum what was loaded *)
+ampTree = Total[DownValues[d][[All, 2]]]/. rat[a_,b_]:> a/b;
 Born = ampTree/. ep-> 0;
+Clear[d];
 Sca[p_, q_] := N[p[[1]]*q[[1]] - p[[2]]*q[[2]] - p[[3]]*q[[3]] - p[[4]]*q[[4]], 16]
 Sca[p_]:= N[Sca[p,p], 16]
 
@@ -55,16 +57,16 @@ Num[expr_]:= (expr/. nh-> 1/. nl-> 5/. ieps-> 10^-12)/.num;
 
 Get["Files/Ioperator.m"]
 Get/@FileNames["Files/Vas/d*"];
-Vas = Sum[d[i, j]/. rat[a_,b_]:> a/b,{i, n0l},{j, n0l}];
+Vas = Total[DownValues[d][[All, 2]]]/. rat[a_,b_]:> a/b;
 Clear[d];
 Get/@FileNames["Files/Vm/d*"];
-Vm = Sum[d[i, j]/. rat[a_,b_]:> a/b,{i, n0l},{j, n0l}];
+Vm = Total[DownValues[d][[All, 2]]]/. rat[a_,b_]:> a/b;
 Clear[d];
 Get/@FileNames["Files/Vg/d*"];
-Vg = Sum[d[i, j]/. rat[a_,b_]:> a/b,{i, n0l},{j, n0l}];
+Vg = Total[DownValues[d][[All, 2]]]/. rat[a_,b_]:> a/b;
 Clear[d];
 Get/@FileNames["Files/Vzt/d*"];
-Vzt = Sum[d[i, j]/. rat[a_,b_]:> a/b,{i, n0l},{j, n0l}];
+Vzt = Total[DownValues[d][[All, 2]]]/. rat[a_,b_]:> a/b;
 Clear[d];
 
 
@@ -56,6 +56,8 @@ sud[2,5] = Sudakov[2,5]/. mt-> 1// Together;
 
 meta = Import["../meta.json", "RawJSON"];
 n0l = meta["n0l"];
+(* contractLO stores only i <= j, d[i,j] (i<j) already holding 2 Re *)
+m0m0Triangle = TrueQ[Lookup[meta, "m0m0_triangle", False]];
 n = meta["n_in"] + meta["n_out"];
 massdim = 2*(4- n);
 
@@ -68,7 +70,7 @@ FFNewGraph[g1,in1,{lambda,ep,s,t,x,ktsq,kt3}];
 FFAlgRatFunEval[g1,map1,{in1},{lambda,ep,s,t,x,ktsq,kt3},Join[{ep},sud[1,5][[All,2]]]];
 Monitor[Do[
 Get/@FileNames["Files/M0M0/d*x"<>ToString[j]<>".m"];
-diag[j] = Sum[d[i,j]/. mt-> 1/. gs-> 1,{i, 1,n0l}]/. rat[a_,b_]:> a/b// FermatTogether;
+diag[j] = Sum[d[i,j]/. mt-> 1/. gs-> 1,{i, 1,If[m0m0Triangle, j, n0l]}]/. rat[a_,b_]:> a/b// FermatTogether;
 FFAlgRatFunEval[g1,di[j],{map1},Flatten[{ep,sud[1,5][[All,1]]}],{diag[j]}];
 FFGraphOutput[g1, di[j]];
 ,{j, 1,n0l}],j]
@@ -109,7 +111,7 @@ FFNewGraph[g1,in1,{lambda,ep,s,t,x,ktsq,kt3}];
 FFAlgRatFunEval[g1,map1,{in1},{lambda,ep,s,t,x,ktsq,kt3},Join[{ep},sud[1,5][[All,2]]]];
 Monitor[Do[
 Get/@FileNames["Files/M0M0/d*x"<>ToString[j]<>".m"];
-diag[j] = Sum[d[i,j]/. mt-> 1/. gs-> 1,{i, 1,n0l}]/. rat[a_,b_]:> a/b// FermatTogether;
+diag[j] = Sum[d[i,j]/. mt-> 1/. gs-> 1,{i, 1,If[m0m0Triangle, j, n0l]}]/. rat[a_,b_]:> a/b// FermatTogether;
 FFAlgRatFunEval[g1,di[j],{map1},Flatten[{ep,sud[2,5][[All,1]]}],{diag[j]}];
 FFGraphOutput[g1, di[j]];
 Clear[d, diag]
@@ -117,6 +117,10 @@ RestoreMass[res_, ints_] :=
 
 Get["Files/integrals.m"]
 
+(* Files/IBPSpec.json (glaslib.formscan.write_ibp_spec): per topology the integrals that
+   actually occur in M0M1top and the smallest top sector containing them *)
+ibpSpec = If[FileExistsQ["Files/IBPSpec.json"], Import["Files/IBPSpec.json", "RawJSON"], None];
+
 replacement = mands //. mt^2 -> msq;
 dimension = 4 - 2 ep;
 leg = moms;
@@ -124,7 +128,10 @@ conservation = momconservation;
 loop = {l};
 topsector = Table[1, {i, n}];
 numeric = {msq -> 1};
-BLNthreads = 4;
+(* GLAS_IBP_THREADS: Blade threads of this process; GLAS_IBP_TOPOS: comma separated
+   topologies to reduce (default all); GLAS_IBP_MERGE=0 leaves the FORM files to IBPMerge.m *)
+ibpEnv[name_, default_] := Replace[Environment[name], $Failed -> default];
+BLNthreads = ToExpression[ibpEnv["GLAS_IBP_THREADS", "4"]];
 
 (* ===== Self-test: Verify function evaluation under wolframscript ===== *)
 Print["====== Self-Test: Function Evaluation ======"];
@@ -141,15 +148,33 @@ Print["Self-test PASSED"];
 Print["==========================================="];
 Print[""];
 
+ibpTopos = If[ibpEnv["GLAS_IBP_TOPOS", ""] === "",
+  Range[Length[Topologies]],
+  ToExpression /@ StringSplit[ibpEnv["GLAS_IBP_TOPOS", ""], ","]
+];
+
 Monitor[
   Do[
     Print["\nReducing integrals from topology ", topo, " out of ", Length[Topologies]];
-    int[topo] = (Cases[glis, GLI[StringJoin["top", ToString[topo]], __], Infinity] // DeleteDuplicates);
-    target[topo] = (Cases[glis, GLI[StringJoin["top", ToString[topo]], __], Infinity] // DeleteDuplicates) /. GLI[a_, b__] :> BL[ToExpression[a], b];
+    If[ibpSpec =!= None && KeyExistsQ[ibpSpec, ToString[topo]],
+      spec[topo] = ibpSpec[ToString[topo]];
+      int[topo] = GLI[StringJoin["top", ToString[topo]], #] & /@ spec[topo]["targets"];
+      topsec[topo] = Lookup[spec[topo], "top_sector", topsector];
+      Print["  ", spec[topo]["integrals"], " integrals in ", Length[spec[topo]["sectors"]], " sectors, top sector ", topsec[topo]];
+      ,
+      int[topo] = (Cases[glis, GLI[StringJoin["top", ToString[topo]], __], Infinity] // DeleteDuplicates);
+      topsec[topo] = topsector;
+    ];
+    target[topo] = int[topo] /. GLI[a_, b__] :> BL[ToExpression[a], b];
     family[topo] = ToExpression[StringJoin["top", ToString[topo]]];
     propagator[topo] = Topologies[[topo]][[2]] /. FeynAmpDenominator[StandardPropagatorDenominator[Momentum[p_, D], 0, -mt^2, {1, 1}]] :> {p^2 - msq} /. FeynAmpDenominator[StandardPropagatorDenominator[Momentum[p_, D], 0, 0, {1, 1}]] :> {p^2} // Flatten;
-    BLFamilyDefine[family[topo], dimension, propagator[topo], loop, leg, conservation, replacement, topsector, numeric];
-    res[topo] = BLReduce[target[topo], "BladeMode" -> Automatic, "DivideLevel" -> 1];
+    If[target[topo] === {},
+      (* no integral of this topology is left in M0M1top: nothing to reduce *)
+      res[topo] = {};
+      ,
+      BLFamilyDefine[family[topo], dimension, propagator[topo], loop, leg, conservation, replacement, topsec[topo], numeric];
+      res[topo] = BLReduce[target[topo], "BladeMode" -> Automatic, "DivideLevel" -> 1];
+    ];
     (* For massless QCD, skip RestoreMass - no mass scale to restore *)
     If[modelId === "qcd_massless",
       Print["\n  [massless] Skipping RestoreMass"];
@@ -164,23 +189,8 @@ Monitor[
     file = OpenWrite["Files/IBP/IBP" <> ToString[topo] <> ".m"];
     WriteString[file, "IBP[", ToString[topo], "] = ", ToString[finalRes[topo], InputForm], ";\n"];
     Close[file];
-  , {topo, 1, Length[Topologies]}],
+  , {topo, ibpTopos}],
 topo];
 
 
-FormString[expr_] := 
- StringReplace[
-  ToString[expr /. BL[a_, b_] :> GLI[a, Sequence @@ b], 
-   InputForm], {"[" -> "(", "]" -> ")", WhitespaceCharacter -> ""}]
-If[! DirectoryQ["../form/Files/IBP"], 
-  CreateDirectory["../form/Files/IBP"]];
-
-
-Do[
-  Get["Files/IBP/IBP" <> ToString[i] <> ".m"];
-  file = OpenWrite["../form/Files/IBP/IBP" <> ToString[i] <> ".h"];
-  Do[If[IBP[i][[1]]==={},WriteString[file," "];,WriteString[file, "id ", FormString[IBP[i][[j]][[1]]], " = ", 
-    FormString[IBP[i][[j]][[2]]], ";\n"]], {j, Length[IBP[i]]}];
-  Close[file];
-  Clear[IBP];
-  , {i, Length[Topologies]}];
+If[ibpEnv["GLAS_IBP_MERGE", "1"] =!= "0", Get["IBPMerge.m"]];
@@ -0,0 +1,23 @@
+(* Writes ../form/Files/IBP/IBP<k>.h from the Files/IBP/IBP<k>.m of all topologies.
+   Run by IBP.m, or on its own after the per-topology IBP.m processes of 'ibp --jobs'. *)
+
+SetDirectory[DirectoryName[If[$FrontEnd === Null, $InputFileName, NotebookFileName[]]]];
+
+If[!ValueQ[Topologies], Get["Files/integrals.m"]];
+
+FormString[expr_] := 
+ StringReplace[
+  ToString[expr /. BL[a_, b_] :> GLI[a, Sequence @@ b], 
+   InputForm], {"[" -> "(", "]" -> ")", WhitespaceCharacter -> ""}]
+If[! DirectoryQ["../form/Files/IBP"], 
+  CreateDirectory["../form/Files/IBP"]];
+
+
+Do[
+  Get["Files/IBP/IBP" <> ToString[i] <> ".m"];
+  file = OpenWrite["../form/Files/IBP/IBP" <> ToString[i] <> ".h"];
+  Do[If[IBP[i][[1]]==={},WriteString[file," "];,WriteString[file, "id ", FormString[IBP[i][[j]][[1]]], " = ", 
+    FormString[IBP[i][[j]][[2]]], ";\n"]], {j, Length[IBP[i]]}];
+  Close[file];
+  Clear[IBP];
+  , {i, Length[Topologies]}];
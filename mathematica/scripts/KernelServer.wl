@@ -0,0 +1,121 @@
+(* ::Package:: *)
+
+(* Long-lived kernel for glaslib.core.kernelpool.
+   Usage: wolframscript -file KernelServer.wl <port> [<package>,<package>,...]
+   Listens on 127.0.0.1:<port> for one JSON request per line:
+     {"op":"ping"}                                          -> {"ok":true,"pid":...,"warm":[...]}
+     {"op":"run","script":...,"cwd":...,"env":{...},"log":...} -> {"ok":true,"rc":...}
+     {"op":"quit"}                                          -> {"ok":true}
+   Packages given on the command line are loaded once; later Get/<< of them in job
+   scripts are no-ops. Jobs run in Global` (with the preloaded contexts on the
+   path), which is cleared after every job. The server's own symbols live in
+   GlasKernel` and are out of reach of the jobs. Jobs run from the main loop, so
+   pings are answered while a job is running. *)
+
+Begin["GlasKernel`"];
+
+args = Rest[$ScriptCommandLine];
+If[Length[args] < 1, Print["Usage: wolframscript -file KernelServer.wl <port> [packages]"]; Exit[2]];
+port = ToExpression[args[[1]]];
+preload = If[Length[args] >= 2, StringSplit[args[[2]], ","], {}];
+
+(* ---------- warm packages ---------- *)
+(* Plain files are loaded into GlasWarm`, packages into their own context; both
+   stay on the context path of every job and survive the Global` cleanup. *)
+jobPath = {"Global`", "GlasWarm`", "System`"};
+
+loadWarm[pkg_String] := Module[{path},
+  path = Block[{$Context = "GlasWarm`", $ContextPath = {"GlasWarm`", "System`"}},
+    Get[pkg];
+    $ContextPath
+  ];
+  jobPath = DeleteDuplicates[Join[{"Global`"}, path, jobPath]];
+];
+
+warm = {};
+Do[
+  If[Quiet[Check[loadWarm[pkg]; True, False]],
+    AppendTo[warm, pkg]; Print["[kernel] preloaded ", pkg],
+    Print["[kernel] failed to preload ", pkg]
+  ],
+  {pkg, preload}
+];
+
+(* Files are matched by name since scripts load them through relative paths. *)
+warmQ[name_String] :=
+  MemberQ[warm, name] ||
+  (StringEndsQ[name, {".m", ".wl"}] && MemberQ[FileNameTake /@ warm, FileNameTake[name]]);
+
+If[warm =!= {},
+  Unprotect[Get];
+  Get[name_String, ___] /; warmQ[name] := Null;
+  Protect[Get];
+];
+
+(* ---------- jobs ---------- *)
+home = Directory[];
+
+runJob[req_Association] := Module[{env, log, rc},
+  env = Lookup[req, "env", <||>];
+  SetEnvironment[Normal[env]];
+  log = OpenWrite[req["log"], FormatType -> OutputForm, PageWidth -> Infinity];
+  SetDirectory[req["cwd"]];
+  rc = Block[{$Context = "Global`", $ContextPath = jobPath,
+              $Output = {log}, $Messages = {log}, Quit = quit, Exit = quit},
+    CheckAbort[Catch[Get[req["script"]]; 0, quitTag], 1]
+  ];
+  While[DirectoryStack[] =!= {}, ResetDirectory[]];
+  SetDirectory[home];
+  Close[log];
+  SetEnvironment[Thread[Keys[env] -> None]];
+  (* nothing a job defined may be seen by the next one *)
+  Quiet[ClearAll["Global`*"]];
+  If[IntegerQ[rc], rc, 0]
+];
+
+quit[] := Throw[0, quitTag];
+quit[code_Integer] := Throw[code, quitTag];
+
+(* ---------- socket ---------- *)
+buffers = <||>;
+pending = {};
+stop = False;
+
+encode[a_Association] := ExportString[a, "RawJSON", "Compact" -> True] <> "\n";
+
+reply[req_Association] := Switch[Lookup[req, "op", ""],
+  "ping", <|"ok" -> True, "pid" -> $ProcessID, "warm" -> warm, "busy" -> Length[pending]|>,
+  "quit", stop = True; <|"ok" -> True|>,
+  _, <|"ok" -> False, "error" -> "unknown op"|>
+];
+
+(* Runs are queued for the main loop; the handler itself only answers pings and quit. *)
+handle[event_Association] := Module[{sock = event["SourceSocket"], buf, req},
+  buf = Lookup[buffers, sock, ""] <> event["Data"];
+  If[!StringContainsQ[buf, "\n"], buffers[sock] = buf; Return[Null, Module]];
+  KeyDropFrom[buffers, sock];
+  req = Quiet[ImportString[First[StringSplit[buf, "\n"]], "RawJSON"]];
+  Which[
+    !AssociationQ[req], WriteString[sock, encode[<|"ok" -> False, "error" -> "bad request"|>]],
+    Lookup[req, "op", ""] === "run", AppendTo[pending, {sock, req}],
+    True, WriteString[sock, encode[reply[req]]]
+  ];
+];
+
+serve[] := Module[{listener, job},
+  listener = SocketListen["127.0.0.1:" <> ToString[port], handle];
+  If[FailureQ[listener], Print["[kernel] cannot listen on port ", port]; Exit[1]];
+  Print["[kernel] listening on ", port];
+  While[!stop,
+    If[pending === {}, Pause[0.05]; Continue[]];
+    job = First[pending];
+    pending = Rest[pending];
+    WriteString[job[[1]], encode[<|"ok" -> True, "rc" -> runJob[job[[2]]]|>]];
+  ];
+  DeleteObject[listener];
+];
+
+End[];
+
+GlasKernel`serve[];
+Exit[0]
@@ -6,6 +6,10 @@ SetDirectory[DirectoryName[If[$FrontEnd === Null, $InputFileName, NotebookFileNa
 meta = Import["../meta.json", "RawJSON"];
 n0l = meta["n0l"];
 n1l = meta["n1l"];
+(* "summed": M0M1 holds d[0,j] (summed Born); "pairs": d[i,j] for i=1..n0l *)
+bornIndices = If[Lookup[meta, "contract_mode", "pairs"] === "summed", {0}, Range[n0l]];
+(* identically zero pairs recorded by 'contract nlo' (sparsity manifest) *)
+zeroPairs = Lookup[meta, "m0m1_zero", {}];
 parts = meta["particles"];
 n = meta["n_in"] + meta["n_out"];
 modelId = Lookup[meta, "model_id", "qcd_massive"];
@@ -32,21 +36,29 @@ If[!DirectoryQ["Files"], CreateDirectory["Files"]];
 Print["[stage1] n0l=", n0l, " n1l=", n1l, " n=", n];
 
 (* -------- Load integrals -------- *)
-Print["[stage1] Loading M0M1 d[i,j] files..."];
-ClearAll[d, integrals];
+(* Files/LoopInts.m: distinct LoopInt of form/Files/M0M1 (written by 'extract topologies');
+   the d[i,j] expressions themselves are only loaded without it *)
+ClearAll[d, integrals, loopInts];
 integrals = {};
 
-Do[
+If[FileExistsQ[FileNameJoin[{"Files", "LoopInts.m"}]],
+  Print["[stage1] Loading Files/LoopInts.m..."];
+  Get[FileNameJoin[{"Files", "LoopInts.m"}]];
+  integrals = loopInts;
+  ,
+  Print["[stage1] Loading M0M1 d[i,j] files..."];
   Do[
-    file = FileNameJoin[{"Files", "M0M1", "d" <> ToString[i] <> "x" <> ToString[j] <> ".m"}];
-    If[FileExistsQ[file],
-      Get[file];
-      If[ValueQ[d[i, j]],
-        integrals = Join[integrals, Cases[d[i, j], LoopInt[__], Infinity]];
+    Do[
+      file = FileNameJoin[{"Files", "M0M1", "d" <> ToString[i] <> "x" <> ToString[j] <> ".m"}];
+      If[!MemberQ[zeroPairs, {i, j}] && FileExistsQ[file],
+        Get[file];
+        If[ValueQ[d[i, j]],
+          integrals = Join[integrals, Cases[d[i, j], LoopInt[__], Infinity]];
+        ];
       ];
-    ];
-  , {j, 1, n1l}]
-, {i, 1, n0l}];
+    , {j, 1, n1l}]
+  , {i, bornIndices}];
+];
 
 integrals = DeleteDuplicates[Flatten[integrals]];
 Print["[stage1] integrals: ", Length[integrals]];
@@ -58,12 +70,46 @@ ints1 = integrals //. {
 }//.momconservation;
 
 (* -------- Topology finding -------- *)
-Print["[stage1] FCLoopFindTopologies..."];
-{ints2, topos2} = FCLoopFindTopologies[ints1, {l}];
-sub2 = FCLoopFindSubtopologies[topos2];
-map2 = FCLoopFindTopologyMappings[topos2, PreferredTopologies -> sub2];
-topos3 = map2[[2]];
-ints3 = FCLoopApplyTopologyMappings[ints2, map2, FCLoopCreateRulesToGLI -> False];
+(* "amplitudes": the families are the loop propagator sets of the n1l diagrams
+   (Files/AmpDenominators.m, written by glaslib.formscan). Every integral of a pair
+   carries a subset of the propagators of its loop diagram, so it is written as a
+   GLI of a family directly; FCLoopFindTopologies never sees the pair integrals. *)
+ampLevel = Lookup[meta, "topology_source", "pairs"] === "amplitudes" &&
+  FileExistsQ[FileNameJoin[{"Files", "AmpDenominators.m"}]];
+If[ampLevel,
+  Get[FileNameJoin[{"Files", "AmpDenominators.m"}]];
+  ampSets = Cases[{#}, _FAD, Infinity] & /@
+    (ampDenominators //. {lm1 -> l, FAD[a_, b_] :> FAD[{a, b}]} //. momconservation);
+  ampSets = DeleteDuplicates[Sort /@ ampSets];
+  (* sets contained in a larger one are subtopologies of it *)
+  ampSets = Select[ampSets, Function[s, NoneTrue[ampSets, (# =!= s && SubsetQ[#, s]) &]]];
+  Print["[stage1] ", Length[ampSets], " amplitude-level families from ", Length[ampDenominators], " propagator sets"];
+  topos3 = MapIndexed[
+    FCTopology["amptop" <> ToString[First[#2]], FCI /@ #1, {l}, DeleteCases[moms, maxMom], {}, {}] &,
+    ampSets
+  ];
+  (* same numerator wrapper as FCLoopFindTopologies output *)
+  gliHead = If[MemberQ[Keys[Options[FCLoopFindTopologies]], Head], Head /. Options[FCLoopFindTopologies], Times];
+  toGLI[int_] := Module[{factors, dens, num, k},
+    factors = If[Head[int] === Times, List @@ int, {int}];
+    dens = Association[Replace[Cases[factors, _FAD | Power[_FAD, _Integer]], {Power[f_FAD, e_] :> (f -> e), f_FAD :> (f -> 1)}, {1}]];
+    num = Times @@ DeleteCases[factors, Power[_FAD, _Integer] | _FAD];
+    k = FirstPosition[ampSets, s_ /; SubsetQ[s, Keys[dens]], {0}, {1}, Heads -> False][[1]];
+    If[k == 0, Print["[stage1] ERROR: no amplitude family contains ", InputForm[int]]; Abort[]];
+    If[num === 1,
+      GLI["amptop" <> ToString[k], Lookup[dens, ampSets[[k]], 0]],
+      gliHead[num, GLI["amptop" <> ToString[k], Lookup[dens, ampSets[[k]], 0]]]
+    ]
+  ];
+  ints3 = toGLI /@ ints1;
+  ,
+  Print["[stage1] FCLoopFindTopologies..."];
+  {ints2, topos2} = FCLoopFindTopologies[ints1, {l}];
+  sub2 = FCLoopFindSubtopologies[topos2];
+  map2 = FCLoopFindTopologyMappings[topos2, PreferredTopologies -> sub2];
+  topos3 = map2[[2]];
+  ints3 = FCLoopApplyTopologyMappings[ints2, map2, FCLoopCreateRulesToGLI -> False];
+];
 Print["[stage1] topologies: ", Length[topos3]];
 
 (* -------- Export incomplete topologies -------- *)